@@ -0,0 +1,43 @@
+# admission.py
+# Per-client rate limiting for the render endpoints. Each client gets a token bucket:
+# it holds up to `burst` tokens, refills at `rate_per_minute`, and every render costs
+# one token. Buckets live in the worker process, so with N web workers a client can
+# get up to N times the configured rate in the worst case.
+import math
+import threading
+import time
+
+
+class TokenBucketLimiter:
+    def __init__(self, rate_per_minute, burst, max_clients=10_000):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = {} # client key -> (tokens, last refill time)
+        self._lock = threading.Lock()
+
+    def take(self, client_key, cost=1):
+        """
+        Takes `cost` tokens from the client's bucket. Returns 0 if allowed, otherwise the
+        number of seconds until enough tokens will be available (nothing is taken then).
+        """
+        if cost > self.burst:
+            cost = self.burst # A request bigger than the bucket may still go through when it's full
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(client_key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= cost:
+                self._buckets[client_key] = (tokens - cost, now)
+                if len(self._buckets) > self.max_clients:
+                    self._prune(now)
+                return 0
+            self._buckets[client_key] = (tokens, now)
+            return math.ceil((cost - tokens) / self.rate) if self.rate > 0 else 60
+
+    def _prune(self, now):
+        # Clients whose buckets have refilled completely are indistinguishable from new ones
+        full_after = self.burst / self.rate if self.rate > 0 else math.inf
+        for key, (_, last) in list(self._buckets.items()):
+            if now - last >= full_after:
+                del self._buckets[key]
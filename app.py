@@ -1,9 +1,32 @@
 # app.py
-from flask import Flask, render_template, request, redirect, url_for, session, make_response, flash
+from flask import Flask, render_template, request, redirect, url_for, session, make_response, flash, Response, send_file, stream_with_context, g, current_app
+from flask.cli import with_appcontext
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.middleware.proxy_fix import ProxyFix
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from functools import wraps
+import click
+import gc
+import hmac
 import io
+import logging
 import os
+import time
 import traceback
 
+import admission
+import cache_ring
+import config
+import memory
+import metrics
+import profiling
+import render_cache
+import rendering
+import sessions
+import pdf_templates.base
+from pdf_templates import flowables, fragments, images, textmetrics
+from pdf_templates.base import template_fingerprint
+
 # Import the specific template files based on your project structure image
 # Assuming each template_X.py file contains a 'generate_pdf' function
 # You only need to import the templates you list in AVAILABLE_TEMPLATES
@@ -11,15 +34,11 @@ import traceback
 from pdf_templates import (
     template_1, template_2, template_3, template_4, template_5,
     template_6, template_7, template_8, template_9, template_10,
-    template_11, template_12, template_14, template_15,
+    template_11, template_12, template_13, template_14, template_15,
     template_16, template_17, template_18, template_19, template_20
 )
 
 
-app = Flask(__name__)
-# IMPORTANT: Change this secret key for production!
-app.secret_key = os.urandom(24) # For session management and flash messages
-
 # --- Template Configuration ---
 # Update keys and generators to match the filenames template_X.py
 AVAILABLE_TEMPLATES = {
@@ -59,6 +78,7 @@ AVAILABLE_TEMPLATES = {
      "template_10": { "name": "Template 10", "generator": template_10.generate_pdf, "preview_image": "images/modern_preview.png" },
      "template_11": { "name": "Template 11", "generator": template_11.generate_pdf, "preview_image": "images/modern_preview.png" },
      "template_12": { "name": "Template 12", "generator": template_12.generate_pdf, "preview_image": "images/modern_preview.png" },
+     "template_13": { "name": "Template 13", "generator": template_13.generate_pdf, "preview_image": "images/modern_preview.png" },
      "template_14": { "name": "Template 14", "generator": template_14.generate_pdf, "preview_image": "images/modern_preview.png" },
      "template_15": { "name": "Template 15", "generator": template_15.generate_pdf, "preview_image": "images/modern_preview.png" },
      "template_16": { "name": "Template 16", "generator": template_16.generate_pdf, "preview_image": "images/modern_preview.png" },
@@ -152,16 +172,171 @@ REORDERABLE_SECTIONS = {
 # Define a default order - adjust based on common preference
 DEFAULT_SECTION_ORDER = list(REORDERABLE_SECTIONS.keys())
 
+# Named tracemalloc snapshots of this web process and its render processes (see /admin/memory/...)
+memory_snapshots = memory.SnapshotStore()
+
+
+def admin_required(view):
+    """Restricts a view to requests carrying the admin token (X-Admin-Token header or ?token=)."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not _has_admin_token():
+            return make_response("Not Found", 404) # Don't advertise that the endpoint exists
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def _has_admin_token():
+    expected = current_app.config.get('ADMIN_TOKEN')
+    supplied = request.headers.get('X-Admin-Token') or request.args.get('token') or ''
+    return bool(expected) and hmac.compare_digest(supplied.encode(), expected.encode())
+
+
+def node_required(view):
+    """Restricts a view to other nodes of the cache ring (requests carrying the node token)."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        ring = current_app.extensions.get('node_ring')
+        supplied = request.headers.get(cache_ring.TOKEN_HEADER, '')
+        if ring is None or not hmac.compare_digest(supplied.encode(), ring.token.encode()):
+            return make_response("Not Found", 404)
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def _sample_resume_data():
+    """SAMPLE_RESUME_DATA with the default section order, as the generators expect it."""
+    data = dict(SAMPLE_RESUME_DATA)
+    data['section_order'] = DEFAULT_SECTION_ORDER
+    return data
+
+
+def _render_executor():
+    """The render pool of the current app (see create_app)."""
+    return current_app.extensions['render_executor']
+
+
+def _admission_check(cost=1, queue_slots=1):
+    """
+    Applies the render queue limit and the per-client rate limit before any rendering starts.
+    Returns an error response (503 / 429 with Retry-After) or None if the request may proceed.
+    """
+    executor = _render_executor()
+    if executor.available() < queue_slots:
+        metrics.RENDER_REJECTED.inc(reason='queue_full')
+        return _retry_later_response(503, "The server is busy generating other resumes.", executor.retry_after())
+    limiter = current_app.extensions['render_limiter']
+    if limiter is not None:
+        wait_seconds = limiter.take(request.remote_addr or 'unknown', cost)
+        if wait_seconds:
+            metrics.RENDER_REJECTED.inc(reason='rate_limited')
+            return _retry_later_response(429, "You are generating PDFs too quickly.", wait_seconds)
+    return None
+
+
+def _retry_later_response(status, message, retry_after):
+    response = make_response(f"{message} Please try again in {retry_after} seconds.", status)
+    response.headers['Retry-After'] = str(retry_after)
+    response.mimetype = 'text/plain'
+    return response
+
+
+# Free-text fields that may span several lines; every other field is a single short line
+LONG_TEXT_FIELDS = {'summary', 'skills', 'hobbies', 'description', 'achievements', 'responsibilities', 'edu_details'}
+
+
+def _resume_limit_violations(resume_data):
+    """
+    Checks submitted resume data against the MAX_* size limits in the config and returns a
+    list of messages for the user (empty if everything fits). Oversized input would otherwise
+    end up in a render that takes minutes.
+    """
+    config = current_app.config
+    problems = []
+
+    def check_text(label, field, value):
+        if not isinstance(value, str):
+            return
+        if field in LONG_TEXT_FIELDS:
+            if len(value) > config['MAX_TEXT_CHARS']:
+                problems.append(f"{label} is too long ({len(value)} characters, max {config['MAX_TEXT_CHARS']}).")
+            elif value.count('\n') + 1 > config['MAX_TEXT_LINES']:
+                problems.append(f"{label} has too many lines (max {config['MAX_TEXT_LINES']}).")
+        elif len(value) > config['MAX_FIELD_CHARS']:
+            problems.append(f"{label} is too long ({len(value)} characters, max {config['MAX_FIELD_CHARS']}).")
+
+    for field, value in resume_data.items():
+        label = field.replace('_', ' ').capitalize()
+        if isinstance(value, list):
+            if len(value) > config['MAX_LIST_ENTRIES']:
+                problems.append(f"{label}: too many entries ({len(value)}, max {config['MAX_LIST_ENTRIES']}).")
+                continue
+            for number, entry in enumerate(value, start=1):
+                if isinstance(entry, dict):
+                    for entry_field, entry_value in entry.items():
+                        check_text(f"{label} #{number}: {entry_field.replace('_', ' ')}", entry_field, entry_value)
+        else:
+            check_text(label, field, value)
+    return problems
+
+
+def _requested_profile():
+    """Render profile for this request: ?profile=draft|final|archival, else RENDER_PROFILE. None if unknown."""
+    name = request.args.get('profile') or current_app.config['RENDER_PROFILE']
+    return name if name in pdf_templates.base.RENDER_PROFILES else None
+
+
+def _safe_filename(resume_data):
+    """Builds the download filename prefix from the applicant's name."""
+    return resume_data.get("full_name", "resume").replace(" ", "_").replace("/", "_") # Basic sanitization
+
 
 # --- Routes ---
+# Views are collected by @route and attached to the app in create_app(), so endpoint
+# names stay the function names (url_for('download_resume') etc.).
+_views = []
+
+
+def route(rule, **options):
+    def decorator(view):
+        _views.append((rule, view, options))
+        return view
+    return decorator
+
+
+_last_memory_reading = 0.0
+_last_metrics_flush = 0.0
+METRICS_FLUSH_SECONDS = 1.0 # Scrapes flush their own worker first, and gunicorn.conf.py flushes at worker exit
+
+
+def request_too_large(error):
+    """Requests over MAX_CONTENT_LENGTH: explain instead of showing a bare 413 page."""
+    limit_kb = (current_app.config['MAX_CONTENT_LENGTH'] or 0) // 1024
+    flash(f"Your submission is too large (limit {limit_kb} KB). Please shorten the longest sections.", "error")
+    return redirect(url_for('resume_form'))
 
-@app.route('/')
+
+def flush_metrics(exc=None):
+    """Publishes this worker's metric samples so a scrape on any worker sees them, at most once a second."""
+    global _last_memory_reading, _last_metrics_flush
+    if time.monotonic() - _last_metrics_flush < METRICS_FLUSH_SECONDS:
+        return
+    _last_metrics_flush = time.monotonic()
+    if time.monotonic() - _last_memory_reading > 10: # Reading smaps costs more than the rest of the teardown
+        _last_memory_reading = time.monotonic()
+        usage = memory.process_memory()
+        if usage is not None:
+            metrics.PROCESS_PRIVATE_BYTES.set(usage['private'])
+    metrics.registry.flush()
+
+
+@route('/')
 def home():
     """Renders the landing page."""
     return render_template('home.html', title="Resume Builder Home")
 
 
-@app.route('/create', methods=['GET', 'POST'])
+@route('/create', methods=['GET', 'POST'])
 def resume_form():
     """Handles the resume data input form."""
     if request.method == 'POST':
@@ -313,6 +488,14 @@ def resume_form():
 
         # Add default section order when saving data
         resume_data['section_order'] = session.get('resume_data', {}).get('section_order', DEFAULT_SECTION_ORDER)
+
+        problems = _resume_limit_violations(resume_data)
+        if problems:
+            for problem in problems:
+                flash(problem, "error")
+            # Show the form again with what was submitted, so nothing has to be retyped
+            return render_template('form.html', title="Create Your Resume", data=resume_data), 400
+
         session['resume_data'] = resume_data
 
         # Redirect to the section ordering step
@@ -327,7 +510,7 @@ def resume_form():
     return render_template('form.html', title="Create Your Resume", data=form_data)
 
 
-@app.route('/order-sections', methods=['GET', 'POST'])
+@route('/order-sections', methods=['GET', 'POST'])
 def order_sections():
     """Allows user to reorder resume sections."""
     if 'resume_data' not in session:
@@ -368,13 +551,13 @@ def order_sections():
     missing_keys = [key for key in REORDERABLE_SECTIONS if key not in current_keys_set]
     for key in missing_keys:
         ordered_sections_for_template.append((key, REORDERABLE_SECTIONS[key]))  # Append missing ones at the end
-    print("ordered_sections_for_template: ", ordered_sections_for_template) # for debugging
+    current_app.logger.debug(f"ordered_sections_for_template: {ordered_sections_for_template}")
     return render_template('order_sections.html',
                            title="Order Resume Sections",
                            sections=ordered_sections_for_template,
                            available_sections=REORDERABLE_SECTIONS)
 
-@app.route('/select-template', methods=['GET'])
+@route('/select-template', methods=['GET'])
 def select_pdf_template():
     """Displays available templates for selection."""
     if 'resume_data' not in session:
@@ -392,7 +575,7 @@ def select_pdf_template():
                            templates=AVAILABLE_TEMPLATES)
 
 
-@app.route('/download-resume/<template_id>', methods=['GET'])
+@route('/download-resume/<template_id>', methods=['GET'])
 def download_resume(template_id):
     """Generates and serves the resume PDF for download."""
     if 'resume_data' not in session:
@@ -404,30 +587,679 @@ def download_resume(template_id):
 
     resume_data = session['resume_data']
     template_info = AVAILABLE_TEMPLATES[template_id]
+    profile = _requested_profile()
+    if profile is None:
+        flash("Unknown render profile.", "error")
+        return redirect(url_for('select_pdf_template'))
 
     # Ensure section_order exists, provide default as fallback just in case session got corrupted
     if 'section_order' not in resume_data:
         resume_data['section_order'] = DEFAULT_SECTION_ORDER
-        app.logger.warning("section_order missing in session data for download, using default.")
+        current_app.logger.warning("section_order missing in session data for download, using default.")
+
+    ring = current_app.extensions['node_ring']
+    owner = None
+    if ring is not None:
+        fingerprint = template_fingerprint(template_info['generator'])
+        pdf_cache = _render_executor().cache
+        owner = ring.remote_owner(fingerprint, resume_data, pdf_cache.fields_for(fingerprint) if pdf_cache is not None else None)
+    if owner is not None:
+        response = _download_from_owner(owner, template_id, template_info, resume_data, profile)
+        if response is not None:
+            return response
+        # Owner unreachable: render it here instead
+
+    # A cached PDF costs next to nothing, so it skips the queue and the rate limit
+    lookup_start = time.perf_counter()
+    cached = _render_executor().cached(template_info['generator'], resume_data, profile)
+    cache_seconds = time.perf_counter() - lookup_start
+    if cached is None:
+        rejection = _admission_check()
+        if rejection is not None:
+            return rejection
 
     try:
         # The generator function MUST handle the section_order within resume_data
-        pdf_buffer = template_info['generator'](resume_data)
-
-        response = make_response(pdf_buffer.getvalue())
-        response.headers['Content-Type'] = 'application/pdf'
-        # Set Content-Disposition to 'attachment' to force download
-        safe_filename = resume_data.get("full_name", "resume").replace(" ", "_").replace("/", "_") # Basic sanitization
-        response.headers['Content-Disposition'] = \
-            f'attachment; filename="{safe_filename}_{template_id}.pdf"'
+        render_start = time.perf_counter()
+        if cached is not None:
+            result = cached
+        else:
+            try:
+                future = _render_executor().submit(template_info['generator'], resume_data, profile=profile)
+            except rendering.RenderQueueFull as e:
+                # Lost the race for the last queue slot to another request
+                metrics.RENDER_REJECTED.inc(reason='queue_full')
+                return _retry_later_response(503, "The server is busy generating other resumes.", e.retry_after)
+            result = future.result(timeout=_render_executor().result_timeout())
+            # Time spent handing the job to the pool and getting the PDF back, on top of the render itself
+            pool_seconds = max(time.perf_counter() - render_start - result.timings.get('story', 0.0) - result.timings.get('layout', 0.0), 0.0)
+
+        response_start = time.perf_counter()
+        safe_filename = _safe_filename(resume_data)
+        if cached is not None and cached.file is not None:
+            response = _send_cached_pdf(cached, f"{safe_filename}_{template_id}.pdf")
+        else:
+            response = make_response(result.pdf)
+            response.headers['Content-Type'] = 'application/pdf'
+            # Set Content-Disposition to 'attachment' to force download
+            response.headers['Content-Disposition'] = \
+                f'attachment; filename="{safe_filename}_{template_id}.pdf"'
+        if cached is not None:
+            # The stored stage timings belong to the render that filled the cache, not to this request
+            request_timings = {'session': g.get('session_decode_seconds', 0.0),
+                               'cache': cache_seconds,
+                               'response': time.perf_counter() - response_start}
+            response.headers['Server-Timing'] = rendering.format_server_timing(request_timings)
+            current_app.logger.info(f"pdf served from cache template_id={template_id} bytes={cached.size}")
+            return response
+        request_timings = {'session': g.get('session_decode_seconds', 0.0),
+                           'cache': cache_seconds,
+                           'pool': pool_seconds,
+                           'response': time.perf_counter() - response_start}
+        response.headers['Server-Timing'] = rendering.format_server_timing({**request_timings, **result.timings})
+        rendering.record_render(template_id, result, request_timings)
         return response
+    except (rendering.RenderLimitExceeded, FuturesTimeoutError) as e:
+        if isinstance(e, FuturesTimeoutError):
+            e = rendering.RenderLimitExceeded('time', 'no result from the render pool')
+        rendering.record_render_error(template_id, e)
+        current_app.logger.warning(f"PDF render stopped (template {template_id}): {e}")
+        flash(f"Your resume is too large or complex to generate with template '{template_info['name']}' "
+              f"in the time available. Try shortening long sections or choose another template.", "error")
+        return redirect(url_for('select_pdf_template'))
     except Exception as e:
-        app.logger.error(f"Error generating PDF for download (template {template_id}): {e}\n{traceback.format_exc()}")
+        rendering.record_render_error(template_id, e)
+        current_app.logger.error(f"Error generating PDF for download (template {template_id}): {e}\n{traceback.format_exc()}")
         flash(f"An error occurred while generating the PDF for template '{template_info['name']}'. Please try again or choose another template.", "error")
         # Redirect back to template selection on error
         return redirect(url_for('select_pdf_template'))
 
 
+def _send_cached_pdf(cached, download_name):
+    """
+    Download response for a PDF in the disk cache. With SENDFILE_MODE set, the front proxy
+    sends the file (X-Accel-Redirect for nginx, X-Sendfile for Apache/lighttpd) and the
+    response carries only headers; otherwise the open file goes to the WSGI server, which
+    can sendfile() it without copying through Python.
+    """
+    mode = current_app.config['SENDFILE_MODE']
+    if mode == 'x-accel':
+        cached.close()
+        # An empty body, but send_file still produces the Content-Type and (RFC 6266) Content-Disposition headers
+        response = send_file(io.BytesIO(), mimetype='application/pdf', as_attachment=True, download_name=download_name,
+                             conditional=False)
+        relative_path = os.path.relpath(cached.path, current_app.config['RENDER_CACHE_DIR']).replace(os.sep, '/')
+        response.headers['X-Accel-Redirect'] = f"{current_app.config['SENDFILE_ACCEL_PREFIX'].rstrip('/')}/{relative_path}"
+        return response
+    if mode == 'x-sendfile':
+        cached.close()
+        # USE_X_SENDFILE is on in this mode, so send_file answers with an X-Sendfile header
+        return send_file(cached.path, mimetype='application/pdf', as_attachment=True, download_name=download_name,
+                         conditional=False)
+    response = send_file(cached.file, mimetype='application/pdf', as_attachment=True, download_name=download_name,
+                         conditional=False)
+    response.content_length = cached.size
+    return response
+
+
+def _download_from_owner(owner, template_id, template_info, resume_data, profile):
+    """
+    Fetches the PDF from the node owning it on the cache ring and returns the download response,
+    or None if the owner can't be reached and the render should happen locally.
+    """
+    # Queue limits are the owner's business; the rate limit applies where the client connects
+    rejection = _admission_check(queue_slots=0)
+    if rejection is not None:
+        return rejection
+    fetch_start = time.perf_counter()
+    try:
+        pdf = current_app.extensions['node_ring'].fetch(owner, template_id, resume_data, profile)
+    except cache_ring.NodeUnavailable as e:
+        current_app.logger.warning(f"cache owner unavailable, rendering locally: {e}")
+        return None
+    except cache_ring.RemoteRenderFailed as e:
+        if e.status == 503:
+            metrics.RENDER_REJECTED.inc(reason='queue_full')
+            return _retry_later_response(503, "The server is busy generating other resumes.", e.retry_after or 1)
+        if e.limit:
+            flash(f"Your resume is too large or complex to generate with template '{template_info['name']}' "
+                  f"in the time available. Try shortening long sections or choose another template.", "error")
+        else:
+            flash(f"An error occurred while generating the PDF for template '{template_info['name']}'. Please try again or choose another template.", "error")
+        current_app.logger.warning(f"cache owner {owner} could not render template {template_id}: {e}")
+        return redirect(url_for('select_pdf_template'))
+
+    response = make_response(pdf)
+    response.headers['Content-Type'] = 'application/pdf'
+    response.headers['Content-Disposition'] = \
+        f'attachment; filename="{_safe_filename(resume_data)}_{template_id}.pdf"'
+    response.headers['Server-Timing'] = rendering.format_server_timing(
+        {'session': g.get('session_decode_seconds', 0.0), 'remote': time.perf_counter() - fetch_start})
+    return response
+
+
+@route('/internal/render/<template_id>', methods=['POST'])
+@node_required
+def internal_render(template_id):
+    """
+    Serves a PDF this node owns on the cache ring to the node that received the download:
+    from the cache if possible, otherwise rendered here (and cached) first.
+    Body: the resume data as JSON; ?profile= names the render profile.
+    """
+    if template_id not in AVAILABLE_TEMPLATES:
+        return make_response(f"Unknown template '{template_id}'\n", 404)
+    profile = _requested_profile()
+    if profile is None:
+        return make_response("Unknown render profile\n", 400)
+    resume_data = request.get_json(silent=True)
+    if not isinstance(resume_data, dict):
+        return make_response("Expected the resume data as a JSON object\n", 400)
+    generator = AVAILABLE_TEMPLATES[template_id]['generator']
+    executor = _render_executor()
+
+    cached = executor.cached(generator, resume_data, profile)
+    if cached is not None:
+        if cached.file is not None:
+            response = send_file(cached.file, mimetype='application/pdf', conditional=False)
+            response.content_length = cached.size
+            return response
+        return Response(cached.pdf, mimetype='application/pdf')
+
+    try:
+        result = executor.submit(generator, resume_data, profile=profile).result(timeout=executor.result_timeout())
+    except rendering.RenderQueueFull as e:
+        metrics.RENDER_REJECTED.inc(reason='queue_full')
+        return _retry_later_response(503, "The server is busy generating other resumes.", e.retry_after)
+    except (rendering.RenderLimitExceeded, FuturesTimeoutError) as e:
+        if isinstance(e, FuturesTimeoutError):
+            e = rendering.RenderLimitExceeded('time', 'no result from the render pool')
+        rendering.record_render_error(template_id, e)
+        response = make_response(f"{e}\n", 422)
+        response.headers[cache_ring.LIMIT_HEADER] = e.limit
+        return response
+    except Exception as e:
+        rendering.record_render_error(template_id, e)
+        current_app.logger.error(f"Error generating PDF for another node (template {template_id}): {e}\n{traceback.format_exc()}")
+        return make_response("Render failed\n", 500)
+    rendering.record_render(template_id, result)
+    return Response(result.pdf, mimetype='application/pdf')
+
+
+@route('/download-resume/bundle', methods=['GET'])
+def download_resume_bundle():
+    """Renders several templates in parallel and streams them back as one ZIP file."""
+    if 'resume_data' not in session:
+        flash("Session expired or data missing. Please start over.", "error")
+        return redirect(url_for('resume_form'))
+
+    # ?templates=template_1,template_4 selects templates; no parameter (or 'all') means every template
+    requested = request.args.get('templates', '').strip()
+    if requested and requested != 'all':
+        template_ids = list(dict.fromkeys(t.strip() for t in requested.split(',') if t.strip()))
+    else:
+        template_ids = list(AVAILABLE_TEMPLATES.keys())
+
+    invalid_ids = [t for t in template_ids if t not in AVAILABLE_TEMPLATES]
+    if invalid_ids or not template_ids:
+        flash("Invalid template selected.", "error")
+        return redirect(url_for('select_pdf_template'))
+    profile = _requested_profile()
+    if profile is None:
+        flash("Unknown render profile.", "error")
+        return redirect(url_for('select_pdf_template'))
+
+    resume_data = dict(session['resume_data'])
+    if 'section_order' not in resume_data:
+        resume_data['section_order'] = DEFAULT_SECTION_ORDER
+        current_app.logger.warning("section_order missing in session data for bundle download, using default.")
+
+    generators = {t: AVAILABLE_TEMPLATES[t]['generator'] for t in template_ids}
+    # A bundle costs one token per distinct render. It only needs one free queue slot to start,
+    # since render_bundle() feeds its renders to the pool a few at a time. Checked up front
+    # because the status line is already sent once the ZIP starts streaming.
+    rejection = _admission_check(cost=rendering.distinct_generators(generators))
+    if rejection is not None:
+        return rejection
+    safe_filename = _safe_filename(resume_data)
+
+    response = Response(stream_with_context(rendering.stream_bundle_zip(_render_executor(), resume_data, generators, safe_filename, profile)),
+                        mimetype='application/zip')
+    response.headers['Content-Disposition'] = f'attachment; filename="{safe_filename}_resumes.zip"'
+    return response
+
+
+@route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus scrape endpoint, aggregated over all worker processes. Needs the admin token unless METRICS_PUBLIC."""
+    if not current_app.config['METRICS_PUBLIC'] and not _has_admin_token():
+        return make_response("Not Found", 404)
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+@route('/admin/profile/<template_id>', methods=['GET'])
+@admin_required
+def admin_profile_template(template_id):
+    """
+    Profiles one template render. Query parameters:
+    source=session|sample (default: session data if present, else the sample resume),
+    repeat=N renders per profiler, format=text|pstats|collapsed.
+    """
+    if template_id not in AVAILABLE_TEMPLATES:
+        return make_response(f"Unknown template '{template_id}'\n", 404)
+
+    source = request.args.get('source', 'session' if 'resume_data' in session else 'sample')
+    if source == 'session' and 'resume_data' in session:
+        resume_data = dict(session['resume_data'])
+        resume_data.setdefault('section_order', DEFAULT_SECTION_ORDER)
+    else:
+        resume_data = _sample_resume_data()
+    repeat = max(1, min(request.args.get('repeat', 3, type=int), 50))
+
+    report = profiling.profile_render(template_id, AVAILABLE_TEMPLATES[template_id]['generator'], resume_data, repeat=repeat)
+    output_format = request.args.get('format', 'text')
+    if output_format == 'collapsed':
+        body = report.collapsed()
+    elif output_format == 'pstats':
+        body = report.pstats_text(limit=request.args.get('limit', 80, type=int))
+    else:
+        body = report.full_text()
+    return Response(body, mimetype='text/plain')
+
+
+@route('/admin/memory/snapshots/<name>', methods=['POST'])
+@admin_required
+def admin_take_memory_snapshot(name):
+    """
+    Takes a named allocation snapshot of this web process, or with ?process=render of one of
+    its render processes, where templates actually run. Tracing starts there on first use.
+    """
+    if request.args.get('process') == 'render':
+        pid, snapshot = _render_executor().snapshot_worker()
+        memory_snapshots.add(name, snapshot, pid)
+        rss = ''
+    else:
+        snapshot = memory_snapshots.take(name)
+        pid = os.getpid()
+        rss = f", RSS {memory.current_rss_bytes() / 1024 / 1024:.1f} MiB"
+    traced = sum(stat.size for stat in snapshot.statistics('filename'))
+    return Response(f"Snapshot '{name}' taken in process {pid}: {traced / 1024:.1f} KiB traced{rss}\n", mimetype='text/plain')
+
+
+@route('/admin/memory/diff', methods=['GET'])
+@admin_required
+def admin_memory_diff():
+    """
+    Diffs two named snapshots of the same process: ?from=NAME&to=NAME. For a web process snapshot
+    `to` defaults to a fresh snapshot; render process snapshots need both names, since there is
+    no way to pick which render process takes a new one (take snapshots until two share a pid).
+    key=lineno|traceback groups by line or by full call stack; limit= caps the sites shown.
+    """
+    from_name = request.args.get('from', '')
+    old_snapshot = memory_snapshots.get(from_name)
+    if old_snapshot is None:
+        return make_response(f"Unknown snapshot. Available: {', '.join(memory_snapshots.names()) or 'none'}\n", 404)
+    to_name = request.args.get('to')
+    if not to_name and memory_snapshots.pid(from_name) != os.getpid():
+        return make_response(f"Snapshot '{from_name}' is of another process; name a second snapshot with ?to=\n", 400)
+    new_snapshot = memory_snapshots.get(to_name) if to_name else memory_snapshots.take('latest')
+    if new_snapshot is None:
+        return make_response(f"Unknown snapshot '{to_name}'\n", 404)
+    if to_name and memory_snapshots.pid(to_name) != memory_snapshots.pid(from_name):
+        return make_response(f"Snapshots '{from_name}' (process {memory_snapshots.pid(from_name)}) and '{to_name}' "
+                             f"(process {memory_snapshots.pid(to_name)}) are of different processes\n", 409)
+    key_type = 'traceback' if request.args.get('key') == 'traceback' else 'lineno'
+    limit = max(1, min(request.args.get('limit', 25, type=int), 200))
+    return Response(memory.format_diff(old_snapshot, new_snapshot, limit, key_type), mimetype='text/plain')
+
+
+@route('/admin/memory/snapshots', methods=['DELETE'])
+@admin_required
+def admin_clear_memory_snapshots():
+    """Drops every snapshot and turns tracemalloc off again (render processes are replaced, which stops theirs)."""
+    memory_snapshots.clear()
+    _render_executor().restart_pool('memory_snapshots')
+    return Response("Snapshots cleared, tracing stopped\n", mimetype='text/plain')
+
+
+@route('/admin/memory/leak-check/<template_id>', methods=['GET'])
+@admin_required
+def admin_leak_check(template_id):
+    """Renders the sample resume ?renders=N times in this process and reports allocation sites that kept growing."""
+    if template_id not in AVAILABLE_TEMPLATES:
+        return make_response(f"Unknown template '{template_id}'\n", 404)
+    renders = max(1, min(request.args.get('renders', 5, type=int), 100))
+    generator = AVAILABLE_TEMPLATES[template_id]['generator']
+    resume_data = _sample_resume_data()
+    report = memory.leak_check(lambda: rendering.render_pdf(generator, resume_data), renders=renders)
+    return Response(report, mimetype='text/plain')
+
+
+@click.command('profile-template')
+@click.argument('template_id')
+@click.option('--repeat', default=3, show_default=True, help='Renders per profiler.')
+@click.option('--collapsed', 'collapsed_path', type=click.Path(dir_okay=False, writable=True), help='Write collapsed stacks to this file.')
+@click.option('--pstats', 'pstats_path', type=click.Path(dir_okay=False, writable=True), help='Write raw cProfile stats (for snakeviz etc.) to this file.')
+@with_appcontext
+def profile_template_command(template_id, repeat, collapsed_path, pstats_path):
+    """Profiles TEMPLATE_ID rendering the sample resume."""
+    if template_id not in AVAILABLE_TEMPLATES:
+        raise click.BadParameter(f"unknown template, choose from: {', '.join(AVAILABLE_TEMPLATES)}", param_hint='TEMPLATE_ID')
+    report = profiling.profile_render(template_id, AVAILABLE_TEMPLATES[template_id]['generator'], _sample_resume_data(), repeat=repeat)
+    click.echo(report.summary_text())
+    click.echo(report.pstats_text(limit=30))
+    if collapsed_path:
+        with open(collapsed_path, 'w') as f:
+            f.write(report.collapsed())
+    if pstats_path:
+        report.stats.dump_stats(pstats_path)
+
+
+@click.command('bench-profiles')
+@click.option('--repeat', default=3, show_default=True, help='Renders per template and profile (the median is reported).')
+@click.option('--image', default=os.path.join('static', 'images', 'profile.jpg'), show_default=True,
+              help='Profile photo to render with.')
+def bench_profiles_command(repeat, image):
+    """Renders the sample resume with every template under every render profile and compares time and size."""
+    resume_data = _sample_resume_data()
+    resume_data['profile_image_path'] = image
+    profiles = list(pdf_templates.base.RENDER_PROFILES)
+    templates = _distinct_templates()
+
+    click.echo(f"{'template':<13}" + "".join(f"{name + ' ms':>14}{name + ' KiB':>14}" for name in profiles))
+    totals = {name: [0.0, 0] for name in profiles}
+    for template_id, generator in templates.values():
+        row = f"{template_id:<13}"
+        for name in profiles:
+            seconds = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = rendering.render_pdf(generator, resume_data, name)
+                seconds.append(time.perf_counter() - start)
+            median = sorted(seconds)[len(seconds) // 2]
+            totals[name][0] += median
+            totals[name][1] += len(result.pdf)
+            row += f"{median * 1000:>14.1f}{len(result.pdf) / 1024:>14.1f}"
+        click.echo(row)
+    click.echo(f"{'total':<13}" + "".join(f"{totals[name][0] * 1000:>14.1f}{totals[name][1] / 1024:>14.1f}" for name in profiles))
+
+
+def _long_resume_data(copies):
+    """The sample resume with its summary and descriptions repeated `copies` times, for benchmarks."""
+    resume_data = _sample_resume_data()
+    resume_data['summary'] = ' '.join([resume_data['summary']] * copies)
+    resume_data['experiences'] = [dict(entry, description='\n'.join([entry['description']] * copies))
+                                  for entry in resume_data['experiences']]
+    resume_data['key_achievements'] = [dict(entry, description=' '.join([entry['description']] * copies))
+                                       for entry in resume_data['key_achievements']]
+    return resume_data
+
+
+def _distinct_templates():
+    """{fingerprint: (template_id, generator)} with one template per distinct implementation."""
+    templates = {}
+    for template_id, info in AVAILABLE_TEMPLATES.items():
+        templates.setdefault(template_fingerprint(info['generator']), (template_id, info['generator']))
+    return templates
+
+
+@click.command('bench-layout')
+@click.option('--repeat', default=5, show_default=True, help='Renders per template and setting (the median is reported).')
+@click.option('--copies', default=6, show_default=True, help='How many times the sample summary and descriptions are repeated.')
+def bench_layout_command(repeat, copies):
+    """
+    Renders a resume with long summary and description texts with every template, with the text
+    width cache off and on, and compares layout time (doc.build). The fragment cache is off
+    throughout and the draft profile is used, so every render breaks all of its lines again and
+    photos don't count.
+    """
+    resume_data = _long_resume_data(copies)
+    templates = _distinct_templates()
+
+    def median_layout_ms(generator):
+        seconds = sorted(rendering.render_pdf(generator, resume_data, 'draft').timings.get('layout', 0.0)
+                         for _ in range(repeat))
+        return seconds[len(seconds) // 2] * 1000
+
+    width_cache = textmetrics.width_cache
+    fragment_entries, width_entries = fragments.fragment_cache.max_entries, width_cache.max_entries
+    fragments.fragment_cache.max_entries = 0
+    click.echo(f"{'template':<13}{'uncached ms':>14}{'cached ms':>14}{'speedup':>10}{'hit rate':>10}")
+    totals = [0.0, 0.0]
+    try:
+        for template_id, generator in templates.values():
+            width_cache.configure(0)
+            uncached = median_layout_ms(generator)
+            width_cache.configure(width_entries or textmetrics.DEFAULT_MAX_ENTRIES)
+            cached = median_layout_ms(generator)
+            hits, misses, _ = width_cache.info()
+            totals[0] += uncached
+            totals[1] += cached
+            click.echo(f"{template_id:<13}{uncached:>14.1f}{cached:>14.1f}{uncached / cached if cached else 0:>9.2f}x"
+                       f"{hits / ((hits + misses) or 1):>10.1%}")
+    finally:
+        fragments.fragment_cache.max_entries = fragment_entries
+        width_cache.configure(width_entries)
+    click.echo(f"{'total':<13}{totals[0]:>14.1f}{totals[1]:>14.1f}{totals[0] / totals[1] if totals[1] else 0:>9.2f}x")
+
+
+@click.command('bench-paragraphs')
+@click.option('--repeat', default=5, show_default=True, help='Renders per template and setting (the median is reported).')
+@click.option('--copies', default=6, show_default=True, help='How many times the sample summary and descriptions are repeated.')
+def bench_paragraphs_command(repeat, copies):
+    """
+    Renders a resume with long summary and description texts with every template, building its
+    text as Paragraphs only, with PlainParagraph for unmarked text, and with BulletList for
+    description blocks as well, and compares render time and peak allocation. The fragment
+    cache is off throughout and the draft profile is used.
+    """
+    resume_data = _long_resume_data(copies)
+    # (name, plain_text_fast_path, bullet_list_flowable)
+    modes = [('Paragraph', False, False), ('plain', True, False), ('list', True, True)]
+
+    def measure(generator):
+        seconds = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rendering.render_pdf(generator, resume_data, 'draft')
+            seconds.append(time.perf_counter() - start)
+        _, peak = memory.measure_peak_allocation(rendering.render_pdf, generator, resume_data, 'draft')
+        return sorted(seconds)[len(seconds) // 2] * 1000, peak / 1024
+
+    fragment_entries = fragments.fragment_cache.max_entries
+    fragments.fragment_cache.max_entries = 0
+    click.echo(f"{'template':<13}" + "".join(f"{name + ' ms':>14}{name + ' KiB':>15}" for name, _, _ in modes))
+    totals = {name: [0.0, 0.0] for name, _, _ in modes}
+    try:
+        for template_id, generator in _distinct_templates().values():
+            row = f"{template_id:<13}"
+            for name, plain, lists in modes:
+                flowables.plain_text_fast_path, flowables.bullet_list_flowable = plain, lists
+                milliseconds, kib = measure(generator)
+                totals[name][0] += milliseconds
+                totals[name][1] += kib
+                row += f"{milliseconds:>14.1f}{kib:>15.0f}"
+            click.echo(row)
+    finally:
+        fragments.fragment_cache.max_entries = fragment_entries
+        flowables.plain_text_fast_path = flowables.bullet_list_flowable = True
+    click.echo(f"{'total':<13}" + "".join(f"{totals[name][0]:>14.1f}{totals[name][1]:>15.0f}" for name, _, _ in modes))
+
+
+@click.command('worker-memory')
+@click.argument('master_pid', type=int)
+def worker_memory_command(master_pid):
+    """
+    Shows private vs shared memory of every process under MASTER_PID (e.g. the gunicorn
+    master): web workers and their render pools. Compare the totals of a cold start
+    (RESUME_WARM_START=0) with a warm one to see what pre-fork warm-up saves.
+    """
+    click.echo(f"{'pid':>8} {'parent':>8} {'rss MiB':>9} {'pss MiB':>9} {'shared MiB':>11} {'private MiB':>12}")
+    totals = dict.fromkeys(('rss', 'pss', 'shared', 'private'), 0)
+    queue = [(pid, master_pid) for pid in memory.child_pids(master_pid)]
+    while queue:
+        pid, parent = queue.pop(0)
+        usage = memory.process_memory(pid)
+        if usage is None:
+            continue # Exited in the meantime
+        queue.extend((child, pid) for child in memory.child_pids(pid))
+        for key in totals:
+            totals[key] += usage[key]
+        click.echo(f"{pid:>8} {parent:>8} " + " ".join(
+            f"{usage[key] / 1024 / 1024:>{width}.1f}" for key, width in (('rss', 9), ('pss', 9), ('shared', 11), ('private', 12))))
+    click.echo(f"{'total':>17} " + " ".join(
+        f"{totals[key] / 1024 / 1024:>{width}.1f}" for key, width in (('rss', 9), ('pss', 9), ('shared', 11), ('private', 12))))
+
+
+@click.command('purge-sessions')
+@with_appcontext
+def purge_sessions_command():
+    """Deletes expired filesystem sessions (run periodically when SESSION_BACKEND=filesystem)."""
+    interface = current_app.session_interface
+    if not isinstance(interface, sessions.FilesystemSessionInterface):
+        raise click.UsageError("SESSION_BACKEND is not 'filesystem'; nothing to purge.")
+    removed = interface.purge_expired(current_app.permanent_session_lifetime.total_seconds())
+    click.echo(f"Removed {removed} expired session(s) from {interface.directory}")
+
+
+# --- Application Factory & Warm-up ---
+def create_app(config_overrides=None, instance_path=None):
+    """
+    Builds and configures the Flask app (see config.py for the settings and where they come from).
+    Every server process calls this once, or inherits the result of a preload. The instance folder
+    (secret key, sessions, render cache) is `instance_path`, else RESUME_INSTANCE_PATH, else ./instance.
+    """
+    instance_path = instance_path or os.environ.get('RESUME_INSTANCE_PATH')
+    app = Flask(__name__, instance_path=os.path.abspath(instance_path) if instance_path else None)
+    config.load_config(app, config_overrides)
+
+    if app.config['SESSION_BACKEND'] == 'filesystem':
+        app.session_interface = sessions.TimedFilesystemSessionInterface(app.config['SESSION_DIR'])
+    elif app.config['SESSION_BACKEND'] == 'cookie':
+        app.session_interface = sessions.TimedSessionInterface()
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND {app.config['SESSION_BACKEND']!r}, expected 'cookie' or 'filesystem'")
+
+    if app.config['RENDER_PROFILE'] not in pdf_templates.base.RENDER_PROFILES:
+        raise ValueError(f"Unknown RENDER_PROFILE {app.config['RENDER_PROFILE']!r}, expected one of "
+                         f"{', '.join(pdf_templates.base.RENDER_PROFILES)}")
+    if app.config['SENDFILE_MODE'] not in (None, 'x-accel', 'x-sendfile'):
+        raise ValueError(f"Unknown SENDFILE_MODE {app.config['SENDFILE_MODE']!r}, expected 'x-accel', 'x-sendfile' or None")
+    # Flask's own send_file (static files included) then hands files to the front proxy too
+    app.config['USE_X_SENDFILE'] = app.config['SENDFILE_MODE'] == 'x-sendfile'
+
+    if app.config['METRICS_DIR']:
+        metrics.registry.directory = app.config['METRICS_DIR']
+    # Drops a previous run's samples when started outside gunicorn (whose on_starting hook empties the directory)
+    metrics.registry.reset_stale_directory()
+    # Render processes are forked from here and inherit the setting
+    fragments.fragment_cache.max_entries = app.config['FRAGMENT_CACHE_ENTRIES']
+    textmetrics.width_cache.configure(app.config['TEXT_WIDTH_CACHE_ENTRIES'])
+    # Paragraphs and tables laid out in this process (warm-up, in-process renders) measure through the width cache
+    textmetrics.install()
+    images.photo_cache.max_entries = app.config['PHOTO_CACHE_ENTRIES']
+    pdf_templates.base.invariant_output = app.config['RENDER_INVARIANT']
+
+    cache_bytes = app.config['RENDER_CACHE_MB'] * 1024 * 1024
+    if not cache_bytes:
+        pdf_cache = None
+    elif app.config['RENDER_CACHE_BACKEND'] == 'disk':
+        pdf_cache = render_cache.DiskRenderCache(app.config['RENDER_CACHE_DIR'], cache_bytes)
+    elif app.config['RENDER_CACHE_BACKEND'] == 'memory':
+        pdf_cache = render_cache.MemoryRenderCache(cache_bytes)
+    else:
+        raise ValueError(f"Unknown RENDER_CACHE_BACKEND {app.config['RENDER_CACHE_BACKEND']!r}, expected 'disk' or 'memory'")
+
+    # Process pool that runs every PDF render, so memory growth stays in processes that can be recycled
+    app.extensions['render_executor'] = rendering.RenderExecutor(
+        max_workers=app.config['RENDER_WORKERS'],
+        max_renders_per_worker=app.config['WORKER_MAX_RENDERS'],
+        max_worker_rss_bytes=app.config['WORKER_MAX_RSS_MB'] * 1024 * 1024,
+        alloc_sample_rate=app.config['ALLOC_SAMPLE_RATE'],
+        max_pending=app.config['RENDER_QUEUE_LIMIT'],
+        seconds_per_cost=app.config['RENDER_SECONDS_PER_COST'],
+        batch_delay=app.config['RENDER_BATCH_DELAY_SECONDS'],
+        limits=rendering.RenderLimits(
+            cpu_seconds=app.config['RENDER_CPU_SECONDS'],
+            wall_seconds=app.config['RENDER_TIMEOUT_SECONDS'],
+            memory_bytes=app.config['RENDER_MEMORY_LIMIT_MB'] * 1024 * 1024 if app.config['RENDER_MEMORY_LIMIT_MB'] else None),
+        cache=pdf_cache,
+    )
+
+    # Optional cache ring across nodes (see cache_ring.py). The node token defaults to one
+    # derived from SECRET_KEY, which every node must share anyway.
+    app.extensions['node_ring'] = None
+    if app.config['CACHE_NODES']:
+        if app.config['CACHE_NODE_SELF'] not in app.config['CACHE_NODES']:
+            raise ValueError("CACHE_NODE_SELF must be this node's entry in CACHE_NODES")
+        token = app.config['CACHE_NODE_TOKEN'] or hmac.new(app.config['SECRET_KEY'].encode(), b'cache-node-token', 'sha256').hexdigest()
+        read_timeout = app.config['CACHE_NODE_READ_TIMEOUT_SECONDS']
+        if read_timeout is None:
+            result_timeout = app.extensions['render_executor'].result_timeout()
+            read_timeout = result_timeout + 5 if result_timeout else 60
+        app.extensions['node_ring'] = cache_ring.NodeRing(app.config['CACHE_NODES'], app.config['CACHE_NODE_SELF'], str(token),
+                                                          timeout=read_timeout,
+                                                          connect_timeout=app.config['CACHE_NODE_CONNECT_TIMEOUT_SECONDS'],
+                                                          down_seconds=app.config['CACHE_NODE_DOWN_SECONDS'])
+
+    app.extensions['render_limiter'] = (
+        admission.TokenBucketLimiter(app.config['RATE_LIMIT_PER_MINUTE'], app.config['RATE_LIMIT_BURST'])
+        if app.config['RATE_LIMIT_PER_MINUTE'] else None)
+    if app.config['TRUSTED_PROXIES']:
+        # Behind a reverse proxy every request comes from the proxy; take the client address from X-Forwarded-For
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'], x_proto=app.config['TRUSTED_PROXIES'])
+
+    for rule, view, options in _views:
+        app.add_url_rule(rule, view_func=view, **options)
+    app.teardown_request(flush_metrics)
+    app.register_error_handler(RequestEntityTooLarge, request_too_large)
+    app.cli.add_command(profile_template_command)
+    app.cli.add_command(bench_profiles_command)
+    app.cli.add_command(bench_layout_command)
+    app.cli.add_command(bench_paragraphs_command)
+    app.cli.add_command(worker_memory_command)
+    app.cli.add_command(purge_sessions_command)
+    return app
+
+
+def warm_up(app):
+    """
+    Does the work every process would otherwise repeat on its first request: renders the
+    sample resume once through each distinct generator (imports, fonts, style sheets,
+    ReportLab's module caches), loads the image codecs, then freezes everything that is
+    alive into the GC's permanent generation. Call it in the pre-fork parent (see
+    gunicorn.conf.py): children then share these pages copy-on-write, and because frozen
+    objects are never traversed by the collector, their pages stay shared.
+    """
+    start = time.perf_counter()
+    resume_data = _sample_resume_data()
+    warmed = set()
+    for template_id, template_info in AVAILABLE_TEMPLATES.items():
+        generator = template_info['generator']
+        fingerprint = template_fingerprint(generator)
+        if fingerprint in warmed:
+            continue
+        warmed.add(fingerprint)
+        try:
+            rendering.render_pdf(generator, resume_data)
+        except Exception as e:
+            app.logger.warning(f"Warm-up render failed for {template_id}: {e}")
+
+    try:
+        from PIL import Image as PILImage
+        PILImage.init() # Registers every codec plugin now instead of on the first image
+    except ImportError:
+        pass
+
+    gc.collect()
+    gc.freeze()
+    app.logger.info(f"Warm-up rendered {len(warmed)} distinct templates in {time.perf_counter() - start:.2f}s, "
+                    f"froze {gc.get_freeze_count()} objects")
+
+
+app = create_app()
+
+
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
     # Make sure this is set correctly for deployment environments
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,154 @@
+# cache_ring.py
+# Optional sharding of rendered PDFs across several app nodes. Every node lists the
+# same CACHE_NODES; a consistent-hash ring picks one owner per render (template
+# fingerprint plus a hash of the resume), and only the owner renders and caches it.
+# Other nodes ask the owner over its internal endpoint (/internal/render/<template_id>),
+# which answers from the owner's cache or renders there. Adding or removing a node
+# only moves the keys next to it on the ring.
+#
+# Renders are placed by the template fingerprint and only the resume fields the
+# template reads (learned by the render cache, see render_cache.py), like the cache
+# key, so edits to other fields keep the same owner. A node that hasn't learned a
+# template's fields yet routes on the whole resume; at worst that asks the wrong
+# owner, which costs a cache hit.
+#
+# If the owner can't be reached the asking node renders locally, so a node going
+# down costs cache hits, not downloads. Connecting gives up after a short
+# connect_timeout, and a node that failed is skipped for `down_seconds` before it
+# is tried again, so requests during an outage don't each wait on it.
+#
+# To try it on one machine, start several processes with different ports and cache
+# directories, e.g.
+#   RESUME_CACHE_NODES='["http://127.0.0.1:8001", "http://127.0.0.1:8002"]' \
+#   RESUME_CACHE_NODE_SELF=http://127.0.0.1:8001 RESUME_RENDER_CACHE_DIR=/tmp/node1 \
+#   GUNICORN_BIND=127.0.0.1:8001 gunicorn -c gunicorn.conf.py app:app
+# and the same with 8002 / node2.
+import bisect
+import hashlib
+import http.client
+import json
+import logging
+import threading
+import time
+import urllib.parse
+
+import render_cache
+
+logger = logging.getLogger(__name__)
+
+TOKEN_HEADER = 'X-Cache-Node-Token'
+LIMIT_HEADER = 'X-Render-Limit' # Set by the owner when the render hit one of its RenderLimits
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.sha256(value.encode('utf-8')).digest()[:8], 'big')
+
+
+def routing_key(fingerprint, resume_data, fields=None):
+    """
+    Key used to place a render on the ring: the template implementation plus the resume `fields`
+    it reads (render_cache.select_fields), or the whole resume if they aren't known.
+    """
+    selected = render_cache.select_fields(resume_data, fields) if fields is not None else resume_data
+    return fingerprint + ':' + hashlib.sha256(json.dumps(selected, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class HashRing:
+    """Consistent-hash ring; each node appears at `replicas` points so keys spread evenly."""
+    def __init__(self, nodes, replicas=100):
+        self.nodes = list(nodes)
+        self._points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(replicas))
+        self._hashes = [point for point, _ in self._points]
+
+    def owner(self, key):
+        if not self._points:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._points)
+        return self._points[index][1]
+
+
+class NodeUnavailable(Exception):
+    """The owner node could not be asked (connection refused, timeout, unexpected answer)."""
+
+
+class RemoteRenderFailed(Exception):
+    """The owner answered but could not provide the PDF."""
+    def __init__(self, status, retry_after=None, limit=None):
+        super().__init__(f"owner node answered {status}")
+        self.status = status
+        self.retry_after = retry_after
+        self.limit = limit
+
+
+class NodeRing:
+    """
+    This node's view of the ring: who owns a render, and how to fetch it from them.
+    `connect_timeout` bounds reaching a node, `timeout` the wait for its answer (None: no limit).
+    """
+    def __init__(self, nodes, self_node, token, timeout=None, connect_timeout=1.0, down_seconds=30.0):
+        self.ring = HashRing(nodes)
+        self.self_node = self_node
+        self.token = token
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.down_seconds = down_seconds
+        self._down_until = {} # node -> time.monotonic() when it may be tried again
+        self._lock = threading.Lock()
+
+    def remote_owner(self, fingerprint, resume_data, fields=None):
+        """URL of the node owning this render, or None if it is this node or the owner is marked down."""
+        owner = self.ring.owner(routing_key(fingerprint, resume_data, fields))
+        if owner == self.self_node or self.is_down(owner):
+            return None
+        return owner
+
+    def is_down(self, node):
+        with self._lock:
+            until = self._down_until.get(node)
+            if until is not None and time.monotonic() >= until:
+                del self._down_until[node]
+                until = None
+        return until is not None
+
+    def mark_down(self, node):
+        """Skips `node` for the next `down_seconds` (renders it owns happen locally meanwhile)."""
+        with self._lock:
+            self._down_until[node] = time.monotonic() + self.down_seconds
+        logger.warning(f"cache node {node} marked down for {self.down_seconds:g}s")
+
+    def fetch(self, node, template_id, resume_data, profile):
+        """
+        Asks `node` for the PDF and returns its bytes. Raises RemoteRenderFailed when the owner
+        refused or failed the render, NodeUnavailable when it could not be asked at all (and
+        then marks it down).
+        """
+        try:
+            return self._post(node, f"/internal/render/{template_id}?profile={urllib.parse.quote(profile)}",
+                              json.dumps(resume_data).encode('utf-8'))
+        except NodeUnavailable:
+            self.mark_down(node)
+            raise
+
+    def _post(self, node, path, body):
+        url = urllib.parse.urlsplit(node)
+        connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        connection = connection_class(url.hostname, url.port, timeout=self.connect_timeout)
+        try:
+            connection.connect()
+            connection.sock.settimeout(self.timeout) # From here on, waiting for the render
+            connection.request('POST', url.path.rstrip('/') + path, body=body,
+                               headers={'Content-Type': 'application/json', TOKEN_HEADER: self.token})
+            response = connection.getresponse()
+            pdf = response.read()
+        except (http.client.HTTPException, OSError) as e:
+            raise NodeUnavailable(f"{node}: {e}") from None
+        finally:
+            connection.close()
+
+        if response.status == 200:
+            return pdf
+        if response.status in (422, 500, 503):
+            retry_after = response.getheader('Retry-After')
+            raise RemoteRenderFailed(response.status, int(retry_after) if retry_after and retry_after.isdigit() else None,
+                                     response.getheader(LIMIT_HEADER))
+        raise NodeUnavailable(f"{node} answered {response.status}")
@@ -0,0 +1,157 @@
+# config.py
+# Application settings. Values are layered, later sources winning:
+#   1. DEFAULTS below
+#   2. a Python config file named by RESUME_CONFIG_FILE (UPPERCASE names only)
+#   3. environment variables RESUME_<NAME>, e.g. RESUME_RENDER_WORKERS=4 or
+#      RESUME_SESSION_BACKEND=filesystem (values are parsed as JSON when possible)
+#   4. overrides passed to create_app()
+# Everything a process derives on its own (the secret key, directories) resolves to
+# the same value in every worker, so any worker can serve any request. Those defaults
+# live in the instance folder, which RESUME_INSTANCE_PATH moves (see app.create_app).
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # Session signing key. If unset, SECRET_KEY_FILE is read; if that is unset too, a key
+    # is generated once into the instance folder and shared by every process on this host.
+    'SECRET_KEY': None,
+    'SECRET_KEY_FILE': None,
+    # 'cookie' (signed cookie, default) or 'filesystem' (data in SESSION_DIR, id in the cookie)
+    'SESSION_BACKEND': 'cookie',
+    'SESSION_DIR': None, # Default: <instance folder>/sessions
+    # Admin endpoints (/admin/...) are disabled unless a token is configured
+    'ADMIN_TOKEN': None,
+    # Render pool size per web worker (renders running at once); None means one process per CPU
+    'RENDER_WORKERS': None,
+    # Renders (running plus waiting) a web worker accepts before answering 503; None means 4 per render process
+    'RENDER_QUEUE_LIMIT': None,
+    # Scheduling: a render is queued as if submitted this many seconds later per unit of estimated
+    # cost (see rendering.estimate_render_cost), and batch work (bundles) this much later again
+    'RENDER_SECONDS_PER_COST': 0.5,
+    'RENDER_BATCH_DELAY_SECONDS': 5.0,
+    # Per-client token bucket for downloads (one token per distinct render); 0 disables the limit.
+    # Enforced per web worker, so the effective limit is up to workers x this.
+    'RATE_LIMIT_PER_MINUTE': 30,
+    'RATE_LIMIT_BURST': 20,
+    # Number of reverse proxies in front of the app whose X-Forwarded-For can be trusted
+    'TRUSTED_PROXIES': 0,
+    # Input limits: request body size (larger requests get 413), single-line fields, free-text
+    # fields (summary, descriptions, ...) and the number of entries per list section
+    'MAX_CONTENT_LENGTH': 1024 * 1024,
+    'MAX_FIELD_CHARS': 300,
+    'MAX_TEXT_CHARS': 5000,
+    'MAX_TEXT_LINES': 100,
+    'MAX_LIST_ENTRIES': 25,
+    # Per-render ceilings enforced inside the render processes; None disables one
+    'RENDER_CPU_SECONDS': 15,
+    'RENDER_TIMEOUT_SECONDS': 30,
+    'RENDER_MEMORY_LIMIT_MB': 1024, # Address space of each render process, not just what one render uses
+    # Cache of finished PDFs, keyed on the fields each template reads: 'disk' (files in
+    # RENDER_CACHE_DIR shared by every worker on the host) or 'memory' (per web worker).
+    # RENDER_CACHE_MB bounds its size; 0 disables the cache.
+    'RENDER_CACHE_BACKEND': 'disk',
+    'RENDER_CACHE_DIR': None, # Default: <instance folder>/render_cache
+    'RENDER_CACHE_MB': 256,
+    # Let the front proxy send cached PDFs: 'x-accel' (nginx X-Accel-Redirect to
+    # SENDFILE_ACCEL_PREFIX, an internal location aliased to RENDER_CACHE_DIR), 'x-sendfile'
+    # (Apache/lighttpd; also covers /static), or None to send them from the app.
+    # With 'x-accel', let nginx serve /static directly as well.
+    'SENDFILE_MODE': None,
+    'SENDFILE_ACCEL_PREFIX': '/_render_cache',
+    # Cache ring across app nodes (see cache_ring.py): base URLs of every node, e.g.
+    # ["http://10.0.0.1:8000", "http://10.0.0.2:8000"], and this node's own entry among them.
+    # Nodes authenticate to each other with CACHE_NODE_TOKEN (default: derived from SECRET_KEY).
+    'CACHE_NODES': None,
+    'CACHE_NODE_SELF': None,
+    'CACHE_NODE_TOKEN': None,
+    # Seconds to reach another node before rendering locally instead, and to wait for its PDF
+    # (None: its render wait, i.e. queue plus RENDER_TIMEOUT_SECONDS, plus 5 s; 60 s without a
+    # render timeout). A node that couldn't be asked is skipped for CACHE_NODE_DOWN_SECONDS.
+    'CACHE_NODE_CONNECT_TIMEOUT_SECONDS': 1.0,
+    'CACHE_NODE_READ_TIMEOUT_SECONDS': None,
+    'CACHE_NODE_DOWN_SECONDS': 30,
+    # Render profile (pdf_templates.base.RENDER_PROFILES) for downloads and bundles unless the
+    # request asks for another with ?profile=; compare them with `flask bench-profiles`
+    'RENDER_PROFILE': 'final',
+    # Byte-identical output for identical input (fixed creation date and document ID)
+    'RENDER_INVARIANT': True,
+    # Section fragments (built flowables) cached per render process; 0 disables the cache
+    'FRAGMENT_CACHE_ENTRIES': 512,
+    # Word widths (font, size, text) cached per render process for line breaking; 0 disables the cache
+    'TEXT_WIDTH_CACHE_ENTRIES': 32768,
+    # Decoded profile photos (handles: size plus prepared image per profile) cached per render process; 0 disables the cache
+    'PHOTO_CACHE_ENTRIES': 16,
+    # Render process recycling: after this many renders or past this resident size (MB) a render process is replaced
+    'WORKER_MAX_RENDERS': 500,
+    'WORKER_MAX_RSS_MB': 512,
+    # Fraction of renders that also record their peak allocation with tracemalloc (several times slower while tracing)
+    'ALLOC_SAMPLE_RATE': 0.01,
+    # Shared directory for per-process metric samples; None keeps metrics.DEFAULT_METRICS_DIR
+    'METRICS_DIR': None,
+    # Serve /metrics without the admin token (for scrapers that can't send one); keep off on public hosts
+    'METRICS_PUBLIC': False,
+}
+
+
+def load_config(app, overrides=None):
+    """Fills app.config from the layered sources above and resolves the secret key."""
+    app.config.update(DEFAULTS)
+    config_file = os.environ.get('RESUME_CONFIG_FILE')
+    if config_file:
+        app.config.from_pyfile(os.path.abspath(config_file))
+    app.config.from_prefixed_env('RESUME')
+    if overrides:
+        app.config.update(overrides)
+
+    for key in ('SECRET_KEY', 'ADMIN_TOKEN', 'CACHE_NODE_TOKEN'):
+        # from_prefixed_env turns an all-digit value into an int; these must stay strings
+        if app.config[key] is not None:
+            app.config[key] = str(app.config[key])
+    app.config['SECRET_KEY'] = resolve_secret_key(app)
+    if app.config['SESSION_DIR'] is None:
+        app.config['SESSION_DIR'] = os.path.join(app.instance_path, 'sessions')
+    if app.config['RENDER_CACHE_DIR'] is None:
+        app.config['RENDER_CACHE_DIR'] = os.path.join(app.instance_path, 'render_cache')
+
+
+def resolve_secret_key(app):
+    """Returns the configured key, the contents of SECRET_KEY_FILE, or the instance folder's shared key."""
+    if app.config['SECRET_KEY']:
+        return app.config['SECRET_KEY']
+    if app.config['SECRET_KEY_FILE']:
+        with open(app.config['SECRET_KEY_FILE']) as f:
+            return f.read().strip()
+    return _instance_secret_key(os.path.join(app.instance_path, 'secret_key'))
+
+
+def _instance_secret_key(path):
+    """
+    Reads the key at `path`, creating it first if needed. Workers starting at the same time
+    race to create it: each writes a complete candidate to a temp file and hard-links it into
+    place, which fails if the file already exists, so exactly one key wins and nobody ever
+    reads a half-written file.
+    """
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.secret_key-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(os.urandom(32).hex())
+        try:
+            os.link(tmp_path, path)
+            logger.warning(f"Generated a new secret key in {path}. Set RESUME_SECRET_KEY or RESUME_SECRET_KEY_FILE "
+                           f"when running on more than one host.")
+        except FileExistsError:
+            pass # Another process got there first; use its key
+    finally:
+        os.remove(tmp_path)
+    with open(path) as f:
+        return f.read().strip()
@@ -0,0 +1,43 @@
+# gunicorn.conf.py
+# Pre-fork setup for `gunicorn app:app`. The app is imported once in the master,
+# warmed up (see app.warm_up) and frozen, and workers fork from that warm state so
+# they share it copy-on-write instead of each building it on its first request.
+# Set RESUME_WARM_START=0 to compare against a cold start (`flask worker-memory <master pid>`).
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+
+WARM_START = os.environ.get('RESUME_WARM_START', '1') != '0'
+
+if WARM_START:
+    # Keep the collector from running during import/warm-up: collections there only leave
+    # freed holes in pages the workers will share. warm_up() collects once and then freezes.
+    gc.disable()
+
+
+def on_starting(server):
+    import metrics
+    metrics.registry.reset_directory() # Samples from the previous run would be added to this one's
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is imported and before any worker is forked
+    if WARM_START:
+        from app import warm_up
+        try:
+            warm_up(server.app.wsgi())
+        finally:
+            # The master keeps running (and forking replacement workers) with the collector back on;
+            # workers inherit that. Freezing first keeps the shared objects out of its reach.
+            gc.freeze()
+            gc.enable()
+
+
+def worker_exit(server, worker):
+    # Requests publish metrics at most once a second (app.flush_metrics); don't lose the last second's samples
+    import metrics
+    metrics.registry.flush()
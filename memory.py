@@ -0,0 +1,187 @@
+# memory.py
+# Memory accounting for render processes: resident set size readings for the
+# recycling watchdog, tracemalloc peak measurement for sampled renders, and named
+# allocation snapshots that can be diffed to find allocation sites that keep growing.
+import gc
+import linecache
+import os
+import resource
+import threading
+import tracemalloc
+
+# Frames kept per traceback while tracing; enough to see which template call led into ReportLab.
+# Every allocation pays for its traceback, so this is a trade-off against tracing overhead.
+TRACE_FRAMES = 5
+
+
+def current_rss_bytes():
+    """Resident set size of this process in bytes (falls back to the peak RSS off Linux)."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+_SMAPS_FIELDS = {'Rss': 'rss', 'Pss': 'pss', 'Shared_Clean': 'shared', 'Shared_Dirty': 'shared',
+                 'Private_Clean': 'private', 'Private_Dirty': 'private'}
+
+
+def process_memory(pid='self'):
+    """
+    Breaks a process's memory down into {'rss', 'pss', 'shared', 'private'} bytes (Linux only,
+    None elsewhere). 'private' is what the process would free on exit; for pre-forked workers
+    it is the part that copy-on-write sharing didn't save.
+    """
+    totals = dict.fromkeys(('rss', 'pss', 'shared', 'private'), 0)
+    for path in (f'/proc/{pid}/smaps_rollup', f'/proc/{pid}/smaps'): # smaps_rollup needs Linux 4.14+
+        try:
+            with open(path) as f:
+                for line in f:
+                    field, _, rest = line.partition(':')
+                    if field in _SMAPS_FIELDS:
+                        totals[_SMAPS_FIELDS[field]] += int(rest.split()[0]) * 1024
+            return totals
+        except (OSError, ValueError):
+            continue
+    return None
+
+
+def child_pids(pid):
+    """Direct children of a process, from /proc/<pid>/task/*/children."""
+    children = []
+    try:
+        for tid in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{tid}/children') as f:
+                children.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return children
+
+
+def measure_peak_allocation(func, *args, **kwargs):
+    """
+    Calls func(*args, **kwargs) with tracemalloc running and returns (result, peak bytes).
+    Allocations made during the call are what is counted. If tracing is already on
+    (e.g. someone took a snapshot) the peak is reset and tracing is left running.
+    """
+    already_tracing = tracemalloc.is_tracing()
+    if already_tracing:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+    else:
+        tracemalloc.start(1) # One frame is enough for a size measurement and much cheaper
+        baseline = 0
+    try:
+        result = func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not already_tracing:
+            tracemalloc.stop()
+    return result, max(peak - baseline, 0)
+
+
+# --- Allocation Snapshots ---
+_TRACE_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def _ensure_tracing():
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACE_FRAMES)
+
+
+def format_diff(old_snapshot, new_snapshot, limit=25, key_type='lineno'):
+    """Text report of the allocation sites that grew the most between two snapshots."""
+    old_snapshot = old_snapshot.filter_traces(_TRACE_FILTERS)
+    new_snapshot = new_snapshot.filter_traces(_TRACE_FILTERS)
+    stats = new_snapshot.compare_to(old_snapshot, key_type)
+    total_diff = sum(stat.size_diff for stat in stats)
+    lines = [f"Net change: {total_diff / 1024:+.1f} KiB over {len(stats)} allocation sites", ""]
+    for stat in stats[:limit]:
+        lines.append(f"{stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+8d} blocks  "
+                     f"(now {stat.size / 1024:.1f} KiB in {stat.count} blocks)")
+        for frame_line in stat.traceback.format(limit=5, most_recent_first=True):
+            lines.append("    " + frame_line.strip())
+    return '\n'.join(lines) + '\n'
+
+
+class SnapshotStore:
+    """
+    Named tracemalloc snapshots, each remembered with the pid of the process it was taken in.
+    take() snapshots this process (the first one turns tracing on); add() keeps a snapshot
+    taken elsewhere, e.g. in a render process (see rendering.RenderExecutor.snapshot_worker).
+    """
+    def __init__(self, max_snapshots=10):
+        self.max_snapshots = max_snapshots
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    def take(self, name):
+        _ensure_tracing()
+        snapshot = tracemalloc.take_snapshot()
+        self.add(name, snapshot, os.getpid())
+        return snapshot
+
+    def add(self, name, snapshot, pid):
+        with self._lock:
+            self._snapshots.pop(name, None)
+            self._snapshots[name] = (snapshot, pid)
+            while len(self._snapshots) > self.max_snapshots:
+                del self._snapshots[next(iter(self._snapshots))] # Drop the oldest
+
+    def names(self):
+        with self._lock:
+            return list(self._snapshots)
+
+    def get(self, name):
+        with self._lock:
+            snapshot, _ = self._snapshots.get(name, (None, None))
+        return snapshot
+
+    def pid(self, name):
+        """The process a snapshot was taken in, or None for an unknown name."""
+        with self._lock:
+            _, pid = self._snapshots.get(name, (None, None))
+        return pid
+
+    def clear(self):
+        """Forgets every snapshot and stops tracing in this process (tracemalloc slows allocations noticeably)."""
+        with self._lock:
+            self._snapshots.clear()
+        tracemalloc.stop()
+
+
+def take_snapshot():
+    """Pool-side task: snapshots the render process it runs in (starting tracing there on first use)."""
+    _ensure_tracing()
+    return os.getpid(), tracemalloc.take_snapshot()
+
+
+def leak_check(render, renders=5, limit=25):
+    """
+    Calls `render()` once to warm caches, then `renders` more times, and reports which
+    allocation sites grew in between. Steady growth per render (image caches, styles
+    piling up in module state) shows up at the top; one-off warm-up costs don't.
+    """
+    was_tracing = tracemalloc.is_tracing()
+    _ensure_tracing()
+    try:
+        render()
+        gc.collect() # Only count what is still reachable, not garbage waiting for the cycle collector
+        before = tracemalloc.take_snapshot()
+        for _ in range(renders):
+            render()
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return f"Allocation growth over {renders} renders after one warm-up render\n\n" + format_diff(before, after, limit)
@@ -0,0 +1,345 @@
+# metrics.py
+# Minimal Prometheus-style metrics that work across several worker processes.
+#
+# Each process keeps its samples in memory and writes them to its own file in the
+# metrics directory (see flush()): web workers at most once a second as requests
+# finish and when they exit, render processes after every render. A scrape of
+# /metrics on any worker reads every file in the directory and adds the samples
+# up, so counters and histograms cover the whole server. No client library or push
+# gateway is needed; the directory just has to be shared by all workers.
+#
+# Files are named after the process's pid and start time, so a new process that
+# gets an old pid doesn't overwrite the old one's counters. Scrapes fold the files
+# of processes that have exited (recycled render processes, replaced workers) into
+# one aggregate file and delete them; their gauges are dropped, since gauges only
+# count live processes. The directory is emptied when a server starts: by
+# gunicorn's on_starting hook, and by create_app when no live process has a file
+# in it (a previous run's leftovers).
+import fcntl
+import glob
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+
+DEFAULT_METRICS_DIR = os.path.join(tempfile.gettempdir(), 'flex_flask_metrics')
+AGGREGATE_FILE = 'aggregate.json' # Counters and histograms of exited processes
+LOCK_FILE = '.lock'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape_label_value(v)}"' for k, v in labels) + '}'
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, registry, name, help_text, label_names=()):
+        self.registry = registry
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+
+    def _labels(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple((name, str(labels[name])) for name in self.label_names)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        self.registry._add(self.name + '_total', self._labels(labels), amount)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        self.registry._set(self.name, self._labels(labels), value)
+
+    def inc(self, amount=1, **labels):
+        self.registry._add(self.name, self._labels(labels), amount)
+
+    def dec(self, amount=1, **labels):
+        self.registry._add(self.name, self._labels(labels), -amount)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, help_text, label_names=(), buckets=()):
+        super().__init__(registry, name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        label_items = self._labels(labels)
+        for bound in self.buckets:
+            # Every bucket gets a sample (possibly 0) so the series is complete from the first observation
+            self.registry._add(self.name + '_bucket', label_items + (('le', _format_value(bound)),), 1 if value <= bound else 0)
+        self.registry._add(self.name + '_sum', label_items, value)
+        self.registry._add(self.name + '_count', label_items, 1)
+
+
+class MetricsRegistry:
+    """Holds metric definitions and this process's samples, and renders the merged exposition."""
+    def __init__(self, directory=None):
+        self.directory = directory or os.environ.get('RESUME_METRICS_DIR', DEFAULT_METRICS_DIR)
+        self._metrics = {}
+        self._samples = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._file_pid = None # Process the file name below was made for (a forked child makes its own)
+        self._file_name = None
+        self._start_time = None
+
+    # --- Definitions ---
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, label_names=()):
+        return self._register(Counter(self, name, help_text, label_names))
+
+    def gauge(self, name, help_text, label_names=()):
+        return self._register(Gauge(self, name, help_text, label_names))
+
+    def histogram(self, name, help_text, label_names=(), buckets=()):
+        return self._register(Histogram(self, name, help_text, label_names, buckets))
+
+    # --- Local samples ---
+    def _add(self, sample_name, labels, amount):
+        with self._lock:
+            key = (sample_name, labels)
+            self._samples[key] = self._samples.get(key, 0.0) + amount
+            self._dirty = True
+
+    def _set(self, sample_name, labels, value):
+        with self._lock:
+            self._samples[(sample_name, labels)] = float(value)
+            self._dirty = True
+
+    def reset_local(self):
+        """Drops this process's samples. A forked child calls this so it doesn't report its parent's samples again."""
+        with self._lock:
+            self._samples.clear()
+            self._dirty = False
+
+    def _own_file(self):
+        """This process's file name and start time (see _process_start_time)."""
+        pid = os.getpid()
+        if self._file_pid != pid:
+            self._start_time = _process_start_time(pid)
+            self._file_name = f'{pid}-{self._start_time if self._start_time is not None else time.time_ns()}.json'
+            self._file_pid = pid
+        return self._file_name, self._start_time
+
+    def flush(self, force=False):
+        """Writes this process's samples to its file in the metrics directory (if anything changed, or `force`)."""
+        file_name, start_time = self._own_file()
+        with self._lock:
+            if not self._dirty and not force:
+                return
+            payload = {'pid': os.getpid(), 'start': start_time,
+                       'samples': [[name, list(map(list, labels)), value] for (name, labels), value in self._samples.items()]}
+            self._dirty = False
+        os.makedirs(self.directory, exist_ok=True)
+        _write_json(os.path.join(self.directory, file_name), payload)
+
+    def _locked_directory(self):
+        """Holds the directory's lock file (one process compacting or resetting at a time) while open."""
+        os.makedirs(self.directory, exist_ok=True)
+        lock = open(os.path.join(self.directory, LOCK_FILE), 'a')
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        return lock # Closing it releases the lock
+
+    def _process_files(self):
+        """(path, payload) for every process file in the directory that can be read."""
+        files = []
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            if os.path.basename(path) == AGGREGATE_FILE:
+                continue
+            payload = _read_json(path)
+            if payload is not None:
+                files.append((path, payload))
+        return files
+
+    def reset_directory(self):
+        """Removes sample files left behind by a previous run. Call once before workers start."""
+        with self._locked_directory():
+            for path in glob.glob(os.path.join(self.directory, '*.json')):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def reset_stale_directory(self):
+        """
+        Empties the directory if no live process has a file in it, i.e. it holds a previous run's
+        samples, and then writes this process's file so processes starting later keep it.
+        """
+        with self._locked_directory():
+            if not any(_process_alive(payload['pid'], payload.get('start')) for _, payload in self._process_files()):
+                for path in glob.glob(os.path.join(self.directory, '*.json')):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+        self.flush(force=True)
+
+    # --- Aggregation ---
+    def _compact(self, gauge_names):
+        """Folds the files of exited processes into the aggregate file (gauges dropped) and deletes them. Needs the lock."""
+        aggregate_path = os.path.join(self.directory, AGGREGATE_FILE)
+        aggregate = _read_json(aggregate_path) or {'samples': [], 'folded': []}
+        # Names of files already folded in, in case deleting them failed last time
+        folded = {name for name in aggregate['folded'] if os.path.exists(os.path.join(self.directory, name))}
+        totals = {(name, tuple(map(tuple, labels))): value for name, labels, value in aggregate['samples']}
+        exited = []
+        for path, payload in self._process_files():
+            name = os.path.basename(path)
+            if name in folded or _process_alive(payload['pid'], payload.get('start')):
+                continue
+            for sample_name, labels, value in payload.get('samples', []):
+                if sample_name not in gauge_names:
+                    key = (sample_name, tuple(map(tuple, labels)))
+                    totals[key] = totals.get(key, 0.0) + value
+            exited.append(path)
+        if not exited:
+            return
+        folded.update(os.path.basename(path) for path in exited)
+        _write_json(aggregate_path, {'samples': [[name, list(map(list, labels)), value] for (name, labels), value in totals.items()],
+                                     'folded': sorted(folded)})
+        for path in exited:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _merged_samples(self):
+        self.flush()
+        gauge_names = {name for name, metric in self._metrics.items() if metric.kind == 'gauge'}
+        merged = {}
+        with self._locked_directory():
+            self._compact(gauge_names)
+            aggregate = _read_json(os.path.join(self.directory, AGGREGATE_FILE)) or {'samples': []}
+            payloads = [aggregate] + [payload for _, payload in self._process_files()]
+        for payload in payloads:
+            for name, labels, value in payload.get('samples', []):
+                key = (name, tuple(tuple(pair) for pair in labels))
+                merged[key] = merged.get(key, 0.0) + value
+        return merged
+
+    def render(self):
+        """Returns every metric in the Prometheus text exposition format."""
+        by_sample_name = {}
+        for (sample_name, labels), value in sorted(self._merged_samples().items(), key=_sample_sort_key):
+            by_sample_name.setdefault(sample_name, []).append((labels, value))
+
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f'# HELP {name} {metric.help_text}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            sample_names = {'counter': (name + '_total',), 'gauge': (name,),
+                            'histogram': (name + '_bucket', name + '_sum', name + '_count')}[metric.kind]
+            for sample_name in sample_names:
+                for labels, value in by_sample_name.get(sample_name, []):
+                    lines.append(f'{sample_name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _process_start_time(pid):
+    """Start time of process `pid` in clock ticks since boot (from /proc), or None where that isn't available."""
+    try:
+        with open(f'/proc/{pid}/stat', 'rb') as f:
+            stat = f.read()
+        return int(stat[stat.rindex(b')') + 2:].split()[19]) # Field 22; the command name before ')' may contain spaces
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _process_alive(pid, start_time):
+    """Whether the process that wrote a file is still running (and not just its pid reused by another one)."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return start_time is None or _process_start_time(pid) in (None, start_time)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None # File vanished or is being replaced; the next scrape will see it
+
+
+def _write_json(path, payload):
+    """Writes `payload` to `path` atomically (readers see the old or the new file, never half of one)."""
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+
+def _sample_sort_key(item):
+    (name, labels), _ = item
+    # Keep histogram buckets in numeric order rather than string order
+    return name, tuple((k, float('inf') if v == '+Inf' else float(v)) if k == 'le' else (k, v) for k, v in labels)
+
+
+# --- Application Metrics ---
+registry = MetricsRegistry()
+
+RENDER_SECONDS = registry.histogram(
+    'resume_render_seconds', 'Time spent generating one PDF (story building and layout).',
+    ['template'], buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+RENDER_OUTPUT_BYTES = registry.histogram(
+    'resume_render_output_bytes', 'Size of generated PDFs.',
+    ['template'], buckets=(5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000, 10_000_000))
+RENDER_ERRORS = registry.counter(
+    'resume_render_errors', 'Renders that raised an error.', ['template'])
+RENDER_LIMIT_EXCEEDED = registry.counter(
+    'resume_render_limit_exceeded', 'Renders stopped for exceeding their CPU, time or memory limit.', ['template', 'limit'])
+RENDER_QUEUE_DEPTH = registry.gauge(
+    'resume_render_queue_depth', 'Renders submitted to the render pool and not yet finished.')
+RENDER_REJECTED = registry.counter(
+    'resume_render_rejected', 'Render requests turned away by admission control.', ['reason'])
+RENDER_QUEUE_WAIT_SECONDS = registry.histogram(
+    'resume_render_queue_wait_seconds', 'Time a render waited for a free render process.',
+    ['lane'], buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+RENDER_PEAK_ALLOC_BYTES = registry.histogram(
+    'resume_render_peak_alloc_bytes', 'Peak Python allocation during a render (sampled renders only).',
+    ['template'], buckets=(1_000_000, 2_500_000, 5_000_000, 10_000_000, 25_000_000, 50_000_000, 100_000_000, 250_000_000))
+RENDER_WORKER_RSS_BYTES = registry.gauge(
+    'resume_render_worker_rss_bytes', 'Resident size of the render process that finished the latest render.')
+RENDER_WORKER_RECYCLES = registry.counter(
+    'resume_render_worker_recycles', 'Render pools replaced because a process hit its render count or RSS limit, ran out of memory or crashed.', ['reason'])
+PROCESS_PRIVATE_BYTES = registry.gauge(
+    'resume_process_private_bytes', 'Memory private to each web worker (not shared copy-on-write); summed over live workers.')
+
+CACHE_HITS = registry.counter('resume_cache_hits', 'Cache lookups that found an entry.', ['cache'])
+CACHE_MISSES = registry.counter('resume_cache_misses', 'Cache lookups that found nothing.', ['cache'])
+CACHE_EVICTIONS = registry.counter('resume_cache_evictions', 'Entries removed to stay within the size limit.', ['cache'])
+CACHE_BYTES_SERVED = registry.counter('resume_cache_served_bytes', 'Bytes returned from cache hits.', ['cache'])
+CACHE_BYTES_STORED = registry.counter('resume_cache_stored_bytes', 'Bytes written into the cache.', ['cache'])
@@ -0,0 +1,305 @@
+# pdf_templates/base.py
+# Shared helpers used by the template generators and by the app's render path.
+import ast
+import contextvars
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+import reportlab
+from reportlab.pdfbase.pdfdoc import TimeStamp
+from reportlab.pdfgen import canvas
+
+from pdf_templates import textmetrics
+
+# --- Template Fingerprints ---
+# Several template modules are copies of each other (template_4/6/7/8/14/16/17/18,
+# template_5/15, template_9/19, template_10/20). A fingerprint is a hash of the
+# module's AST, so comments and whitespace don't matter and copies share one value.
+_fingerprint_cache = {}
+
+
+def template_fingerprint(generator):
+    """Returns a stable hash identifying the implementation behind a generator function."""
+    return module_fingerprint(generator.__module__)
+
+
+def module_fingerprint(module_name):
+    """Fingerprint of a template module by name (see template_fingerprint)."""
+    if module_name not in _fingerprint_cache:
+        module = sys.modules[module_name]
+        source = inspect.getsource(module)
+        tree_dump = ast.dump(ast.parse(source))
+        _fingerprint_cache[module_name] = hashlib.sha256(tree_dump.encode('utf-8')).hexdigest()[:16]
+    return _fingerprint_cache[module_name]
+
+
+# --- Renderer Fingerprint ---
+# A template fingerprint covers the template's own module only. Everything else a
+# render goes through (the shared pdf_templates modules and the files next to
+# them, ReportLab, invariant_output) goes into one renderer fingerprint, so that
+# caches outliving a deploy (the disk render cache) don't serve PDFs made by other
+# rendering code.
+_shared_files_digest = None
+
+
+def renderer_fingerprint():
+    """Hash of the rendering code shared by every template (see above)."""
+    global _shared_files_digest
+    if _shared_files_digest is None:
+        digest = hashlib.sha256()
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        for root, dirs, files in os.walk(package_dir):
+            dirs[:] = sorted(name for name in dirs if name != '__pycache__')
+            for name in sorted(files):
+                if root == package_dir and name.startswith('template_'): # Covered by template_fingerprint
+                    continue
+                path = os.path.join(root, name)
+                digest.update(os.path.relpath(path, package_dir).encode('utf-8') + b'\0')
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+        _shared_files_digest = digest.hexdigest()
+    key = f"{_shared_files_digest}:{reportlab.Version}:{invariant_output}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+
+_source_lines_cache = {}
+
+
+def template_source_lines(generator):
+    """Line count of the module behind a generator, a rough measure of how much work a template does."""
+    module_name = generator.__module__
+    if module_name not in _source_lines_cache:
+        _source_lines_cache[module_name] = len(inspect.getsource(sys.modules[module_name]).splitlines())
+    return _source_lines_cache[module_name]
+
+
+# --- Render Timing ---
+# Timings are collected per render through a context variable, so generators don't
+# need to pass anything around: build_document() and the canvas below record into
+# whatever RenderTimings is active (if any).
+_active_timings = contextvars.ContextVar('render_timings', default=None)
+
+
+class RenderTimings:
+    """Accumulated seconds per render stage plus the page count of the finished PDF."""
+    def __init__(self):
+        self.stages = {}
+        self.page_count = None
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+
+@contextmanager
+def collect_timings():
+    """Activates a fresh RenderTimings for the duration of the block."""
+    timings = RenderTimings()
+    token = _active_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _active_timings.reset(token)
+
+
+@contextmanager
+def stage(name):
+    """Times the enclosed block under `name` when timings are being collected."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = _active_timings.get()
+        if timings is not None:
+            timings.add(name, time.perf_counter() - start)
+
+
+class TimedCanvas(canvas.Canvas):
+    """Canvas that reports image drawing time and the number of pages written, and measures text through the width cache."""
+    def __init__(self, *args, **kwargs):
+        canvas.Canvas.__init__(self, *args, **kwargs)
+        self._pages_written = 0
+
+    def drawImage(self, *args, **kwargs):
+        with stage('image'):
+            return canvas.Canvas.drawImage(self, *args, **kwargs)
+
+    def drawInlineImage(self, *args, **kwargs):
+        with stage('image'):
+            return canvas.Canvas.drawInlineImage(self, *args, **kwargs)
+
+    def stringWidth(self, text, fontName=None, fontSize=None):
+        return textmetrics.string_width(text, fontName or self._fontname, self._fontsize if fontSize is None else fontSize)
+
+    def showPage(self):
+        self._pages_written += 1
+        canvas.Canvas.showPage(self)
+
+    def save(self):
+        resume_data = _active_data.get()
+        if resume_data is not None and self._doc.invariant:
+            self._doc._timeStamp = _data_timestamp(resume_data) # Read when the document info is written out
+        canvas.Canvas.save(self)
+        timings = _active_timings.get()
+        if timings is not None:
+            timings.page_count = self._pages_written
+
+
+# --- Render Profiles ---
+# A profile trades output size against render time and fidelity. Like timings, the
+# active one is a context variable: the render path selects it, build_document() and
+# pdf_templates.images apply it, and generators need no extra arguments.
+# page_compression: Flate-compress page content streams
+# image_dpi: resolution photos are downsampled to at their drawn size (None: keep the original)
+# image_quality: JPEG quality of downsampled photos
+# include_photos: whether the profile photo is drawn at all
+RenderProfile = namedtuple('RenderProfile', ['page_compression', 'image_dpi', 'image_quality', 'include_photos'])
+
+RENDER_PROFILES = {
+    'draft': RenderProfile(page_compression=0, image_dpi=72, image_quality=60, include_photos=False), # Fast previews
+    'final': RenderProfile(page_compression=1, image_dpi=150, image_quality=85, include_photos=True),  # Downloads
+    'archival': RenderProfile(page_compression=1, image_dpi=None, image_quality=None, include_photos=True), # Original images
+}
+DEFAULT_PROFILE = 'final'
+_active_profile = contextvars.ContextVar('render_profile', default=DEFAULT_PROFILE)
+
+
+@contextmanager
+def render_profile(name):
+    """Renders inside the block use the named profile (None keeps the current one)."""
+    if name is None:
+        yield
+        return
+    if name not in RENDER_PROFILES:
+        raise ValueError(f"Unknown render profile {name!r}, expected one of {', '.join(RENDER_PROFILES)}")
+    token = _active_profile.set(name)
+    try:
+        yield
+    finally:
+        _active_profile.reset(token)
+
+
+def current_profile():
+    return RENDER_PROFILES[_active_profile.get()]
+
+
+# --- Deterministic Output ---
+# ReportLab normally stamps each PDF with the current time and a random document ID,
+# so the same resume never renders to the same bytes twice. In invariant mode both
+# are fixed and the output depends only on the input: identical renders dedupe in
+# the disk cache and compare equal across nodes. Set from RENDER_INVARIANT by
+# create_app (render processes inherit it).
+#
+# The creation date is derived from a hash of the resume being rendered (see
+# render_data()). Only the fields the render read go into it, as far as it tracks
+# them (render_cache.FieldTrackingDict), so resumes the render cache treats as the
+# same get the same date. Outside render_data() it is ReportLab's fixed date.
+invariant_output = True
+DATE_RANGE_SECONDS = 25 * 365 * 86400 # Derived dates fall within this long after ReportLab's (2000-01-01)
+_active_data = contextvars.ContextVar('render_data', default=None)
+
+
+@contextmanager
+def render_data(resume_data):
+    """Invariant renders inside the block take their creation date from `resume_data`."""
+    token = _active_data.set(resume_data)
+    try:
+        yield
+    finally:
+        _active_data.reset(token)
+
+
+def _data_timestamp(resume_data):
+    """A ReportLab TimeStamp at a point in time derived from a hash of the fields of `resume_data` read so far."""
+    from render_cache import ALL_FIELDS # render_cache imports this module
+    fields = getattr(resume_data, 'fields_read', None)
+    values = dict(dict.items(resume_data)) # dict.items: hashing isn't a read of every field
+    if fields is not None and ALL_FIELDS not in fields:
+        values = {field: value for field, value in values.items() if field in fields}
+    digest = hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    timestamp = TimeStamp(invariant=1)
+    timestamp.t += int(digest[:12], 16) % DATE_RANGE_SECONDS
+    timestamp.lt = time.gmtime(timestamp.t)
+    timestamp.YMDhms = tuple(timestamp.lt)[:6]
+    return timestamp
+
+
+# --- Lazy Stories ---
+# doc.build() only ever works at the front of its story list: it takes the first
+# flowable, puts split-off remainders back in front, and looks ahead as far as a
+# run of keepWithNext flowables goes. A generator can therefore stand in for the
+# list, and a story built section by section as the layout reaches it never holds
+# more than the flowables of the current page at once.
+class LazyStory:
+    """List-like view of an iterable of flowables that doc.build() fills on demand."""
+    def __init__(self, flowables):
+        self._iterator = iter(flowables)
+        self._buffer = []
+        self.build_seconds = 0.0 # Time spent producing flowables, which build_document counts as story time
+
+    def _fill(self, count=None):
+        """Pulls flowables until `count` are buffered (None: all of them) or the iterator is exhausted."""
+        while self._iterator is not None and (count is None or len(self._buffer) < count):
+            start = time.perf_counter()
+            try:
+                self._buffer.append(next(self._iterator))
+            except StopIteration:
+                self._iterator = None
+            finally:
+                self.build_seconds += time.perf_counter() - start
+
+    def _fill_for(self, index):
+        if isinstance(index, slice):
+            if index.stop is None or index.stop < 0 or (index.start or 0) < 0:
+                self._fill()
+            else:
+                self._fill(index.stop)
+        elif index < 0:
+            self._fill()
+        else:
+            self._fill(index + 1)
+
+    def __len__(self):
+        # At least one flowable while any are left, and past the end of a keepWithNext run (handle_keepWithNext looks that far)
+        self._fill(1)
+        while self._iterator is not None and getattr(self._buffer[-1], 'getKeepWithNext', lambda: False)():
+            self._fill(len(self._buffer) + 1)
+        return len(self._buffer)
+
+    def __getitem__(self, index):
+        self._fill_for(index)
+        return self._buffer[index]
+
+    def __setitem__(self, index, value):
+        self._fill_for(index)
+        self._buffer[index] = value
+
+    def __delitem__(self, index):
+        self._fill_for(index)
+        del self._buffer[index]
+
+    def insert(self, index, flowable):
+        self._fill(index)
+        self._buffer.insert(index, flowable)
+
+
+def build_document(doc, story, **build_kwargs):
+    """
+    Lays out `story` into `doc`. Every generator builds through here instead of calling doc.build
+    directly. `story` is a list of flowables or any iterable producing them (see LazyStory).
+    """
+    if invariant_output:
+        doc.invariant = 1
+    doc.pageCompression = current_profile().page_compression
+    if not isinstance(story, list):
+        story = LazyStory(story)
+    with stage('layout'):
+        doc.build(story, canvasmaker=TimedCanvas, **build_kwargs)
+    timings = _active_timings.get()
+    if timings is not None and isinstance(story, LazyStory):
+        timings.add('layout', -story.build_seconds)
@@ -0,0 +1,231 @@
+# pdf_templates/flowables.py
+# Flowables shared by the template generators.
+#
+# Most resume text (names, dates, bullet lines, descriptions) has no markup, yet
+# every Paragraph runs it through ReportLab's XML parser, which is the larger part
+# of building a story. PlainParagraph starts from the single text fragment that
+# parser would produce for unmarked text, so it skips the parse; line breaking,
+# splitting across frames and drawing are Paragraph's own single-fragment paths,
+# and the output is identical. Generators call para() and get a PlainParagraph
+# whenever the text can't contain markup (no '<' and no '&' entity).
+#
+# plain_text_fast_path = False makes para() always build Paragraphs, and
+# bullet_list_flowable = False makes bullet_list() build one para() per line;
+# `flask bench-paragraphs` compares the three.
+#
+# A job description used to become one Paragraph per line plus spacers, each laid
+# out, split and drawn by the frame as a flowable of its own. BulletList holds a
+# whole block of lines as one flowable: per line just its text fragment and style,
+# and once wrapped, the broken lines as (extra space, words) pairs. It spaces,
+# splits across frames and draws the lines exactly as the separate Paragraphs
+# were, so the page looks the same. bullet_list() builds one for plain text and
+# falls back to separate Paragraphs when a line has markup.
+import copy
+
+from reportlab import rl_config
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT, TA_RIGHT
+from reportlab.lib.fonts import ps2tt
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import Paragraph
+from reportlab.platypus.flowables import Flowable
+from reportlab.platypus.frames import _FUZZ
+from reportlab.platypus.paragraph import (_centerDrawParaLine, _drawBullet, _justifyDrawParaLine, _leftDrawParaLine,
+                                          _rightDrawParaLine, cleanBlockQuotedText, textTransformFrags)
+from reportlab.platypus.paraparser import ParaFrag
+
+plain_text_fast_path = True
+bullet_list_flowable = True
+
+
+def _plain_frag(text, style):
+    """The fragment ParaParser builds for text without tags, in the style's font and colour."""
+    frag = ParaFrag()
+    frag.rise = 0
+    frag.greek = 0
+    frag.link = []
+    frag.us_lines = []
+    _, frag.bold, frag.italic = ps2tt(style.fontName)
+    frag.fontName = style.fontName
+    frag.fontSize = style.fontSize
+    frag.textColor = style.textColor
+    frag.text = text
+    return frag
+
+
+class PlainParagraph(Paragraph):
+    """Paragraph of plain text (markup characters are drawn literally), built without the markup parser."""
+    def __init__(self, text, style=None, bulletText=None, frags=None, caseSensitive=1, encoding='utf8'):
+        if style is None:
+            style = ParagraphStyle(name='paragraphImplicitDefaultStyle')
+        if frags is None: # split() passes the already broken-up frags of each part
+            frags = [_plain_frag(cleanBlockQuotedText(text), style)]
+            textTransformFrags(frags, style)
+        Paragraph.__init__(self, text, style, bulletText, frags, caseSensitive, encoding)
+
+
+def para(text, style=None, bulletText=None):
+    """A PlainParagraph for `text` if it contains no markup, otherwise a regular Paragraph."""
+    if not plain_text_fast_path or '<' in text or '&' in text:
+        return Paragraph(text, style, bulletText)
+    return PlainParagraph(text, style, bulletText)
+
+
+_DRAW_LINE = {TA_LEFT: _leftDrawParaLine, TA_CENTER: _centerDrawParaLine, TA_RIGHT: _rightDrawParaLine,
+              TA_JUSTIFY: _justifyDrawParaLine}
+
+
+def _listable(style):
+    """Whether Paragraphs in `style` take the single-fragment path BulletList reproduces."""
+    return (style.alignment in _DRAW_LINE and not style.wordWrap and not style.endDots and not style.shaping
+            and getattr(style, 'autoLeading', '') in ('', 'off', None) and not style.backColor
+            and not (style.borderWidth and style.borderColor))
+
+
+def _words_frag(frag, words):
+    """`frag` holding already split words instead of text, as Paragraph.split() passes them on."""
+    frag = frag.clone()
+    if hasattr(frag, 'text'):
+        del frag.text
+    frag.words = list(words)
+    return frag
+
+
+class BulletList(Flowable):
+    """
+    A block of lines, each drawn like a Paragraph in its own style and with its own bullet, as
+    one flowable. Build it with bullet_list().
+    """
+    def __init__(self, items):
+        # (fragment, style, bullet text, justify the last line) per line
+        self._items = items
+        self._wrap_memo = {} # Shared by copies, like PrewrappedParagraph's
+        self._laid_out = []
+
+    def getSpaceBefore(self):
+        return self._items[0][1].spaceBefore
+
+    def getSpaceAfter(self):
+        return self._items[-1][1].spaceAfter
+
+    def _layout(self, width):
+        """[(space above, lines)] per item at `width`, and the total height (spacing as a Frame does it)."""
+        if width in self._wrap_memo:
+            return self._wrap_memo[width]
+        laid_out = []
+        height = 0
+        previous_after = None
+        for frag, style, bullet, _ in self._items:
+            scratch = PlainParagraph(None, style, bullet, frags=[frag])
+            scratch.wrap(width, 0x7fffffff)
+            gap = 0 if previous_after is None else max(previous_after, style.spaceBefore)
+            lines = tuple((extra, tuple(words)) for extra, words in scratch.blPara.lines)
+            laid_out.append((gap, lines))
+            height += gap + len(lines) * style.leading
+            previous_after = style.spaceAfter
+        self._wrap_memo[width] = laid_out, height
+        return laid_out, height
+
+    def wrap(self, availWidth, availHeight):
+        if availWidth < _FUZZ:
+            return 0, 0x7fffffff
+        self._laid_out, self.height = self._layout(availWidth)
+        self.width = availWidth
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        """Splits where the frame would have split the separate Paragraphs (orphan and widow rules included)."""
+        if availWidth < _FUZZ or availHeight < _FUZZ:
+            return []
+        laid_out, _ = self._layout(availWidth)
+        used = 0
+        for index, (gap, lines) in enumerate(laid_out):
+            frag, style, bullet, justify_last = self._items[index]
+            top = used + gap
+            if top + len(lines) * style.leading <= availHeight + _FUZZ:
+                used = top + len(lines) * style.leading
+                continue
+            # Like Paragraph.split: how many lines of this item fit
+            count, fit = len(lines), int((availHeight - top) / style.leading) if availHeight > top else 0
+            if (not style.allowOrphans and fit <= 1) or fit <= 0:
+                fit = 0
+            elif not style.allowWidows and count == fit + 1:
+                fit = fit - 1 if (style.allowOrphans and count == 3) or count > 3 else 0
+            if not fit:
+                head, tail = self._items[:index], self._items[index:]
+            else:
+                words = [word for _, line_words in lines for word in line_words]
+                head_words = sum(len(line_words) for _, line_words in lines[:fit])
+                rest_style = style
+                if style.firstLineIndent != 0:
+                    rest_style = copy.deepcopy(style)
+                    rest_style.firstLineIndent = 0
+                head = self._items[:index] + [(_words_frag(frag, words[:head_words]), style, bullet, True)]
+                tail = ([(_words_frag(frag, words[head_words:]), rest_style, getattr(rest_style, 'bulletText', None), False)]
+                        + self._items[index + 1:])
+            if not head:
+                return []
+            first, rest = BulletList(head), BulletList(tail)
+            # The head keeps the lines already broken at this width (a partial item's lines are a prefix of its own)
+            head_laid_out = laid_out[:index] + ([(gap, lines[:fit])] if fit else [])
+            first._wrap_memo[availWidth] = head_laid_out, used + (gap + fit * style.leading if fit else 0)
+            if not fit:
+                tail_laid_out = [(0, lines)] + laid_out[index + 1:]
+                rest._wrap_memo[availWidth] = tail_laid_out, self._height_of(tail_laid_out, tail)
+            return [first, rest]
+        return [self]
+
+    @staticmethod
+    def _height_of(laid_out, items):
+        return sum(gap + len(lines) * item[1].leading for (gap, lines), item in zip(laid_out, items))
+
+    def draw(self):
+        canvas = self.canv
+        y = self.height
+        for (gap, lines), (frag, style, bullet, justify_last) in zip(self._laid_out, self._items):
+            y -= gap
+            if lines:
+                self._draw_lines(canvas, y, lines, frag, style, bullet, justify_last)
+            y -= len(lines) * style.leading
+
+    @staticmethod
+    def _draw_lines(canvas, top, lines, frag, style, bullet, justify_last):
+        """Draws one item's lines below `top`, as Paragraph.drawPara does for a single fragment."""
+        if rl_config.paraFontSizeHeightOffset:
+            cur_y = top - frag.fontSize
+        else:
+            cur_y = top - getattr(frag, 'ascent', frag.fontSize)
+        canvas.saveState()
+        offset = style.firstLineIndent
+        if bullet:
+            offset = _drawBullet(canvas, offset, cur_y, bullet, style, rtl=False)
+        canvas.setFillColor(frag.textColor)
+        text = canvas.beginText(style.leftIndent, cur_y)
+        text.preformatted = False
+        text.direction = style.wordWrap
+        text.setFont(frag.fontName, frag.fontSize, style.leading)
+        draw_line = _DRAW_LINE[style.alignment]
+        last = len(lines) - 1
+        for i, (extra, words) in enumerate(lines):
+            last_line = not justify_last and i == last
+            if last_line and style.justifyLastLine and len(words) > style.justifyLastLine:
+                last_line = False
+            draw_line(text, offset if i == 0 else 0, extra, words, last_line)
+        canvas.drawText(text)
+        canvas.restoreState()
+
+
+def bullet_list(items):
+    """
+    Flowables for a block of (text, style, bullet text or None) lines: a single BulletList when
+    every line is plain text, otherwise one para() per line.
+    """
+    if not items:
+        return []
+    if not bullet_list_flowable or not plain_text_fast_path or any('<' in text or '&' in text or not _listable(style) for text, style, _ in items):
+        return [para(text, style, bullet) for text, style, bullet in items]
+    built = []
+    for text, style, bullet in items:
+        frags = [_plain_frag(cleanBlockQuotedText(text), style)]
+        textTransformFrags(frags, style)
+        built.append((frags[0], style, bullet or getattr(style, 'bulletText', None), False))
+    return [BulletList(built)]
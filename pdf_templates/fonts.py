@@ -0,0 +1,121 @@
+# pdf_templates/fonts.py
+# Unicode TrueType family for templates whose text goes beyond what the base-14
+# fonts can encode (WinAnsi): symbols, emoji icons, non-Latin names.
+#
+# The family is parsed and registered once, when this module is first imported.
+# The app imports it before the web workers and render processes fork, so every
+# process shares the parsed TTFont objects and a render pays nothing for loading
+# fonts. ReportLab embeds only the glyphs a document uses (subsetting), but copies
+# the font's 'name' table into every subset, and for DejaVu that is ~15 KB
+# of mostly license text per face. Subsets here carry a minimal 'name' table
+# instead, so a PDF grows by a few KB per face used.
+#
+# The family is DejaVu Sans 2.35 (it includes symbols such as ✉ ☎ ★), bundled in
+# pdf_templates/fonts with its license. Only those files are loaded, never fonts
+# installed on the host, so every node lays out and embeds the same glyphs and
+# renders the same resume to the same bytes.
+import os
+import struct
+from fnmatch import fnmatch
+from weakref import WeakKeyDictionary
+
+from reportlab import rl_config
+from reportlab.lib.fonts import addMapping
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTEncoding, TTFont, TTFontFace, unShapedFontGlob
+
+FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fonts')
+
+# (regular, bold, italic, bold italic) file names in FONT_DIR
+FAMILY_FILES = ('DejaVuSans.ttf', 'DejaVuSans-Bold.ttf', 'DejaVuSans-Oblique.ttf', 'DejaVuSans-BoldOblique.ttf')
+
+FAMILY = 'ResumeSans'
+REGULAR = 'ResumeSans'
+BOLD = 'ResumeSans-Bold'
+ITALIC = 'ResumeSans-Italic'
+BOLD_ITALIC = 'ResumeSans-BoldItalic'
+
+# Emoji templates use as icons, with a symbol to draw instead when the font has no glyph for them (see icon())
+SYMBOL_FALLBACKS = {
+    '\U0001F4E7': '✉', # 📧 -> ✉
+    '\U0001F517': '↗', # 🔗 -> ↗
+    '\U0001F4CD': '⚑', # 📍 -> ⚑
+    '\U0001F4DE': '✆', # 📞 -> ✆
+    '\U0001F310': '⊕', # 🌐 -> ⊕
+    '\U0001F393': '✦', # 🎓 -> ✦
+    '\U0001F464': '◉', # 👤 -> ◉
+    '\U0001F4BC': '▣', # 💼 -> ▣
+    '\U0001F4C4': '☰', # 📄 -> ☰
+    '\U0001F5D3': '☷', # 🗓 -> ☷
+}
+_VARIATION_SELECTOR = '\uFE0F' # Emoji presentation selector, meaningless without an emoji font
+
+
+def _name_table(family, style, postscript_name):
+    """A 'name' table with just the family, style, full and PostScript names (Windows Unicode records)."""
+    strings = {1: family, 2: style, 3: postscript_name, 4: f"{family} {style}", 6: postscript_name}
+    records = b''
+    storage = b''
+    for name_id, value in strings.items():
+        encoded = value.encode('utf-16-be')
+        records += struct.pack('>6H', 3, 1, 0x409, name_id, len(encoded), len(storage))
+        storage += encoded
+    return struct.pack('>3H', 0, len(strings), 6 + len(records)) + records + storage
+
+
+class _CompactFace(TTFontFace):
+    """Font face whose subsets get a minimal 'name' table (the rest of the subset is ReportLab's)."""
+    def __init__(self, filename, validate=0, subfontIndex=0):
+        TTFontFace.__init__(self, filename, validate=validate, subfontIndex=subfontIndex) # Reads the original name table
+        postscript_name = self.name.decode('latin-1')
+        style = postscript_name.partition('-')[2] or 'Book'
+        self.compact_name_table = _name_table(self.familyName.decode('latin-1'), style, postscript_name)
+
+    def get_table(self, tag):
+        if tag == 'name':
+            return self.compact_name_table
+        return TTFontFace.get_table(self, tag)
+
+
+class _CompactFont(TTFont):
+    """
+    TTFont built around a _CompactFace. TTFont.__init__ hard-codes a plain TTFontFace, so this
+    sets up the same attributes itself (as of ReportLab 5.0) and each file is parsed only once.
+    """
+    def __init__(self, name, filename):
+        self.fontName = name
+        self.face = _CompactFace(filename)
+        self.encoding = TTEncoding()
+        self.state = WeakKeyDictionary()
+        self._asciiReadable = rl_config.ttfAsciiReadable
+        self.shapable = not any(fnmatch(name, pattern) for pattern in unShapedFontGlob)
+
+
+def _register_family():
+    paths = [os.path.join(FONT_DIR, filename) for filename in FAMILY_FILES]
+    missing = [path for path in paths if not os.path.exists(path)]
+    if missing:
+        raise RuntimeError(f"Bundled fonts missing: {', '.join(missing)}")
+    for name, path in zip((REGULAR, BOLD, ITALIC, BOLD_ITALIC), paths):
+        pdfmetrics.registerFont(_CompactFont(name, path))
+    # Lets <b> and <i> in Paragraph markup pick the right face
+    for bold_flag, italic_flag, name in ((0, 0, REGULAR), (1, 0, BOLD), (0, 1, ITALIC), (1, 1, BOLD_ITALIC)):
+        addMapping(FAMILY, bold_flag, italic_flag, name)
+    return pdfmetrics.getFont(REGULAR)
+
+
+_regular_font = _register_family()
+_covered = set(_regular_font.face.charToGlyph)
+
+
+def icon(symbol):
+    """
+    Returns an icon a template draws (an emoji such as '📧') as something the family has a
+    glyph for: the emoji itself if covered, else its SYMBOL_FALLBACKS symbol, else unchanged.
+    Only for the template's own icon literals; resume text is never rewritten.
+    """
+    symbol = symbol.replace(_VARIATION_SELECTOR, '')
+    if all(ord(char) in _covered for char in symbol):
+        return symbol
+    fallback = SYMBOL_FALLBACKS.get(symbol)
+    return fallback if fallback is not None and ord(fallback) in _covered else symbol
@@ -0,0 +1,112 @@
+# pdf_templates/fragments.py
+# Per-process cache of built section flowables. Most edits touch one section, so a
+# generator that builds its story section by section can reuse every other
+# section's flowables from the previous render instead of parsing the text into
+# Paragraphs again.
+#
+# Entries are keyed by (template fingerprint, section key, hash of the resume
+# fields the section's builder reads). Nobody lists those fields: the builder runs
+# on a FieldTrackingDict (see render_cache), and the cache keeps the union of the
+# fields read by every build of that section so far, just as the render cache
+# learns a template's fields. A builder that starts reading another field only
+# adds it to the key.
+#
+# Flowables are mutable (wrap() stores line breaks on the object, doc.build sets
+# attributes), so callers get shallow copies of the cached ones. Cached Paragraphs
+# also remember their line breaking per available width, and the copies share
+# that memo: re-laying out an unchanged section in the same column skips the
+# line breaking as well as the parsing.
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from reportlab.platypus import Paragraph
+
+import metrics
+from pdf_templates.base import module_fingerprint
+from render_cache import FieldTrackingDict, select_fields
+from pdf_templates.flowables import PlainParagraph
+
+DEFAULT_MAX_ENTRIES = 512
+
+
+class PrewrappedParagraph(Paragraph):
+    """Paragraph that reuses its line breaking when wrapped again at the same width."""
+    def wrap(self, availWidth, availHeight):
+        memo = self.__dict__.setdefault('_wrap_memo', {}) # copy.copy() shares this dict with the cached original
+        if availWidth in memo:
+            self.width, self._wrapWidths, self.blPara, self.height = memo[availWidth]
+            return self.width, self.height
+        width, height = Paragraph.wrap(self, availWidth, availHeight)
+        if hasattr(self, 'blPara'): # Not set when the width was too small to wrap at all
+            memo[availWidth] = (self.width, self._wrapWidths, self.blPara, self.height)
+        return width, height
+
+
+class FragmentCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._fields = {} # section -> fields read by any build of it so far
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def data_key(section_data):
+        encoded = json.dumps(section_data, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _key(self, section, data, fields):
+        return section, self.data_key([sorted(fields), select_fields(data, fields)])
+
+    def get_or_build(self, section, data, build):
+        """
+        Shallow copies of the flowables build(data) returns for `section` (a hashable name), from the
+        cache if none of the fields earlier builds of the section read has changed.
+        """
+        with self._lock:
+            fields = self._fields.get(section)
+        flowables = None
+        if fields is not None:
+            key = self._key(section, data, fields)
+            with self._lock:
+                flowables = self._entries.get(key)
+                if flowables is not None:
+                    self._entries.move_to_end(key)
+        if flowables is not None:
+            metrics.CACHE_HITS.inc(cache='fragments')
+        else:
+            metrics.CACHE_MISSES.inc(cache='fragments')
+            tracked = FieldTrackingDict(dict.items(data)) # dict.items: copying a FieldTrackingDict isn't a read of every field
+            flowables = build(tracked)
+            for flowable in flowables:
+                if type(flowable) in (Paragraph, PlainParagraph): # Both are plain Paragraphs once built
+                    flowable.__class__ = PrewrappedParagraph
+            with self._lock:
+                fields = self._fields[section] = frozenset(self._fields.get(section, ())) | tracked.fields_read
+            key = self._key(section, data, fields) # Reads the fields from `data` itself, for the render cache's tracking
+            with self._lock:
+                self._entries[key] = flowables
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    metrics.CACHE_EVICTIONS.inc(cache='fragments')
+        return [copy.copy(flowable) for flowable in flowables]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._fields.clear()
+
+
+fragment_cache = FragmentCache()
+
+
+def cached_section(module_name, section_key, data, build):
+    """
+    Returns the flowables build(data) produces for one section of a template, from the cache when
+    the resume fields the section reads are unchanged.
+    """
+    if fragment_cache.max_entries <= 0:
+        return build(data)
+    return fragment_cache.get_or_build((module_fingerprint(module_name), section_key), data, build)
@@ -0,0 +1,235 @@
+# pdf_templates/images.py
+# Profile photos and template icons prepared for the active render profile (see
+# base.RENDER_PROFILES).
+# Resume photos are usually camera-sized, far more pixels than a 1-2 inch circle
+# needs, and embedding them unchanged makes up most of a PDF's size. Photos are
+# downsampled to the profile's resolution at the size they are drawn, left out
+# entirely by profiles without photos, and passed through untouched by profiles
+# without an image_dpi.
+#
+# A photo (or logo) is measured and drawn through one PhotoHandle (photo_handle()): its
+# pixel size comes from the file header, and it is decoded and downsampled once
+# per draw size and profile into an ImageReader that every later draw reuses,
+# whether as a flowable or with canvas.drawImage on every page. Handles are kept
+# per process in a small LRU keyed on the file's path, modification time and
+# size, so a photo drawn on each page, or again in the next render, is neither
+# decoded nor downsampled again. Readers of originals larger than
+# MAX_CACHED_PIXELS (profiles without an image_dpi) are not kept.
+#
+# Icons are drawn the same way in every resume, so an IconAtlas resolves their
+# files once when the template is imported, and decodes each icon the first time
+# it is drawn, into one shared ImageReader per profile resolution. Renders reuse
+# those readers. Icons are downsampled like photos, but kept for profiles without
+# photos.
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image as PILImage
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Image
+
+import metrics
+from pdf_templates.base import RENDER_PROFILES, current_profile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_HANDLES = 16
+MAX_CACHED_PIXELS = 1000000
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def _downsampled_size(image, width, height, dpi):
+    """The size of `image` at `dpi` pixels per inch when drawn at `width` x `height` points, or None if it is no larger."""
+    target = (max(1, round(width / 72 * dpi)), max(1, round(height / 72 * dpi)))
+    if image.width <= target[0] and image.height <= target[1]:
+        return None
+    return min(image.width, target[0]), min(image.height, target[1])
+
+
+def prepare_photo(path, width, height):
+    """
+    Returns the photo at `path` ready to draw at `width` x `height` points: the path itself, a
+    BytesIO holding a downsampled copy, or None if there is no photo or the profile omits it.
+    The result can be given to a platypus Image.
+    """
+    profile = current_profile()
+    if not path or not profile.include_photos or not os.path.exists(path):
+        return None
+    return _prepared(path, width, height, profile)
+
+
+def _prepared(path, width, height, profile):
+    """The image at `path` downsampled for `profile` (a BytesIO), or `path` itself if that isn't needed."""
+    if profile.image_dpi is None:
+        return path
+    with PILImage.open(path) as image:
+        size = _downsampled_size(image, width, height, profile.image_dpi)
+        if size is None:
+            return path # Already small enough
+        has_alpha = _has_alpha(image)
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        image = image.resize(size, PILImage.LANCZOS)
+        buffer = io.BytesIO()
+        if has_alpha:
+            image.save(buffer, 'PNG', optimize=True)
+        else:
+            image.save(buffer, 'JPEG', quality=profile.image_quality, optimize=True)
+    buffer.seek(0)
+    return buffer
+
+
+def photo_reader(path, width, height):
+    """Like prepare_photo, but as an ImageReader for canvas.drawImage (or None), shared through the photo's handle."""
+    handle = photo_handle(path)
+    return handle.reader(width, height) if handle is not None else None
+
+
+class _ReaderImage(Image):
+    """A platypus Image of an already decoded ImageReader (Image itself only takes files)."""
+    def __init__(self, reader, width, height, mask='auto', hAlign='CENTER'):
+        self.hAlign = hAlign
+        self._mask = mask
+        self._drawing = None
+        self._file = None
+        self.filename = reader.fileName
+        self._dpi = False
+        self._img = reader
+        self._setup(width, height, 'direct', 0)
+
+
+class PhotoHandle:
+    """
+    The photo at `path`, measured from its header when the handle is created and decoded at
+    most once per draw size and render profile.
+    """
+    def __init__(self, path):
+        self.path = path
+        with PILImage.open(path) as image: # Reads the header only
+            self.size = image.size
+        self._readers = {} # (width, height, dpi, quality) -> ImageReader
+        self._lock = threading.Lock()
+
+    def reader(self, width, height, always=False):
+        """
+        An ImageReader of the image prepared to draw at `width` x `height` points, or None if the
+        profile omits photos. always=True prepares it for those profiles too (logos, not photos).
+        """
+        profile = current_profile()
+        if not always and not profile.include_photos:
+            return None
+        key = (width, height, profile.image_dpi, profile.image_quality)
+        with self._lock:
+            reader = self._readers.get(key)
+        if reader is None:
+            try:
+                photo = _prepared(self.path, width, height, profile)
+            except OSError: # The file has gone away since the handle was made
+                return None
+            reader = ImageReader(photo)
+            pixels = self.size[0] * self.size[1] if photo is self.path else reader.getSize()[0] * reader.getSize()[1]
+            if pixels <= MAX_CACHED_PIXELS:
+                with self._lock:
+                    reader = self._readers.setdefault(key, reader)
+        return reader
+
+    def image(self, width, height, always=False, **kwargs):
+        """A platypus Image of the image at `width` x `height` points, or None if the profile omits photos (see reader())."""
+        reader = self.reader(width, height, always)
+        return _ReaderImage(reader, width, height, **kwargs) if reader is not None else None
+
+
+class PhotoHandleCache:
+    def __init__(self, max_entries=DEFAULT_MAX_HANDLES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """The PhotoHandle of the file at `path`, or None if there is no such file or it isn't an image."""
+        if not path:
+            return None
+        try:
+            path = os.path.abspath(path)
+            stat = os.stat(path)
+        except (OSError, TypeError, ValueError):
+            return None
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            handle = self._entries.get(key)
+            if handle is not None:
+                self._entries.move_to_end(key)
+        if handle is not None:
+            metrics.CACHE_HITS.inc(cache='photos')
+            return handle
+        metrics.CACHE_MISSES.inc(cache='photos')
+        try:
+            handle = PhotoHandle(path)
+        except (OSError, ValueError) as e: # PIL raises UnidentifiedImageError (an OSError) for non-images
+            logger.warning(f"Could not open image {path}: {e}")
+            return None
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = handle
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    metrics.CACHE_EVICTIONS.inc(cache='photos')
+        return handle
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+photo_cache = PhotoHandleCache()
+photo_handle = photo_cache.get
+
+
+class IconAtlas:
+    """
+    Icon files in `directory` ({key: file name}), drawn at `width` x `height` points. Missing
+    files are reported once, when the atlas is created, and have no image.
+    """
+    def __init__(self, directory, files, width, height):
+        self.width = width
+        self.height = height
+        self.paths = {}
+        missing = []
+        for key, filename in files.items():
+            path = os.path.abspath(os.path.join(directory, filename))
+            if os.path.exists(path):
+                self.paths[key] = path
+            else:
+                missing.append(filename)
+        if missing:
+            logger.warning(f"Icons not found in {directory}: {', '.join(missing)}")
+        self._readers = {} # (key, dpi) -> ImageReader
+
+    def __contains__(self, key):
+        return key in self.paths
+
+    def _decode(self, key, dpi):
+        """Decodes icon `key` and keeps a reader for `dpi` and for every profile's resolution."""
+        resolutions = {dpi} | {profile.image_dpi for profile in RENDER_PROFILES.values() if profile.image_dpi}
+        with PILImage.open(self.paths[key]) as image:
+            image = image.convert('RGBA' if _has_alpha(image) else 'RGB')
+        for resolution in resolutions:
+            size = _downsampled_size(image, self.width, self.height, resolution)
+            self._readers[key, resolution] = ImageReader(image if size is None else image.resize(size, PILImage.LANCZOS))
+
+    def image(self, key, **kwargs):
+        """A platypus Image of icon `key` for the active render profile, or None if there is no such icon."""
+        path = self.paths.get(key)
+        if path is None:
+            return None
+        dpi = current_profile().image_dpi
+        if dpi is None:
+            return Image(path, width=self.width, height=self.height, **kwargs) # Original image
+        if (key, dpi) not in self._readers:
+            self._decode(key, dpi)
+        return _ReaderImage(self._readers[key, dpi], self.width, self.height, **kwargs)
@@ -0,0 +1,84 @@
+# pdf_templates/tables.py
+# Tables whose styles are worked out once per process instead of once per render.
+#
+# Table(data, style=TableStyle([...])) gives every cell its own CellStyle and then
+# runs each style command over every cell in its range; line, background and span
+# commands are normalised into per-table lists on the way. For the small tables the
+# templates use (section title rows, two-cell header rows, the four-column language
+# table) that is most of the cost of the table, and it is the same work every time
+# for a given style and number of rows and columns.
+#
+# A CompiledTableStyle is a TableStyle declared once at module level. The first
+# table() of a given shape applies it the usual way to a blank table and keeps the
+# result; later tables of that shape start from it: the cell styles are shared (as
+# ReportLab itself shares them between the parts of a split table) and the command
+# lists copied. Styles using split-row coordinates ('splitfirst', 'splitlast'),
+# rounded corners or TableStyle options, and tables that split inside rows, modify
+# cell styles after the fact and are always styled from scratch.
+#
+# Auto-sized columns measure each cell's text; once textmetrics.install() has run,
+# those measurements go through the text width cache.
+#
+# fast_path = False makes table() style every table from scratch.
+from reportlab.platypus import Table, TableStyle
+from reportlab.platypus.tables import _SPECIALROWS
+
+fast_path = True
+
+MAX_SHAPES = 64 # Shapes kept per style; tables of other shapes are styled from scratch
+
+_COMMAND_LISTS = ('_bkgrndcmds', '_linecmds', '_spanCmds', '_nosplitCmds', '_srflcmds', '_sircmds')
+
+
+def _compilable(command):
+    if command[0] == 'ROUNDEDCORNERS':
+        return False
+    if len(command) >= 3:
+        (_, start_row), (_, end_row) = command[1:3]
+        if start_row in _SPECIALROWS or end_row in _SPECIALROWS:
+            return False
+    return True
+
+
+class CompiledTableStyle(TableStyle):
+    """TableStyle that keeps the styled cells of every table shape it has been applied to through table()."""
+    def __init__(self, cmds=None, parent=None, **kw):
+        TableStyle.__init__(self, cmds, parent, **kw)
+        self._shapes = {}
+
+    @property
+    def compilable(self):
+        return not self._opts and all(_compilable(command) for command in self.getCommands())
+
+    def compiled(self, nrows, ncols):
+        """A blank nrows x ncols Table with this style applied, or None if it can't be reused."""
+        shape = nrows, ncols
+        styled = self._shapes.get(shape)
+        if styled is None:
+            if not self.compilable:
+                return None
+            styled = Table([[''] * ncols for _ in range(nrows)], style=self)
+            if len(self._shapes) < MAX_SHAPES:
+                self._shapes[shape] = styled
+        return styled
+
+
+def table(data, style, **kwargs):
+    """
+    Table(data, style=style, **kwargs), reusing the cells `style` was compiled to for a table of
+    this shape when it is a CompiledTableStyle.
+    """
+    if (not fast_path or not isinstance(style, CompiledTableStyle) or kwargs.get('splitInRow')
+            or not isinstance(data, (list, tuple)) or not data):
+        return Table(data, style=style, **kwargs)
+    ncols = max(len(row) if isinstance(row, (list, tuple)) else 1 for row in data)
+    styled = style.compiled(len(data), ncols) if ncols else None
+    if styled is None:
+        return Table(data, style=style, **kwargs)
+    built = Table(data, cellStyles=[row[:] for row in styled._cellStyles], **kwargs)
+    for name in _COMMAND_LISTS:
+        setattr(built, name, list(getattr(styled, name)))
+    for name in ('spaceBefore', 'spaceAfter'):
+        if not hasattr(built, name) and hasattr(style, name):
+            setattr(built, name, getattr(style, name))
+    return built
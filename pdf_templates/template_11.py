@@ -1,10 +1,12 @@
 # pdf_templates/classic_template.py
 import io
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, HRFlowable
+from reportlab.platypus import SimpleDocTemplate, Spacer, HRFlowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.colors import HexColor, black, gray
+from pdf_templates.base import build_document
+from pdf_templates.flowables import bullet_list, para
 
 def generate_pdf(data):
     buffer = io.BytesIO()
@@ -61,71 +63,73 @@ def generate_pdf(data):
                               leftIndent=0.25*inch))
 
 
-    story = []
-
-    # --- Personal Details ---
-    if data.get('full_name'):
-        story.append(Paragraph(data['full_name'].upper(), styles['NameHeader']))
+    # Sections are built as doc.build reaches them (see base.LazyStory)
+    def build_story():
+        # --- Personal Details ---
+        if data.get('full_name'):
+            yield para(data['full_name'].upper(), styles['NameHeader'])
     
-    contact_info = []
-    if data.get('email'): contact_info.append(data['email'])
-    if data.get('phone'): contact_info.append(data['phone'])
-    if data.get('linkedin'): contact_info.append(f"LinkedIn: {data['linkedin']}")
-    if data.get('github'): contact_info.append(f"GitHub: {data['github']}")
-    if contact_info:
-        story.append(Paragraph(" | ".join(contact_info), styles['ContactHeader']))
-
-    story.append(HRFlowable(width="100%", thickness=0.5, color=gray, spaceBefore=0.1*inch, spaceAfter=0.1*inch))
-
-    # --- Summary ---
-    if data.get('summary'):
-        story.append(Paragraph("Summary", styles['SectionTitle']))
-        story.append(Paragraph(data['summary'], styles['Normal']))
-        story.append(Spacer(1, 0.1*inch))
-
-    # --- Professional Experience ---
-    experiences = data.get('experiences', [])
-    if experiences:
-        story.append(Paragraph("Professional Experience", styles['SectionTitle']))
-        for exp in experiences:
-            if exp.get('title') and exp.get('company'):
-                story.append(Paragraph(exp['title'], styles['JobTitle']))
-                story.append(Paragraph(f"{exp['company']} | {exp.get('dates', 'N/A')}", styles['CompanyDate']))
-                if exp.get('description'):
-                    # Basic handling for bullet points (assuming user types '-' or similar)
-                    desc_lines = exp['description'].split('\n')
-                    for line in desc_lines:
-                        line = line.strip()
-                        if line.startswith(('-', '*', '•')):
-                            story.append(Paragraph(line, styles['BulletPoint'], bulletText=line[0]))
-                        elif line:
-                             story.append(Paragraph(line, styles['NormalIndented']))
-                story.append(Spacer(1, 0.15*inch))
-
-    # --- Education ---
-    education_entries = data.get('education_entries', [])
-    if education_entries:
-        story.append(Paragraph("Education", styles['SectionTitle']))
-        for edu in education_entries:
-            if edu.get('degree') and edu.get('institution'):
-                story.append(Paragraph(edu['degree'], styles['JobTitle']))
-                story.append(Paragraph(f"{edu['institution']} | {edu.get('edu_dates', 'N/A')}", styles['CompanyDate']))
-                if edu.get('edu_details'):
-                    story.append(Paragraph(edu['edu_details'], styles['NormalIndented']))
-                story.append(Spacer(1, 0.1*inch))
+        contact_info = []
+        if data.get('email'): contact_info.append(data['email'])
+        if data.get('phone'): contact_info.append(data['phone'])
+        if data.get('linkedin'): contact_info.append(f"LinkedIn: {data['linkedin']}")
+        if data.get('github'): contact_info.append(f"GitHub: {data['github']}")
+        if contact_info:
+            yield para(" | ".join(contact_info), styles['ContactHeader'])
+
+        yield HRFlowable(width="100%", thickness=0.5, color=gray, spaceBefore=0.1*inch, spaceAfter=0.1*inch)
+
+        # --- Summary ---
+        if data.get('summary'):
+            yield para("Summary", styles['SectionTitle'])
+            yield para(data['summary'], styles['Normal'])
+            yield Spacer(1, 0.1*inch)
+
+        # --- Professional Experience ---
+        experiences = data.get('experiences', [])
+        if experiences:
+            yield para("Professional Experience", styles['SectionTitle'])
+            for exp in experiences:
+                if exp.get('title') and exp.get('company'):
+                    yield para(exp['title'], styles['JobTitle'])
+                    yield para(f"{exp['company']} | {exp.get('dates', 'N/A')}", styles['CompanyDate'])
+                    if exp.get('description'):
+                        # Basic handling for bullet points (assuming user types '-' or similar)
+                        desc_lines = exp['description'].split('\n')
+                        desc_items = []
+                        for line in desc_lines:
+                            line = line.strip()
+                            if line.startswith(('-', '*', '•')):
+                                desc_items.append((line, styles['BulletPoint'], line[0]))
+                            elif line:
+                                desc_items.append((line, styles['NormalIndented'], None))
+                        yield from bullet_list(desc_items)
+                    yield Spacer(1, 0.15*inch)
+
+        # --- Education ---
+        education_entries = data.get('education_entries', [])
+        if education_entries:
+            yield para("Education", styles['SectionTitle'])
+            for edu in education_entries:
+                if edu.get('degree') and edu.get('institution'):
+                    yield para(edu['degree'], styles['JobTitle'])
+                    yield para(f"{edu['institution']} | {edu.get('edu_dates', 'N/A')}", styles['CompanyDate'])
+                    if edu.get('edu_details'):
+                        yield para(edu['edu_details'], styles['NormalIndented'])
+                    yield Spacer(1, 0.1*inch)
     
-    # --- Skills ---
-    if data.get('skills'):
-        story.append(Paragraph("Skills", styles['SectionTitle']))
-        story.append(Paragraph(data['skills'], styles['Normal'])) # Assuming comma-separated
-        story.append(Spacer(1, 0.1*inch))
-
-    # --- Hobbies ---
-    if data.get('hobbies'):
-        story.append(Paragraph("Hobbies", styles['SectionTitle']))
-        story.append(Paragraph(data['hobbies'], styles['Normal']))
-        story.append(Spacer(1, 0.1*inch))
-
-    doc.build(story)
+        # --- Skills ---
+        if data.get('skills'):
+            yield para("Skills", styles['SectionTitle'])
+            yield para(data['skills'], styles['Normal']) # Assuming comma-separated
+            yield Spacer(1, 0.1*inch)
+
+        # --- Hobbies ---
+        if data.get('hobbies'):
+            yield para("Hobbies", styles['SectionTitle'])
+            yield para(data['hobbies'], styles['Normal'])
+            yield Spacer(1, 0.1*inch)
+
+    build_document(doc, build_story())
     buffer.seek(0)
     return buffer
\ No newline at end of file
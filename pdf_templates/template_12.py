@@ -1,6 +1,7 @@
 # pdf_templates/modern_template.py
 import io
-from reportlab.platypus import BaseDocTemplate, PageTemplate, Frame, Paragraph, Spacer, Image, Table, TableStyle, FrameBreak
+import itertools
+from reportlab.platypus import BaseDocTemplate, PageTemplate, Frame, Spacer, Image, FrameBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch, cm
 from reportlab.lib.colors import HexColor, black, white, transparent
@@ -9,7 +10,16 @@ from reportlab.lib.pagesizes import A4 # <-- USE A4
 from reportlab.graphics.shapes import Circle
 # from reportlab.lib.utils import ImageReader # Not strictly needed if using canvas.drawImage
 import os
+import logging
 from datetime import datetime
+from pdf_templates import fonts
+from pdf_templates.base import build_document
+from pdf_templates.fragments import cached_section
+from pdf_templates.images import photo_reader
+from pdf_templates.flowables import bullet_list, para
+from pdf_templates.tables import CompiledTableStyle, table
+
+logger = logging.getLogger(__name__)
 
 # --- Color Palette ---
 COLOR_PRIMARY_GREEN = HexColor('#36A083')
@@ -21,6 +31,14 @@ COLOR_TEXT_MUTED = HexColor('#718096')
 COLOR_TEXT_BLACK = HexColor('#1A202C')
 COLOR_LINK = HexColor('#2B6CB0')
 
+# --- Header row (Title | Dates) of experience and education entries ---
+HEADER_ROW_STYLE = CompiledTableStyle([
+    ('VALIGN', (0,0), (-1,-1), 'TOP'),
+    ('LEFTPADDING', (0,0), (-1,-1), 0),
+    ('RIGHTPADDING', (0,0), (-1,-1), 0),
+    ('BOTTOMPADDING', (0,0), (-1,-1), 1), # Space below title/date row
+])
+
 # --- Default Order Constant (can be imported or redefined) ---
 # This should ideally match the one in app.py
 DEFAULT_SECTION_ORDER = ['summary', 'experience', 'education', 'achievements', 'courses']
@@ -82,20 +100,22 @@ class ModernDocTemplate(BaseDocTemplate):
                 img_radius = img_size / 2
                 img_draw_x = img_center_x - img_radius
                 img_draw_y = img_center_y - img_radius
+                photo = photo_reader(self.profile_image_path, img_size, img_size) # None if the render profile leaves photos out
 
-                # Create a circular clipping path centered correctly
-                path = canvas.beginPath()
-                path.circle(img_center_x, img_center_y, img_radius)
-                canvas.clipPath(path, stroke=0, fill=0)
+                if photo is not None:
+                    # Create a circular clipping path centered correctly
+                    path = canvas.beginPath()
+                    path.circle(img_center_x, img_center_y, img_radius)
+                    canvas.clipPath(path, stroke=0, fill=0)
 
-                # Draw the image within the clipped circle
-                canvas.drawImage(self.profile_image_path, img_draw_x, img_draw_y,
-                                 width=img_size, height=img_size, mask='auto')
+                    # Draw the image within the clipped circle
+                    canvas.drawImage(photo, img_draw_x, img_draw_y,
+                                     width=img_size, height=img_size, mask='auto')
                 # IMPORTANT: Must restore state after clipping if other drawing happens later
                 # canvas.restoreState() # Don't restore here, restore outside the if/else
 
             except Exception as e:
-                print(f"Error drawing profile image: {e}")
+                logger.warning(f"Error drawing profile image: {e}")
                 # Maybe draw a placeholder circle?
                 canvas.setFillColor(COLOR_PROFILE_BG_DOT) # Fallback color
                 canvas.circle(img_center_x, img_center_y, img_radius, stroke=1, fill=1)
@@ -122,11 +142,9 @@ class ModernDocTemplate(BaseDocTemplate):
 def create_section_header(icon_char, title_text, style, icon_color=COLOR_PRIMARY_GREEN):
     # Using a Paragraph with HTML-like font tag for basic icon inclusion.
     # For complex icons/alignment, consider Table or custom Flowable.
-    # Ensure the font used supports the icon_char (e.g., use ZapfDingbats or an icon font).
-    # Using Helvetica might not render all icons.
-    # For reliability, using basic Unicode symbols or bullet points is safer.
-    icon_font_name = 'Helvetica' # Or 'ZapfDingbats' for some symbols
-    return Paragraph(f'<font name="{icon_font_name}" color="{icon_color.hexval()}">{icon_char}</font>  {title_text.upper()}', style)
+    # The Unicode family covers symbols like ☎ and ★; emoji it lacks are swapped for a symbol.
+    icon_font_name = fonts.REGULAR
+    return para(f'<font name="{icon_font_name}" color="{icon_color.hexval()}">{fonts.icon(icon_char)}</font>  {title_text.upper()}', style)
 
 
 def format_month_year(date_str_yyyy_mm):
@@ -152,25 +170,25 @@ def generate_pdf(data):
 
     styles = getSampleStyleSheet()
     # --- Define Styles (Adjust font sizes/leading slightly if needed for A4) ---
-    styles.add(ParagraphStyle(name='FullName', fontName='Helvetica-Bold', fontSize=26, textColor=COLOR_TEXT_BLACK, spaceBefore=0.15*inch, leading=30, alignment=TA_LEFT))
-    styles.add(ParagraphStyle(name='JobTitle', fontName='Helvetica', fontSize=10.5, textColor=white, leading=13, spaceBefore=0, spaceAfter=0.1*inch, alignment=TA_LEFT))
+    styles.add(ParagraphStyle(name='FullName', fontName=fonts.BOLD, fontSize=26, textColor=COLOR_TEXT_BLACK, spaceBefore=0.15*inch, leading=30, alignment=TA_LEFT))
+    styles.add(ParagraphStyle(name='JobTitle', fontName=fonts.REGULAR, fontSize=10.5, textColor=white, leading=13, spaceBefore=0, spaceAfter=0.1*inch, alignment=TA_LEFT))
 
-    styles.add(ParagraphStyle(name='LeftColH1', fontName='Helvetica-Bold', fontSize=9.5, textColor=COLOR_PRIMARY_GREEN, spaceBefore=0.25*inch, spaceAfter=0.1*inch, leading=11))
-    styles.add(ParagraphStyle(name='LeftColText', fontName='Helvetica', fontSize=8, textColor=COLOR_TEXT_DARK, leading=10, spaceAfter=2))
+    styles.add(ParagraphStyle(name='LeftColH1', fontName=fonts.BOLD, fontSize=9.5, textColor=COLOR_PRIMARY_GREEN, spaceBefore=0.25*inch, spaceAfter=0.1*inch, leading=11))
+    styles.add(ParagraphStyle(name='LeftColText', fontName=fonts.REGULAR, fontSize=8, textColor=COLOR_TEXT_DARK, leading=10, spaceAfter=2))
     # styles.add(ParagraphStyle(name='LeftColLink', parent=styles['LeftColText'], textColor=COLOR_LINK)) # Example if needed
-    styles.add(ParagraphStyle(name='LeftColItemTitle', fontName='Helvetica-Bold', fontSize=8.5, textColor=COLOR_TEXT_DARK, leading=10, spaceBefore=4, spaceAfter=1))
+    styles.add(ParagraphStyle(name='LeftColItemTitle', fontName=fonts.BOLD, fontSize=8.5, textColor=COLOR_TEXT_DARK, leading=10, spaceBefore=4, spaceAfter=1))
     styles.add(ParagraphStyle(name='LeftColItemDesc', parent=styles['LeftColText'], fontSize=7.5, leading=9, leftIndent=0))
 
-    styles.add(ParagraphStyle(name='RightColH1', fontName='Helvetica-Bold', fontSize=10.5, textColor=COLOR_PRIMARY_GREEN, spaceBefore=0.15*inch, spaceAfter=0.05*inch, leading=13))
-    styles.add(ParagraphStyle(name='RightColBody', fontName='Helvetica', fontSize=8.5, textColor=COLOR_TEXT_DARK, leading=12, spaceAfter=0.1*inch, alignment=TA_JUSTIFY))
-    styles.add(ParagraphStyle(name='ExpJobTitle', fontName='Helvetica-Bold', fontSize=9.5, textColor=COLOR_TEXT_BLACK, leading=12))
-    styles.add(ParagraphStyle(name='ExpCompanyLocation', fontName='Helvetica', fontSize=8.5, textColor=COLOR_TEXT_MUTED, leading=10, spaceBefore=1)) # Added spaceBefore
-    styles.add(ParagraphStyle(name='ExpDates', fontName='Helvetica', fontSize=8.5, textColor=COLOR_TEXT_MUTED, leading=10, alignment=TA_RIGHT))
+    styles.add(ParagraphStyle(name='RightColH1', fontName=fonts.BOLD, fontSize=10.5, textColor=COLOR_PRIMARY_GREEN, spaceBefore=0.15*inch, spaceAfter=0.05*inch, leading=13))
+    styles.add(ParagraphStyle(name='RightColBody', fontName=fonts.REGULAR, fontSize=8.5, textColor=COLOR_TEXT_DARK, leading=12, spaceAfter=0.1*inch, alignment=TA_JUSTIFY))
+    styles.add(ParagraphStyle(name='ExpJobTitle', fontName=fonts.BOLD, fontSize=9.5, textColor=COLOR_TEXT_BLACK, leading=12))
+    styles.add(ParagraphStyle(name='ExpCompanyLocation', fontName=fonts.REGULAR, fontSize=8.5, textColor=COLOR_TEXT_MUTED, leading=10, spaceBefore=1)) # Added spaceBefore
+    styles.add(ParagraphStyle(name='ExpDates', fontName=fonts.REGULAR, fontSize=8.5, textColor=COLOR_TEXT_MUTED, leading=10, alignment=TA_RIGHT))
     styles.add(ParagraphStyle(name='ExpBullet', parent=styles['RightColBody'], bulletIndent=10, leftIndent=15, firstLineIndent=0, spaceBefore=1, fontSize=8, leading=10.5))
 
-    styles.add(ParagraphStyle(name='EduDegree', fontName='Helvetica-Bold', fontSize=9.5, textColor=COLOR_TEXT_BLACK, leading=12))
-    styles.add(ParagraphStyle(name='EduInstitution', fontName='Helvetica', fontSize=8.5, textColor=COLOR_TEXT_DARK, leading=10, spaceBefore=1)) # Added spaceBefore
-    styles.add(ParagraphStyle(name='EduLocationDates', fontName='Helvetica', fontSize=8.5, textColor=COLOR_TEXT_MUTED, leading=10, alignment=TA_RIGHT))
+    styles.add(ParagraphStyle(name='EduDegree', fontName=fonts.BOLD, fontSize=9.5, textColor=COLOR_TEXT_BLACK, leading=12))
+    styles.add(ParagraphStyle(name='EduInstitution', fontName=fonts.REGULAR, fontSize=8.5, textColor=COLOR_TEXT_DARK, leading=10, spaceBefore=1)) # Added spaceBefore
+    styles.add(ParagraphStyle(name='EduLocationDates', fontName=fonts.REGULAR, fontSize=8.5, textColor=COLOR_TEXT_MUTED, leading=10, alignment=TA_RIGHT))
     styles.add(ParagraphStyle(name='EduDetails', parent=styles['RightColBody'], fontSize=8, leading=10.5, spaceBefore=2)) # Style for Edu details
 
 
@@ -182,15 +200,15 @@ def generate_pdf(data):
         story = []
         # Using simple unicode symbols as icons for better font compatibility
         story.append(create_section_header('☎', 'CONTACTS', styles['LeftColH1'])) # Phone icon
-        if data.get('phone'): story.append(Paragraph(data['phone'], styles['LeftColText']))
-        if data.get('email'): story.append(Paragraph(data['email'], styles['LeftColText']))
+        if data.get('phone'): story.append(para(data['phone'], styles['LeftColText']))
+        if data.get('email'): story.append(para(data['email'], styles['LeftColText']))
         if data.get('linkedin'):
              # Attempt basic link creation (PDF viewers may auto-link)
              link = data['linkedin']
              if not link.startswith(('http://', 'https://')):
                  link = 'https://' + link
-             story.append(Paragraph(f'<link href="{link}">{data["linkedin"]}</link>', styles['LeftColText']))
-        if data.get('location'): story.append(Paragraph(data['location'], styles['LeftColText']))
+             story.append(para(f'<link href="{link}">{data["linkedin"]}</link>', styles['LeftColText']))
+        if data.get('location'): story.append(para(data['location'], styles['LeftColText']))
         story.append(Spacer(1, 0.2*inch))
         return story
 
@@ -200,8 +218,8 @@ def generate_pdf(data):
         if data.get('key_achievements'):
             story.append(create_section_header('★', 'KEY ACHIEVEMENTS', styles['LeftColH1'])) # Star icon
             for ach in data['key_achievements']:
-                story.append(Paragraph(ach['title'], styles['LeftColItemTitle']))
-                story.append(Paragraph(ach['description'], styles['LeftColItemDesc']))
+                story.append(para(ach['title'], styles['LeftColItemTitle']))
+                story.append(para(ach['description'], styles['LeftColItemDesc']))
                 story.append(Spacer(1, 0.08*inch)) # Slightly more space between items
             story.append(Spacer(1, 0.2*inch))
         return story
@@ -212,8 +230,8 @@ def generate_pdf(data):
         if data.get('courses'):
             story.append(create_section_header('📄', 'COURSES & CERTIFICATIONS', styles['LeftColH1'])) # Document icon
             for course in data['courses']:
-                story.append(Paragraph(course['title'], styles['LeftColItemTitle']))
-                story.append(Paragraph(course['description'], styles['LeftColItemDesc']))
+                story.append(para(course['title'], styles['LeftColItemTitle']))
+                story.append(para(course['description'], styles['LeftColItemDesc']))
                 story.append(Spacer(1, 0.08*inch))
             story.append(Spacer(1, 0.2*inch))
         return story
@@ -223,7 +241,7 @@ def generate_pdf(data):
         story = []
         story.append(create_section_header('👤', 'SUMMARY', styles['RightColH1'])) # Person icon
         if data.get('summary'):
-            story.append(Paragraph(data['summary'], styles['RightColBody']))
+            story.append(para(data['summary'], styles['RightColBody']))
         story.append(Spacer(1, 0.2*inch))
         return story
 
@@ -239,29 +257,23 @@ def generate_pdf(data):
                 date_range = f"{start_date_f} - {end_date_f}" if start_date_f else end_date_f # Handle missing start date
 
                 exp_header_data = [[
-                    Paragraph(exp['title'], styles['ExpJobTitle']),
-                    Paragraph(date_range, styles['ExpDates'])
+                    para(exp['title'], styles['ExpJobTitle']),
+                    para(date_range, styles['ExpDates'])
                 ]]
-                exp_header_table = Table(exp_header_data, colWidths=['70%', '30%'], style=TableStyle([
-                    ('VALIGN', (0,0), (-1,-1), 'TOP'),
-                    ('LEFTPADDING', (0,0), (-1,-1), 0),
-                    ('RIGHTPADDING', (0,0), (-1,-1), 0),
-                    ('BOTTOMPADDING', (0,0), (-1,-1), 1), # Space below title/date row
-                ]))
+                exp_header_table = table(exp_header_data, HEADER_ROW_STYLE, colWidths=['70%', '30%'])
                 story.append(exp_header_table)
 
                 # Company & Location Line
                 company_line = exp.get('company', '')
                 if exp.get('location'): company_line += f" | {exp['location']}"
-                if company_line: story.append(Paragraph(company_line, styles['ExpCompanyLocation']))
+                if company_line: story.append(para(company_line, styles['ExpCompanyLocation']))
 
                 # Description Bullet Points
                 description_text = exp.get('description', '')
                 if description_text:
                     # Split by newline, filter empty, remove leading hyphens/bullets
                     points = [p.strip().lstrip('-*• ') for p in description_text.split('\n') if p.strip()]
-                    for point in points:
-                        story.append(Paragraph(f"• {point}", styles['ExpBullet'])) # Use standard bullet
+                    story.extend(bullet_list([(f"• {point}", styles['ExpBullet'], None) for point in points])) # Use standard bullet
                 story.append(Spacer(1, 0.15*inch)) # Space between experiences
             # story.append(Spacer(1, 0.1*inch)) # Optional spacer after the whole section
         return story
@@ -278,25 +290,20 @@ def generate_pdf(data):
                 date_range = f"{start_date_f} - {end_date_f}" if start_date_f else end_date_f
 
                 edu_header_data = [[
-                    Paragraph(edu['degree'], styles['EduDegree']),
-                    Paragraph(date_range, styles['EduLocationDates'])
+                    para(edu['degree'], styles['EduDegree']),
+                    para(date_range, styles['EduLocationDates'])
                 ]]
-                edu_header_table = Table(edu_header_data, colWidths=['70%', '30%'], style=TableStyle([
-                    ('VALIGN', (0,0), (-1,-1), 'TOP'),
-                    ('LEFTPADDING', (0,0), (-1,-1), 0),
-                    ('RIGHTPADDING', (0,0), (-1,-1), 0),
-                    ('BOTTOMPADDING', (0,0), (-1,-1), 1),
-                ]))
+                edu_header_table = table(edu_header_data, HEADER_ROW_STYLE, colWidths=['70%', '30%'])
                 story.append(edu_header_table)
 
                 # Institution & Location Line
                 institution_line = edu.get('institution', '')
                 if edu.get('edu_location'): institution_line += f" | {edu['edu_location']}"
-                if institution_line: story.append(Paragraph(institution_line, styles['EduInstitution']))
+                if institution_line: story.append(para(institution_line, styles['EduInstitution']))
 
                 # Education Details
                 if edu.get('edu_details'):
-                    story.append(Paragraph(edu['edu_details'], styles['EduDetails'])) # Use specific style if needed
+                    story.append(para(edu['edu_details'], styles['EduDetails'])) # Use specific style if needed
                 story.append(Spacer(1, 0.15*inch)) # Space between education entries
         return story
 
@@ -312,25 +319,32 @@ def generate_pdf(data):
         'education': build_education_story,       # Right Column
     }
 
+    # A section is rebuilt only when a resume field its builder reads changes (see fragments)
+    def build_section(section_key, builder):
+        return cached_section(__name__, section_key, data, lambda section_data: builder(section_data, styles))
+
     # --- Get Section Order ---
     # Retrieve the user-defined order from the data, fallback to default
     section_order = data.get('section_order', DEFAULT_SECTION_ORDER)
-    print(f"Using section order: {section_order}") # Debugging output
+    logger.debug(f"Using section order: {section_order}")
 
     # --- Build Stories based on Order ---
+    # The fixed elements are built here; ordered sections only once doc.build reaches them (see base.LazyStory)
     story_left = []
     story_right = []
+    sections_left = []
+    sections_right = []
 
     # Add fixed elements first (if any)
     story_left.append(Spacer(1, doc.pagesize[1] - doc.topMargin - (3.0 * inch))) # Approximate spacer to clear profile area - ADJUST MANUALLY
 
     # Add Name/Title Block to Right Column (fixed position)
     story_right.append(Spacer(1, 0.1*inch)) # Align with top of green name background
-    if data.get('full_name'): story_right.append(Paragraph(data['full_name'], styles['FullName']))
-    if data.get('title_subtitle'): story_right.append(Paragraph(data['title_subtitle'], styles['JobTitle']))
+    if data.get('full_name'): story_right.append(para(data['full_name'], styles['FullName']))
+    if data.get('title_subtitle'): story_right.append(para(data['title_subtitle'], styles['JobTitle']))
     story_right.append(Spacer(1, 0.35*inch)) # Space below name block
 
-    # Iterate through the desired section order and build stories
+    # Iterate through the desired section order and assign sections to columns
     # This template design puts specific sections in specific columns.
     # A more flexible template might just append all ordered sections to one story.
     for section_key in section_order:
@@ -338,28 +352,32 @@ def generate_pdf(data):
         if builder:
             # Determine which column this section belongs to in this template
             if section_key in ['contact', 'achievements', 'courses']:
-                story_left.extend(builder(data, styles))
+                sections_left.append(section_key)
             elif section_key in ['summary', 'experience', 'education']:
-                 story_right.extend(builder(data, styles))
+                 sections_right.append(section_key)
             else:
                  # Handle unknown section key? Maybe log a warning.
-                 print(f"Warning: Unknown section key '{section_key}' in section_order.")
+                 logger.warning(f"Unknown section key '{section_key}' in section_order.")
                  # Optionally, append to a default column (e.g., right)
                  # story_right.extend(builder(data, styles))
         else:
-             print(f"Warning: No builder found for section key '{section_key}'.")
+             logger.debug(f"No builder found for section key '{section_key}'.")
+
+    def column_story(fixed_story, section_keys):
+        yield from fixed_story
+        for section_key in section_keys:
+            yield from build_section(section_key, section_builders[section_key])
 
     # --- Combine Left and Right Stories for the Page ---
-    full_story = []
-    full_story.extend(story_left)
-    full_story.append(FrameBreak()) # IMPORTANT: Move to the next frame (right column)
-    full_story.extend(story_right)
+    full_story = itertools.chain(column_story(story_left, sections_left),
+                                 [FrameBreak()], # IMPORTANT: Move to the next frame (right column)
+                                 column_story(story_right, sections_right))
 
     # --- Build the PDF Document ---
     try:
-        doc.build(full_story)
+        build_document(doc, full_story)
     except Exception as e:
-        print(f"Error during doc.build: {e}")
+        logger.error(f"Error during doc.build: {e}")
         # Consider raising the exception or returning an error indicator
         raise # Re-raise the exception to be caught by Flask route
 
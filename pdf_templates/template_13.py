@@ -1,11 +1,24 @@
 import io
+import logging
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, HRFlowable, Frame, PageTemplate, Table, Image
+from reportlab.platypus import SimpleDocTemplate, Spacer, HRFlowable, Frame, PageTemplate
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.colors import HexColor, gray
-from reportlab.lib.utils import ImageReader
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from pdf_templates import fonts
+from pdf_templates.base import build_document
+from pdf_templates.images import photo_handle
+from pdf_templates.flowables import bullet_list, para
+from pdf_templates.tables import CompiledTableStyle, table
+
+logger = logging.getLogger(__name__)
+
+HEADER_TABLE_STYLE = CompiledTableStyle([
+    ('VALIGN', (0,0), (-1,-1), 'MIDDLE'), # Vertically center content in cells
+    # ('GRID', (0,0), (-1,-1), 0.5, gray) # Uncomment to see table boundaries
+])
+SKILL_TABLE_STYLE = CompiledTableStyle([('VALIGN', (0,0), (-1,-1), 'TOP')]) # , ('GRID', (0,0), (-1,-1), 0.5, gray)])
 
 # Helper function to potentially round corners of an image (requires Pillow)
 # This is complex and often better done outside ReportLab if needed precisely.
@@ -28,26 +41,26 @@ def generate_resume_pdf(data, profile_image_path=None):
 
     # --- Custom Styles ---
     styles.add(ParagraphStyle(name='Name',
-                              fontName='Helvetica-Bold',
+                              fontName=fonts.BOLD,
                               fontSize=28, # Adjusted size
                               leading=34,
                               textColor=HexColor('#000000'))) # Assuming black or very dark grey
 
     styles.add(ParagraphStyle(name='Headline',
-                              fontName='Helvetica',
+                              fontName=fonts.REGULAR,
                               fontSize=12, # Adjusted size
                               leading=14,
                               textColor=color_primary,
                               spaceAfter=0.1*inch)) # Space after headline
 
     styles.add(ParagraphStyle(name='ContactInfo',
-                              fontName='Helvetica',
+                              fontName=fonts.REGULAR,
                               fontSize=10,
                               leading=12,
                               textColor=color_text_dark))
 
     styles.add(ParagraphStyle(name='SectionTitle',
-                              fontName='Helvetica-Bold',
+                              fontName=fonts.BOLD,
                               fontSize=12, # Smaller section title
                               leading=15,
                               spaceBefore=0.25*inch, # More space before sections
@@ -55,14 +68,14 @@ def generate_resume_pdf(data, profile_image_path=None):
                               textColor=color_text_dark))
 
     styles.add(ParagraphStyle(name='JobTitle',
-                              fontName='Helvetica-Bold',
+                              fontName=fonts.BOLD,
                               fontSize=12,
                               leading=14,
                               spaceBefore=0.15*inch, # Space before each job
                               textColor=color_text_dark))
 
     styles.add(ParagraphStyle(name='CompanyLocationDate',
-                              fontName='Helvetica',
+                              fontName=fonts.REGULAR,
                               fontSize=10,
                               leading=12,
                               textColor=color_text_light,
@@ -70,7 +83,7 @@ def generate_resume_pdf(data, profile_image_path=None):
 
     styles.add(ParagraphStyle(name='BulletPoint',
                               parent=styles['Normal'], # Inherit most properties from Normal
-                              fontName='Helvetica',
+                              fontName=fonts.REGULAR,
                               fontSize=10,
                               leading=12,
                               leftIndent=0.15*inch, # Indent bullet text
@@ -78,15 +91,24 @@ def generate_resume_pdf(data, profile_image_path=None):
                               spaceBefore=0.02*inch, # Small space between bullets
                               textColor=color_text_dark))
 
+    styles.add(ParagraphStyle(name='NormalIndented', # Description lines that aren't bullet points
+                              parent=styles['Normal'],
+                              fontName=fonts.REGULAR,
+                              fontSize=10,
+                              leading=12,
+                              leftIndent=0.15*inch,
+                              spaceBefore=0.02*inch,
+                              textColor=color_text_dark))
+
     styles.add(ParagraphStyle(name='EducationDegree',
-                              fontName='Helvetica-Bold',
+                              fontName=fonts.BOLD,
                               fontSize=12,
                               leading=14,
                               spaceBefore=0.15*inch,
                               textColor=color_text_dark))
 
     styles.add(ParagraphStyle(name='InstitutionDate',
-                              fontName='Helvetica',
+                              fontName=fonts.REGULAR,
                               fontSize=10,
                               leading=12,
                               textColor=color_text_light,
@@ -94,14 +116,14 @@ def generate_resume_pdf(data, profile_image_path=None):
 
     styles.add(ParagraphStyle(name='EducationDetails',
                               parent=styles['Normal'],
-                              fontName='Helvetica',
+                              fontName=fonts.REGULAR,
                               fontSize=10,
                               leading=12,
                               leftIndent=0.15*inch,
                               textColor=color_text_dark))
 
     styles.add(ParagraphStyle(name='KeyAchievementTitle',
-                              fontName='Helvetica-Bold',
+                              fontName=fonts.BOLD,
                               fontSize=10,
                               leading=12,
                               spaceBefore=0.1*inch, # Space before achievement title
@@ -109,7 +131,7 @@ def generate_resume_pdf(data, profile_image_path=None):
 
     styles.add(ParagraphStyle(name='KeyAchievementDescription',
                               parent=styles['Normal'],
-                              fontName='Helvetica',
+                              fontName=fonts.REGULAR,
                               fontSize=10,
                               leading=12,
                               leftIndent=0.15*inch, # Indent description slightly
@@ -117,7 +139,7 @@ def generate_resume_pdf(data, profile_image_path=None):
                               textColor=color_text_dark))
 
     styles.add(ParagraphStyle(name='SkillPill', # Approximation of the pill style
-                                fontName='Helvetica',
+                                fontName=fonts.REGULAR,
                                 fontSize=9, # Smaller font for pills
                                 leading=11,
                                 backColor=HexColor('#E0F2F7'), # Light blue background
@@ -137,13 +159,13 @@ def generate_resume_pdf(data, profile_image_path=None):
     # For simplicity in a flowing column, we'll list skills comma-separated with Normal style.
 
     styles.add(ParagraphStyle(name='Language',
-                              fontName='Helvetica',
+                              fontName=fonts.REGULAR,
                               fontSize=10,
                               leading=12,
                               textColor=color_text_dark))
 
     styles.add(ParagraphStyle(name='FooterText',
-                              fontName='Helvetica',
+                              fontName=fonts.REGULAR,
                               fontSize=8,
                               leading=10,
                               textColor=gray,
@@ -151,7 +173,7 @@ def generate_resume_pdf(data, profile_image_path=None):
 
     styles.add(ParagraphStyle(name='SummaryText',
                               parent=styles['Normal'],
-                              fontName='Helvetica',
+                              fontName=fonts.REGULAR,
                               fontSize=10,
                               leading=12,
                               textColor=color_text_dark))
@@ -165,9 +187,9 @@ def generate_resume_pdf(data, profile_image_path=None):
     # Left cell: Name, Headline, Contact Info
     header_text_story = []
     if data.get('full_name'):
-        header_text_story.append(Paragraph(data['full_name'].upper(), styles['Name']))
+        header_text_story.append(para(data['full_name'].upper(), styles['Name']))
     if data.get('headline'):
-         header_text_story.append(Paragraph(data['headline'], styles['Headline']))
+         header_text_story.append(para(data['headline'], styles['Headline']))
 
     contact_info_items = []
     if data.get('email'): contact_info_items.append(f"help@{data.get('email_domain', 'domain.com')}") # Assuming example format
@@ -176,19 +198,20 @@ def generate_resume_pdf(data, profile_image_path=None):
 
     contact_paragraph_text = " • ".join(contact_info_items) # Use bullet separator as in image
     if contact_paragraph_text:
-        header_text_story.append(Paragraph(contact_paragraph_text, styles['ContactInfo']))
+        header_text_story.append(para(contact_paragraph_text, styles['ContactInfo']))
 
     # Right cell: Profile Image
     img_flowable = None
     if profile_image_path:
         try:
-            img = ImageReader(profile_image_path)
-            # Determine image size - let's make it approx 1 inch wide
-            img_width = 1.0 * inch
-            img_height = img_width * img.getSize()[1] / img.getSize()[0] # Maintain aspect ratio
-            img_flowable = Image(profile_image_path, width=img_width, height=img_height)
+            photo = photo_handle(profile_image_path) # Measured from the file header; decoded once, when drawn
+            if photo is not None:
+                # Determine image size - let's make it approx 1 inch wide
+                img_width = 1.0 * inch
+                img_height = img_width * photo.size[1] / photo.size[0] # Maintain aspect ratio
+                img_flowable = photo.image(img_width, img_height) # None if the render profile leaves photos out
         except Exception as e:
-            print(f"Could not load image {profile_image_path}: {e}")
+            logger.warning(f"Could not load image {profile_image_path}: {e}")
             img_flowable = None # Don't add if loading fails
 
     # Add content to the table data row
@@ -201,12 +224,7 @@ def generate_resume_pdf(data, profile_image_path=None):
          header_col_widths = [letter[0] - doc.leftMargin - doc.rightMargin]
 
 
-    header_table_style = [
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'), # Vertically center content in cells
-        # ('GRID', (0,0), (-1,-1), 0.5, gray) # Uncomment to see table boundaries
-    ]
-
-    header_table = Table(header_table_data, colWidths=header_col_widths, style=header_table_style)
+    header_table = table(header_table_data, HEADER_TABLE_STYLE, colWidths=header_col_widths)
     story.append(header_table)
     story.append(Spacer(1, 0.1*inch)) # Small space after header block
 
@@ -258,36 +276,38 @@ def generate_resume_pdf(data, profile_image_path=None):
     # --- Professional Experience (Left Column) ---
     experiences = data.get('experiences', [])
     if experiences:
-        left_column_story.append(Paragraph("EXPERIENCE", styles['SectionTitle']))
+        left_column_story.append(para("EXPERIENCE", styles['SectionTitle']))
         left_column_story.append(HRFlowable(width="100%", thickness=1, color=color_line, spaceBefore=0, spaceAfter=0.1*inch))
         for i, exp in enumerate(experiences):
             if exp.get('title'):
-                left_column_story.append(Paragraph(exp['title'], styles['JobTitle']))
+                left_column_story.append(para(exp['title'], styles['JobTitle']))
             company_loc_date = []
             if exp.get('company'): company_loc_date.append(exp['company'])
-            if exp.get('dates'): company_loc_date.append(f"🗓️ {exp['dates']}") # Using calendar icon emoji - might not render
+            if exp.get('dates'): company_loc_date.append(f"🗓️ {exp['dates']}") # Calendar emoji, drawn as a symbol (fonts.icon)
             if exp.get('location'): company_loc_date.append(f"📍 {exp['location']}") # Using location icon emoji
             if company_loc_date:
                 # Join with spaces, add special formatting for company/dates/location part if needed
                  company_line_parts = []
                  if exp.get('company'): company_line_parts.append(f"<font color='{color_primary}'>{exp['company']}</font>")
-                 if exp.get('dates'): company_line_parts.append(f"🗓️ {exp['dates']}")
-                 if exp.get('location'): company_line_parts.append(f"📍 {exp['location']}")
+                 if exp.get('dates'): company_line_parts.append(f"{fonts.icon('🗓️')} {exp['dates']}")
+                 if exp.get('location'): company_line_parts.append(f"{fonts.icon('📍')} {exp['location']}")
 
-                 left_column_story.append(Paragraph(" ".join(company_line_parts), styles['CompanyLocationDate']))
+                 left_column_story.append(para(" ".join(company_line_parts), styles['CompanyLocationDate']))
 
             if exp.get('description'):
                 # Split description by newlines and add as bullet points
                 desc_lines = exp['description'].split('\n')
+                desc_items = []
                 for line in desc_lines:
                     line = line.strip()
                     if line: # Only add non-empty lines
                          # Assume lines starting with '-' are bullet points, others are normal indented
                          if line.startswith('-'):
-                              left_column_story.append(Paragraph(line[1:].strip(), styles['BulletPoint'], bulletText='•'))
+                              desc_items.append((line[1:].strip(), styles['BulletPoint'], '•'))
                          else:
                               # If lines don't start with '-', maybe they are just paragraphs within the job
-                               left_column_story.append(Paragraph(line, styles['NormalIndented'])) # Or another style
+                              desc_items.append((line, styles['NormalIndented'], None)) # Or another style
+                left_column_story.extend(bullet_list(desc_items))
 
 
             if i < len(experiences) - 1: # Add space after each experience except the last one
@@ -297,22 +317,22 @@ def generate_resume_pdf(data, profile_image_path=None):
     # --- Education (Left Column) ---
     education_entries = data.get('education_entries', [])
     if education_entries:
-        left_column_story.append(Paragraph("EDUCATION", styles['SectionTitle']))
+        left_column_story.append(para("EDUCATION", styles['SectionTitle']))
         left_column_story.append(HRFlowable(width="100%", thickness=1, color=color_line, spaceBefore=0, spaceAfter=0.1*inch))
         for i, edu in enumerate(education_entries):
             if edu.get('degree'):
-                left_column_story.append(Paragraph(edu['degree'], styles['EducationDegree']))
+                left_column_story.append(para(edu['degree'], styles['EducationDegree']))
 
             institution_date_parts = []
             if edu.get('institution'): institution_date_parts.append(f"<font color='{color_primary}'>{edu['institution']}</font>")
-            if edu.get('edu_dates'): institution_date_parts.append(f"🗓️ {edu['edu_dates']}")
-            if edu.get('edu_location'): institution_date_parts.append(f"📍 {edu['edu_location']}")
+            if edu.get('edu_dates'): institution_date_parts.append(f"{fonts.icon('🗓️')} {edu['edu_dates']}")
+            if edu.get('edu_location'): institution_date_parts.append(f"{fonts.icon('📍')} {edu['edu_location']}")
 
             if institution_date_parts:
-                 left_column_story.append(Paragraph(" ".join(institution_date_parts), styles['InstitutionDate']))
+                 left_column_story.append(para(" ".join(institution_date_parts), styles['InstitutionDate']))
 
             if edu.get('edu_details'):
-                left_column_story.append(Paragraph(edu['edu_details'], styles['EducationDetails']))
+                left_column_story.append(para(edu['edu_details'], styles['EducationDetails']))
 
             if i < len(education_entries) - 1: # Add space after each education entry except the last one
                 left_column_story.append(Spacer(1, 0.1*inch))
@@ -321,7 +341,7 @@ def generate_resume_pdf(data, profile_image_path=None):
     # --- Languages (Left Column) ---
     languages = data.get('languages', [])
     if languages:
-        left_column_story.append(Paragraph("LANGUAGES", styles['SectionTitle']))
+        left_column_story.append(para("LANGUAGES", styles['SectionTitle']))
         left_column_story.append(HRFlowable(width="100%", thickness=1, color=color_line, spaceBefore=0, spaceAfter=0.1*inch))
 
         # Languages section layout (Name SkillLevel)
@@ -329,7 +349,7 @@ def generate_resume_pdf(data, profile_image_path=None):
         language_flowables = []
         for i, lang in enumerate(languages):
             lang_text = f"{lang.get('name', 'Language')} {lang.get('level_dots', '•••••')}" # Use dots or level text
-            language_flowables.append(Paragraph(lang_text, styles['Language']))
+            language_flowables.append(para(lang_text, styles['Language']))
             if i < len(languages) -1:
                  language_flowables.append(Spacer(1, 0.05*inch)) # Small space between languages
 
@@ -341,31 +361,33 @@ def generate_resume_pdf(data, profile_image_path=None):
 
     # --- Summary (Right Column) ---
     if data.get('summary'):
-        right_column_story.append(Paragraph("SUMMARY", styles['SectionTitle']))
+        right_column_story.append(para("SUMMARY", styles['SectionTitle']))
         right_column_story.append(HRFlowable(width="100%", thickness=1, color=color_line, spaceBefore=0, spaceAfter=0.1*inch))
-        right_column_story.append(Paragraph(data['summary'], styles['SummaryText']))
+        right_column_story.append(para(data['summary'], styles['SummaryText']))
 
 
     # --- Key Achievements (Right Column) ---
     achievements = data.get('achievements', [])
     if achievements:
-        right_column_story.append(Paragraph("KEY ACHIEVEMENTS", styles['SectionTitle']))
+        right_column_story.append(para("KEY ACHIEVEMENTS", styles['SectionTitle']))
         right_column_story.append(HRFlowable(width="100%", thickness=1, color=color_line, spaceBefore=0, spaceAfter=0.1*inch))
         for i, ach in enumerate(achievements):
             # Icon is challenging - using star character as placeholder
-            icon_char = ach.get('icon', '★') # Use star or get from data
+            icon_char = fonts.icon(ach.get('icon', '★')) # Use star or get from data
             if ach.get('title'):
                  # Add icon and title in the same paragraph
-                 right_column_story.append(Paragraph(f"<font color='{color_primary}'>{icon_char}</font> <b>{ach['title']}</b>", styles['KeyAchievementTitle']))
+                 right_column_story.append(para(f"<font color='{color_primary}'>{icon_char}</font> <b>{ach['title']}</b>", styles['KeyAchievementTitle']))
             if ach.get('description'):
-                 right_column_story.append(Paragraph(ach['description'], styles['KeyAchievementDescription']))
+                 right_column_story.append(para(ach['description'], styles['KeyAchievementDescription']))
 
             # No space after the last achievement description due to KeyAchievementDescription spaceAfter
 
     # --- Skills (Right Column) ---
     skills = data.get('skills', [])
+    if isinstance(skills, str): # The form sends skills as one comma-separated field
+        skills = [skill.strip() for skill in skills.split(',') if skill.strip()]
     if skills:
-        right_column_story.append(Paragraph("SKILLS", styles['SectionTitle']))
+        right_column_story.append(para("SKILLS", styles['SectionTitle']))
         right_column_story.append(HRFlowable(width="100%", thickness=1, color=color_line, spaceBefore=0, spaceAfter=0.1*inch))
 
         # Approximating the skills layout. Using a table where each cell contains a skill Paragraph.
@@ -386,7 +408,7 @@ def generate_resume_pdf(data, profile_image_path=None):
         for skill in skills:
              # Put each skill in its own cell with basic styling (not pill)
              # To get the pill look, you'd need to draw the background/border *in* the cell or use a custom Flowable.
-             row.append(Paragraph(skill, styles['Normal'])) # Using Normal style for simplicity
+             row.append(para(skill, styles['Normal'])) # Using Normal style for simplicity
 
         if row:
              skill_table_data.append(row)
@@ -394,7 +416,7 @@ def generate_resume_pdf(data, profile_image_path=None):
         if skill_table_data:
              # Use dynamic column widths for the table, allowing cells to be sized by content
              # colWidths can be None or a list of None to auto-size
-             skill_table = Table(skill_table_data, style=[('VALIGN', (0,0), (-1,-1), 'TOP')]) # , ('GRID', (0,0), (-1,-1), 0.5, gray)])
+             skill_table = table(skill_table_data, SKILL_TABLE_STYLE)
              right_column_story.append(skill_table)
              right_column_story.append(Spacer(1, 0.1*inch)) # Space after skills table
 
@@ -402,14 +424,14 @@ def generate_resume_pdf(data, profile_image_path=None):
     # --- Certification (Right Column) ---
     certifications = data.get('certifications', [])
     if certifications:
-        right_column_story.append(Paragraph("CERTIFICATION", styles['SectionTitle']))
+        right_column_story.append(para("CERTIFICATION", styles['SectionTitle']))
         right_column_story.append(HRFlowable(width="100%", thickness=1, color=color_line, spaceBefore=0, spaceAfter=0.1*inch))
         for i, cert in enumerate(certifications):
             if cert.get('name'):
                 # Assuming certificate name might be a link or distinct - use color_primary
-                 right_column_story.append(Paragraph(f"<font color='{color_primary}'>{cert['name']}</font>", styles['JobTitle'])) # Using JobTitle style for name
+                 right_column_story.append(para(f"<font color='{color_primary}'>{cert['name']}</font>", styles['JobTitle'])) # Using JobTitle style for name
             if cert.get('details'):
-                 right_column_story.append(Paragraph(cert['details'], styles['EducationDetails'])) # Using EducationDetails style for details
+                 right_column_story.append(para(cert['details'], styles['EducationDetails'])) # Using EducationDetails style for details
             if i < len(certifications) -1:
                  right_column_story.append(Spacer(1, 0.1*inch))
 
@@ -440,39 +462,45 @@ def generate_resume_pdf(data, profile_image_path=None):
         text_x = doc.leftMargin
         text_y = doc.bottomMargin - 0.3*inch # Position text below the line
 
-        canvas.setFont('Helvetica', 8)
+        canvas.setFont(fonts.REGULAR, 8)
         canvas.setFillColor(gray)
 
         # Draw the left footer text
         canvas.drawString(text_x, text_y, footer_text)
 
         # Draw "Powered by" text
-        power_text_width = canvas.stringWidth(footer_power, 'Helvetica', 8)
+        power_text_width = canvas.stringWidth(footer_power, fonts.REGULAR, 8)
         power_x = letter[0] - doc.rightMargin - power_text_width
         canvas.drawString(power_x, text_y, footer_power)
 
         # Add logo next to "Powered by"
         if logo_path:
             try:
-                logo_img = ImageReader(logo_path)
+                logo = photo_handle(logo_path) # Shared by every page's footer
                 logo_height = 0.15 * inch # Set a fixed small height for the logo
-                logo_width = logo_height * logo_img.getSize()[0] / logo_img.getSize()[1] # Maintain aspect ratio
+                logo_width = logo_height * logo.size[0] / logo.size[1] # Maintain aspect ratio
                 logo_x = power_x + power_text_width + 0.05*inch # Position logo after text with a gap
                 logo_y = text_y # Align bottom of logo with text baseline (approx)
+                logo_img = logo.reader(logo_width, logo_height, always=True) # Downsampled like photos, but kept in draft
                 canvas.drawImage(logo_img, logo_x, logo_y, width=logo_width, height=logo_height, mask='auto')
 
             except Exception as e:
-                print(f"Could not load footer logo {logo_path}: {e}")
+                logger.warning(f"Could not load footer logo {logo_path}: {e}")
 
 
         canvas.restoreState()
 
     # Build the document, applying the footer to all pages
-    doc.build(story, onFirstPage=footer_on_page, onLaterPages=footer_on_page)
+    build_document(doc, story, onFirstPage=footer_on_page, onLaterPages=footer_on_page)
 
     buffer.seek(0)
     return buffer
 
+
+def generate_pdf(data):
+    """The generate_pdf(data) entry point of the other templates; the photo comes from data['profile_image_path']."""
+    return generate_resume_pdf(data, profile_image_path=data.get('profile_image_path'))
+
 # --- Example Usage ---
 if __name__ == '__main__':
     # Sample data mimicking the structure needed by the function
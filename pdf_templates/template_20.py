@@ -1,88 +1,92 @@
 import io
-from reportlab.platypus import BaseDocTemplate, PageTemplate, Frame, Paragraph, Spacer, PageBreak, FrameBreak
+import itertools
+from reportlab.platypus import BaseDocTemplate, PageTemplate, Frame, Spacer, PageBreak, FrameBreak
 from reportlab.platypus.flowables import KeepInFrame
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.colors import HexColor, black, gray, lightgrey
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT, TA_JUSTIFY
 from reportlab.lib.pagesizes import letter
+from pdf_templates.base import build_document
+from pdf_templates.flowables import bullet_list, para
 
 def build_frame_story(data, styles, frame_name):
-    story = []
+    """Yields the flowables of one column, section by section."""
     if frame_name == 'left_col':
-        story.append(Paragraph("Contact", styles['SectionTitleLeft']))
+        yield para("Contact", styles['SectionTitleLeft'])
         if data.get('email'):
-            story.append(Paragraph(data['email'], styles['ContactLeft']))
+            yield para(data['email'], styles['ContactLeft'])
         if data.get('phone'):
-            story.append(Paragraph(data['phone'], styles['ContactLeft']))
+            yield para(data['phone'], styles['ContactLeft'])
         if data.get('linkedin'):
-            story.append(Paragraph(f"<u><font color='blue'>{data['linkedin']}</font></u>", styles['LinkLeft']))
+            yield para(f"<u><font color='blue'>{data['linkedin']}</font></u>", styles['LinkLeft'])
         if data.get('github'):
-            story.append(Paragraph(f"<u><font color='blue'>{data['github']}</font></u>", styles['LinkLeft']))
-        story.append(Spacer(1, 0.2 * inch))
+            yield para(f"<u><font color='blue'>{data['github']}</font></u>", styles['LinkLeft'])
+        yield Spacer(1, 0.2 * inch)
 
         if data.get('skills'):
-            story.append(Paragraph("Skills", styles['SectionTitleLeft']))
+            yield para("Skills", styles['SectionTitleLeft'])
             skills_list = [s.strip() for s in data['skills'].split(',')]
             for skill in skills_list:
                 if skill:
-                    story.append(Paragraph(f"• {skill}", styles['BulletLeft']))
-            story.append(Spacer(1, 0.2 * inch))
+                    yield para(f"• {skill}", styles['BulletLeft'])
+            yield Spacer(1, 0.2 * inch)
 
         education_entries = data.get('education_entries', [])
         if education_entries:
-            story.append(Paragraph("Education", styles['SectionTitleLeft']))
+            yield para("Education", styles['SectionTitleLeft'])
             for edu in education_entries:
                 if edu.get('degree'):
-                    story.append(Paragraph(edu['degree'], styles['DegreeLeft']))
+                    yield para(edu['degree'], styles['DegreeLeft'])
                 if edu.get('institution'):
-                    story.append(Paragraph(edu['institution'], styles['InstitutionLeft']))
+                    yield para(edu['institution'], styles['InstitutionLeft'])
                 if edu.get('edu_dates'):
-                    story.append(Paragraph(edu['edu_dates'], styles['DatesLeft']))
+                    yield para(edu['edu_dates'], styles['DatesLeft'])
                 if edu.get('edu_details'):
-                    story.append(Paragraph(edu['edu_details'], styles['DetailsLeft']))
-                story.append(Spacer(1, 0.1 * inch))
-            story.append(Spacer(1, 0.2 * inch))
+                    yield para(edu['edu_details'], styles['DetailsLeft'])
+                yield Spacer(1, 0.1 * inch)
+            yield Spacer(1, 0.2 * inch)
 
         if data.get('hobbies'):
-            story.append(Paragraph("Hobbies", styles['SectionTitleLeft']))
+            yield para("Hobbies", styles['SectionTitleLeft'])
             hobbies_list = [h.strip() for h in data['hobbies'].split(',')]
             for hobby in hobbies_list:
                 if hobby:
-                    story.append(Paragraph(f"• {hobby}", styles['BulletLeft']))
+                    yield para(f"• {hobby}", styles['BulletLeft'])
 
     elif frame_name == 'right_col':
         if data.get('full_name'):
-            story.append(Paragraph(data['full_name'].upper(), styles['NameHeaderRight']))
-        story.append(Spacer(1, 0.1 * inch))
+            yield para(data['full_name'].upper(), styles['NameHeaderRight'])
+        yield Spacer(1, 0.1 * inch)
 
         if data.get('summary'):
-            story.append(Paragraph("Summary", styles['SectionTitleRight']))
-            story.append(Paragraph(data['summary'], styles['BodyTextRight']))
-            story.append(Spacer(1, 0.2 * inch))
+            yield para("Summary", styles['SectionTitleRight'])
+            yield para(data['summary'], styles['BodyTextRight'])
+            yield Spacer(1, 0.2 * inch)
 
         experiences = data.get('experiences', [])
         if experiences:
-            story.append(Paragraph("Experience", styles['SectionTitleRight']))
+            yield para("Experience", styles['SectionTitleRight'])
             for exp in experiences:
                 if exp.get('title'):
-                    story.append(Paragraph(exp['title'], styles['JobTitleRight']))
+                    yield para(exp['title'], styles['JobTitleRight'])
                 if exp.get('company') or exp.get('dates'):
                     company_date_line = []
                     if exp.get('company'): company_date_line.append(exp['company'])
                     if exp.get('dates'): company_date_line.append(exp['dates'])
-                    story.append(Paragraph(" | ".join(company_date_line), styles['CompanyDateRight']))
+                    yield para(" | ".join(company_date_line), styles['CompanyDateRight'])
 
                 if exp.get('description'):
                     desc_lines = exp['description'].split('\n')
+                    desc_items = []
                     for line in desc_lines:
                         line = line.strip()
                         if line.startswith(('-', '*', '•')):
-                            story.append(Paragraph(line, styles['BulletRight'], bulletText=line[0]))
+                            desc_items.append((line, styles['BulletRight'], line[0]))
                         elif line:
-                            story.append(Paragraph(line, styles['BodyTextRightIndented']))
-                story.append(Spacer(1, 0.15 * inch))
-    return story
+                            desc_items.append((line, styles['BodyTextRightIndented'], None))
+                    yield from bullet_list(desc_items)
+                yield Spacer(1, 0.15 * inch)
 
 class TwoColumnDocTemplate(BaseDocTemplate):
     def __init__(self, filename, **kwargs):
@@ -131,14 +135,10 @@ def generate_pdf(data):
     styles.add(ParagraphStyle(name='BodyTextRightIndented', parent=styles['BodyTextRight'], leftIndent=15))
     styles.add(ParagraphStyle(name='BulletRight', parent=styles['BodyTextRight'], bulletIndent=10, leftIndent=20, firstLineIndent=0, spaceAfter=2))
 
-    side_story_content = build_frame_story(data, styles, 'left_col')
-    main_story_content = build_frame_story(data, styles, 'right_col')
+    # Each column is built as doc.build reaches it (see base.LazyStory)
+    final_platypus_story = itertools.chain(build_frame_story(data, styles, 'left_col'), [FrameBreak()],
+                                           build_frame_story(data, styles, 'right_col'))
 
-    final_platypus_story = []
-    final_platypus_story.extend(side_story_content)
-    final_platypus_story.append(FrameBreak())
-    final_platypus_story.extend(main_story_content)
-
-    doc.build(final_platypus_story)
+    build_document(doc, final_platypus_story)
     buffer.seek(0)
     return buffer
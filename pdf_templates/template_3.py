@@ -1,11 +1,24 @@
 import io
 from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, HRFlowable, Frame, PageTemplate, Table, TableStyle
+from reportlab.platypus import SimpleDocTemplate, Spacer, HRFlowable, Frame, PageTemplate
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.colors import HexColor, gray, white
 from reportlab.lib.enums import TA_JUSTIFY, TA_LEFT, TA_CENTER
 from reportlab.lib.colors import HexColor, gray, white, black  # Import black
+from pdf_templates.base import build_document
+from pdf_templates.flowables import bullet_list, para
+from pdf_templates.tables import CompiledTableStyle, table
+
+LANGUAGE_TABLE_STYLE = CompiledTableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), HexColor("#333333")),
+    ('TEXTCOLOR', (0, 0), (-1, 0), white),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), white),  # Background color for data cells
+    ('GRID', (0, 0), (-1, -1), 1, black)
+])
 
 
 def generate_pdf(data):
@@ -106,7 +119,7 @@ def generate_pdf(data):
     header_content = []
 
     if data.get('full_name'):
-        header_content.append(Paragraph(data['full_name'].upper(), styles['NameHeader']))
+        header_content.append(para(data['full_name'].upper(), styles['NameHeader']))
 
     contact_info = []
     if data.get('email'): contact_info.append(data['email'])
@@ -117,7 +130,7 @@ def generate_pdf(data):
     if data.get('address'): contact_info.append(data['address']) # Ensure you handle multiline addresses well
 
     if contact_info:
-        header_content.append(Paragraph(" | ".join(contact_info), styles['ContactHeader']))
+        header_content.append(para(" | ".join(contact_info), styles['ContactHeader']))
 
     header_content.append(HRFlowable(width="100%", thickness=0.5, color=gray, spaceBefore=0.1 * inch,
                                    spaceAfter=0.1 * inch))
@@ -154,17 +167,17 @@ def generate_pdf(data):
 
           if personal_details_list:
               col_title = "col1" if current_column == 'col1' else "col2"
-              add_to_column(Paragraph("Personal Details", styles['SectionTitle']),col_title)
+              add_to_column(para("Personal Details", styles['SectionTitle']),col_title)
               for detail in personal_details_list:
-                  add_to_column(Paragraph(detail, styles['PersonalDetails']), col_title)
+                  add_to_column(para(detail, styles['PersonalDetails']), col_title)
               add_to_column(Spacer(1, 0.1 * inch), col_title)
 
       if section_key == 'summary':
           if data.get('summary'):
               col_title = "col1" if current_column == 'col1' else "col2"
 
-              add_to_column(Paragraph("Summary", styles['SectionTitle']),col_title)
-              add_to_column(Paragraph(data['summary'], styles['Justified']), col_title)
+              add_to_column(para("Summary", styles['SectionTitle']),col_title)
+              add_to_column(para(data['summary'], styles['Justified']), col_title)
               add_to_column(Spacer(1, 0.1 * inch), col_title)
 
       elif section_key == 'experience':
@@ -172,19 +185,22 @@ def generate_pdf(data):
           if experiences:
               col_title = "col1" if current_column == 'col1' else "col2"
 
-              add_to_column(Paragraph("Professional Experience", styles['SectionTitle']),col_title)
+              add_to_column(para("Professional Experience", styles['SectionTitle']),col_title)
               for exp in experiences:
                   if exp.get('title') and exp.get('company'):
-                      add_to_column(Paragraph(exp['title'], styles['JobTitle']), col_title)
-                      add_to_column(Paragraph(f"{exp['company']} | {exp.get('start_date', 'N/A')} - {exp.get('end_date', 'Present')}", styles['CompanyDate']), col_title)
+                      add_to_column(para(exp['title'], styles['JobTitle']), col_title)
+                      add_to_column(para(f"{exp['company']} | {exp.get('start_date', 'N/A')} - {exp.get('end_date', 'Present')}", styles['CompanyDate']), col_title)
                       if exp.get('description'):
                           desc_lines = exp['description'].split('\n')
+                          desc_items = []
                           for line in desc_lines:
                               line = line.strip()
                               if line.startswith(('-', '*', '•')):
-                                  add_to_column(Paragraph(line, styles['BulletPoint'], bulletText=line[0]), col_title)
+                                  desc_items.append((line, styles['BulletPoint'], line[0]))
                               elif line:
-                                  add_to_column(Paragraph(line, styles['Justified']), col_title)
+                                  desc_items.append((line, styles['Justified'], None))
+                          for flowable in bullet_list(desc_items):
+                              add_to_column(flowable, col_title)
                       add_to_column(Spacer(1, 0.15 * inch), col_title)
 
       elif section_key == 'education':
@@ -192,40 +208,40 @@ def generate_pdf(data):
           if education_entries:
               col_title = "col1" if current_column == 'col1' else "col2"
 
-              add_to_column(Paragraph("Education", styles['SectionTitle']),col_title)
+              add_to_column(para("Education", styles['SectionTitle']),col_title)
               for edu in education_entries:
                   if edu.get('degree') and edu.get('institution'):
-                      add_to_column(Paragraph(edu['degree'], styles['JobTitle']), col_title)
-                      add_to_column(Paragraph(f"{edu['institution']} | {edu.get('start_date', 'N/A')} - {edu.get('end_date', 'Present')}", styles['CompanyDate']), col_title)
+                      add_to_column(para(edu['degree'], styles['JobTitle']), col_title)
+                      add_to_column(para(f"{edu['institution']} | {edu.get('start_date', 'N/A')} - {edu.get('end_date', 'Present')}", styles['CompanyDate']), col_title)
                       if edu.get('edu_details'):
-                          add_to_column(Paragraph(edu['edu_details'], styles['Justified']), col_title)
+                          add_to_column(para(edu['edu_details'], styles['Justified']), col_title)
                       add_to_column(Spacer(1, 0.1 * inch), col_title)
 
       elif section_key == 'skills':
           if data.get('skills'):
               col_title = "col1" if current_column == 'col1' else "col2"
 
-              add_to_column(Paragraph("Skills", styles['SectionTitle']),col_title)
-              add_to_column(Paragraph(data['skills'], styles['Justified']), col_title)
+              add_to_column(para("Skills", styles['SectionTitle']),col_title)
+              add_to_column(para(data['skills'], styles['Justified']), col_title)
               add_to_column(Spacer(1, 0.1 * inch), col_title)
 
       elif section_key == 'hobbies':
           if data.get('hobbies'):
               col_title = "col1" if current_column == 'col1' else "col2"
-              add_to_column(Paragraph("Hobbies", styles['SectionTitle']),col_title)
-              add_to_column(Paragraph(data['hobbies'], styles['Justified']),col_title)
+              add_to_column(para("Hobbies", styles['SectionTitle']),col_title)
+              add_to_column(para(data['hobbies'], styles['Justified']),col_title)
               add_to_column(Spacer(1, 0.1 * inch), col_title)
 
       elif section_key == 'achievements':
           key_achievements = data.get('key_achievements', [])
           if key_achievements:
               col_title = "col1" if current_column == 'col1' else "col2"
-              add_to_column(Paragraph("Key Achievements", styles['SectionTitle']),col_title)
+              add_to_column(para("Key Achievements", styles['SectionTitle']),col_title)
               for achievement in key_achievements:
                   if achievement.get('title'):
-                      add_to_column(Paragraph(achievement['title'], styles['JobTitle']),col_title)
+                      add_to_column(para(achievement['title'], styles['JobTitle']),col_title)
                       if achievement.get('description'):
-                          add_to_column(Paragraph(achievement['description'], styles['NormalIndented']),col_title)
+                          add_to_column(para(achievement['description'], styles['NormalIndented']),col_title)
                       add_to_column(Spacer(1, 0.1 * inch),col_title)
 
       elif section_key == 'courses':
@@ -233,19 +249,19 @@ def generate_pdf(data):
           if courses:
               col_title = "col1" if current_column == 'col1' else "col2"
 
-              add_to_column(Paragraph("Courses", styles['SectionTitle']),col_title)
+              add_to_column(para("Courses", styles['SectionTitle']),col_title)
               for course in courses:
                   if course.get('title'):
-                      add_to_column(Paragraph(course['title'], styles['JobTitle']),col_title)
+                      add_to_column(para(course['title'], styles['JobTitle']),col_title)
                       if course.get('description'):
-                          add_to_column(Paragraph(course['description'], styles['NormalIndented']), col_title)
+                          add_to_column(para(course['description'], styles['NormalIndented']), col_title)
                       add_to_column(Spacer(1, 0.1 * inch), col_title)
 
       elif section_key == 'languages':
           languages = data.get('languages', [])
           if languages:
               col_title = "col1" if current_column == 'col1' else "col2"
-              add_to_column(Paragraph("Languages", styles['SectionTitle']),col_title)
+              add_to_column(para("Languages", styles['SectionTitle']),col_title)
               language_data = [["Language", "Reading", "Writing", "Conversation"]]  # Header
               for lang in languages:
                   language_data.append([
@@ -255,16 +271,7 @@ def generate_pdf(data):
                       lang.get('level', 'N/A')
                   ])
 
-              language_table = Table(language_data)
-              language_table.setStyle(TableStyle([
-                  ('BACKGROUND', (0, 0), (-1, 0), HexColor("#333333")),
-                  ('TEXTCOLOR', (0, 0), (-1, 0), white),
-                  ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                  ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                  ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                  ('BACKGROUND', (0, 1), (-1, -1), white),  # Background color for data cells
-                  ('GRID', (0, 0), (-1, -1), 1, black)
-              ]))
+              language_table = table(language_data, LANGUAGE_TABLE_STYLE)
               add_to_column(language_table, col_title)
               add_to_column(Spacer(1, 0.1 * inch), col_title)
 
@@ -272,41 +279,41 @@ def generate_pdf(data):
           additional_info = data.get('additional_info', [])
           if additional_info:
               col_title = "col1" if current_column == 'col1' else "col2"
-              add_to_column(Paragraph("Additional Info", styles['SectionTitle']),col_title)
+              add_to_column(para("Additional Info", styles['SectionTitle']),col_title)
               for info in additional_info:
                   if info.get('title'):
-                      add_to_column(Paragraph(info['title'], styles['JobTitle']),col_title)
+                      add_to_column(para(info['title'], styles['JobTitle']),col_title)
                       if info.get('description'):
-                          add_to_column(Paragraph(info['description'], styles['NormalIndented']),col_title)
+                          add_to_column(para(info['description'], styles['NormalIndented']),col_title)
                       add_to_column(Spacer(1, 0.1 * inch), col_title)
 
       elif section_key == 'references':
           references = data.get('references', [])
           if references:
               col_title = "col1" if current_column == 'col1' else "col2"
-              add_to_column(Paragraph("References", styles['SectionTitle']),col_title)
+              add_to_column(para("References", styles['SectionTitle']),col_title)
               for ref in references:
                   if ref.get('name'):
-                      add_to_column(Paragraph(ref['name'], styles['JobTitle']),col_title)
-                      add_to_column(Paragraph(f"{ref.get('title', 'N/A')}", styles['CompanyDate']),col_title)
+                      add_to_column(para(ref['name'], styles['JobTitle']),col_title)
+                      add_to_column(para(f"{ref.get('title', 'N/A')}", styles['CompanyDate']),col_title)
                       if ref.get('phone'):
-                          add_to_column(Paragraph(f"Phone: {ref['phone']}", styles['NormalIndented']),col_title)
+                          add_to_column(para(f"Phone: {ref['phone']}", styles['NormalIndented']),col_title)
                       if ref.get('description'):
-                          add_to_column(Paragraph(ref['description'], styles['NormalIndented']), col_title)
+                          add_to_column(para(ref['description'], styles['NormalIndented']), col_title)
                       add_to_column(Spacer(1, 0.1 * inch), col_title)
 
       elif section_key == 'projects':
           projects = data.get('projects', [])
           if projects:
               col_title = "col1" if current_column == 'col1' else "col2"
-              add_to_column(Paragraph("Projects", styles['SectionTitle']),col_title)
+              add_to_column(para("Projects", styles['SectionTitle']),col_title)
               for project in projects:
                   if project.get('title'):
-                      add_to_column(Paragraph(project['title'], styles['JobTitle']),col_title)
+                      add_to_column(para(project['title'], styles['JobTitle']),col_title)
                       if project.get('description'):
-                          add_to_column(Paragraph(project['description'], styles['NormalIndented']),col_title)
+                          add_to_column(para(project['description'], styles['NormalIndented']),col_title)
                       if project.get('dates'):
-                          add_to_column(Paragraph(f"Dates: {project['dates']}", styles['CompanyDate']), col_title)
+                          add_to_column(para(f"Dates: {project['dates']}", styles['CompanyDate']), col_title)
                   add_to_column(Spacer(1, 0.1 * inch), col_title)
       # Toggle to the next column, making it go col1, col2 ,col1, col2
       current_column = 'col2' if current_column == 'col1' else 'col1'
@@ -314,60 +321,61 @@ def generate_pdf(data):
     story.extend(col1_elements)
     story.extend(col2_elements)
     # Build the document
-    doc.build(story)
+    build_document(doc, story)
     buffer.seek(0)
     return buffer
 
 # Example usage
-data = {
-    'full_name': 'Ellen Johnson',
-    'title_subtitle': 'Marketing Manager',  # Added title_subtitle
-    'location': 'Los Angeles, CA',  # Added location
-    'nationality': 'American',  # Added nationality
-    'birth_date': '1990-01-01',  # Added birth_date
-    'gender': 'Female',  # Added gender
-    'email': 'help@enhancv.com',
-    'linkedin': 'linkedin.com',
-    'summary': 'Motivated Digital Marketing Manager with over 3 years of experience in driving user acquisition and growth through strategic paid campaigns. Expert in data analysis, creative optimization, and cross-functional collaboration to achieve business objectives. Proven track record of scaling campaigns and enhancing ROI.',
-    'experiences': [
-        {
-            'title': 'Senior Digital Marketing Specialist',
-            'company': 'Tech Innovate',
-            'start_date': '01/2022',
-            'end_date': 'Present',
-            'description': '- Led the development and execution of comprehensive digital marketing campaigns across Meta, Google, and TikTok, increasing user acquisition by 45% within 12 months.\n- Managed a $500K quarterly budget for paid acquisition channels, optimizing spend for a 30% improvement in ROAS.\n- Implemented advanced targeting and retargeting strategies that reduced CPA by 20%, while increasing conversion rates by 15%.'
-        },
-        # Add more experiences as needed
-    ],
-    'education_entries': [
-        {
-            'degree': 'Master of Science in Marketing Analytics',
-            'institution': 'University of California, Berkeley',
-            'start_date': '01/2015',
-            'end_date': '01/2017',
-            'edu_details': 'Relevant coursework in strategic finance and operations management.'
-        },
-        # Add more education entries as needed
-    ],
-    'skills': 'Data Analysis, Paid Acquisition, Retargeting, ROAS Optimization, Cross-Functional Collaboration, Google Analytics, Looker, Appsflyer, Meta Advertising, Google Ads, TikTok Ads, Snapchat Ads, SQL',
-    'hobbies': 'Reading, Hiking, Photography',
-    'languages': [
-        {'name': 'English', 'reading': 'Fluent', 'writing': 'Advanced', 'level': 'Fluent'},
-        {'name': 'Spanish', 'reading': 'Intermediate', 'writing': 'Basic', 'level': 'Conversational'}
-    ],
-    'key_achievements': [
-            {'title': 'Increased Sales by 20%', 'description': 'Successfully increased sales figures by 20% within the first quarter.'},
-            {'title': 'Improved Customer Satisfaction', 'description': 'Enhanced customer satisfaction through strategic service improvements.'},
-            {'title': 'Reduced Operational Costs', 'description': 'Implemented cost-saving measures that significantly reduced operational expenses.'}
+if __name__ == '__main__':
+    data = {
+        'full_name': 'Ellen Johnson',
+        'title_subtitle': 'Marketing Manager',  # Added title_subtitle
+        'location': 'Los Angeles, CA',  # Added location
+        'nationality': 'American',  # Added nationality
+        'birth_date': '1990-01-01',  # Added birth_date
+        'gender': 'Female',  # Added gender
+        'email': 'help@enhancv.com',
+        'linkedin': 'linkedin.com',
+        'summary': 'Motivated Digital Marketing Manager with over 3 years of experience in driving user acquisition and growth through strategic paid campaigns. Expert in data analysis, creative optimization, and cross-functional collaboration to achieve business objectives. Proven track record of scaling campaigns and enhancing ROI.',
+        'experiences': [
+            {
+                'title': 'Senior Digital Marketing Specialist',
+                'company': 'Tech Innovate',
+                'start_date': '01/2022',
+                'end_date': 'Present',
+                'description': '- Led the development and execution of comprehensive digital marketing campaigns across Meta, Google, and TikTok, increasing user acquisition by 45% within 12 months.\n- Managed a $500K quarterly budget for paid acquisition channels, optimizing spend for a 30% improvement in ROAS.\n- Implemented advanced targeting and retargeting strategies that reduced CPA by 20%, while increasing conversion rates by 15%.'
+            },
+            # Add more experiences as needed
         ],
-    'courses': [
-            {'title': 'Marketing Strategy', 'description': 'Advanced marketing strategy course by renowned industry experts.'},
-            {'title': 'Financial Analysis', 'description': 'Comprehensive course on financial analysis and investment strategies.'}
+        'education_entries': [
+            {
+                'degree': 'Master of Science in Marketing Analytics',
+                'institution': 'University of California, Berkeley',
+                'start_date': '01/2015',
+                'end_date': '01/2017',
+                'edu_details': 'Relevant coursework in strategic finance and operations management.'
+            },
+            # Add more education entries as needed
         ],
-}
-
-pdf_buffer = generate_pdf(data)
-
-# Save the PDF to a file
-with open('resume_a4.pdf', 'wb') as f:
-    f.write(pdf_buffer.read())
\ No newline at end of file
+        'skills': 'Data Analysis, Paid Acquisition, Retargeting, ROAS Optimization, Cross-Functional Collaboration, Google Analytics, Looker, Appsflyer, Meta Advertising, Google Ads, TikTok Ads, Snapchat Ads, SQL',
+        'hobbies': 'Reading, Hiking, Photography',
+        'languages': [
+            {'name': 'English', 'reading': 'Fluent', 'writing': 'Advanced', 'level': 'Fluent'},
+            {'name': 'Spanish', 'reading': 'Intermediate', 'writing': 'Basic', 'level': 'Conversational'}
+        ],
+        'key_achievements': [
+                {'title': 'Increased Sales by 20%', 'description': 'Successfully increased sales figures by 20% within the first quarter.'},
+                {'title': 'Improved Customer Satisfaction', 'description': 'Enhanced customer satisfaction through strategic service improvements.'},
+                {'title': 'Reduced Operational Costs', 'description': 'Implemented cost-saving measures that significantly reduced operational expenses.'}
+            ],
+        'courses': [
+                {'title': 'Marketing Strategy', 'description': 'Advanced marketing strategy course by renowned industry experts.'},
+                {'title': 'Financial Analysis', 'description': 'Comprehensive course on financial analysis and investment strategies.'}
+            ],
+    }
+
+    pdf_buffer = generate_pdf(data)
+
+    # Save the PDF to a file
+    with open('resume_a4.pdf', 'wb') as f:
+        f.write(pdf_buffer.read())
\ No newline at end of file
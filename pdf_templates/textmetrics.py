@@ -0,0 +1,75 @@
+# pdf_templates/textmetrics.py
+# Per-process cache of string widths for paragraph wrapping.
+#
+# Breaking a Paragraph into lines measures every word (and the space between
+# words) with pdfmetrics.stringWidth, which walks the string character by
+# character in Python. Resumes repeat the same words in the same few fonts and
+# sizes, and justified or two-column text is wrapped more than once, so most of
+# those measurements have been made before. The cache maps (text, font, size,
+# encoding) to the width, with a bounded LRU (functools.lru_cache).
+#
+# ReportLab's paragraph and table modules imported stringWidth by name, so
+# install() rebinds that name in both (auto-sized table columns are measured cell
+# by cell). That changes ReportLab for the whole process, so importing this module
+# doesn't do it: create_app and the render pool initializer call install(), and
+# every paragraph or table laid out in the process afterwards measures through the
+# cache (the widths are the ones pdfmetrics.stringWidth returns). TimedCanvas
+# measures through it either way. Long strings are whole lines rather than words
+# and rarely repeat; they are measured directly and never enter the cache.
+#
+# Like the fragment cache, it is filled in whichever process renders: create_app
+# sets its size before the render processes fork, and warm-up renders leave
+# common words already measured in every process forked after them.
+import functools
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.platypus import paragraph, tables
+
+import metrics
+
+DEFAULT_MAX_ENTRIES = 32768
+MAX_CACHED_CHARS = 64
+
+_measure = pdfmetrics.stringWidth
+
+
+class WidthCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.configure(max_entries)
+
+    def configure(self, max_entries):
+        """Sets the number of widths kept (0 disables the cache) and drops the current entries."""
+        self.max_entries = max_entries
+        self._cached = functools.lru_cache(maxsize=max(max_entries, 0))(_measure)
+        self._published_hits = 0
+        self._published_misses = 0
+
+    def string_width(self, text, fontName, fontSize, encoding='utf8'):
+        """Drop-in replacement for pdfmetrics.stringWidth."""
+        if self.max_entries <= 0 or len(text) > MAX_CACHED_CHARS:
+            return _measure(text, fontName, fontSize, encoding)
+        return self._cached(text, fontName, fontSize, encoding)
+
+    def info(self):
+        """(hits, misses, current entries) since the cache was last configured."""
+        info = self._cached.cache_info()
+        return info.hits, info.misses, info.currsize
+
+    def publish_metrics(self):
+        """Adds the hits and misses since the last call to the cache metrics (cache="text_width")."""
+        hits, misses, _ = self.info()
+        if hits > self._published_hits:
+            metrics.CACHE_HITS.inc(hits - self._published_hits, cache='text_width')
+        if misses > self._published_misses:
+            metrics.CACHE_MISSES.inc(misses - self._published_misses, cache='text_width')
+        self._published_hits, self._published_misses = hits, misses
+
+
+width_cache = WidthCache()
+string_width = width_cache.string_width
+
+
+def install():
+    """Makes ReportLab's paragraph and table layout in this process measure text through the width cache."""
+    paragraph.stringWidth = string_width
+    tables.stringWidth = string_width
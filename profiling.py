@@ -0,0 +1,144 @@
+# profiling.py
+# On-demand profiling of a single template render, used by the admin endpoint and
+# the `flask profile-template` command. Each request runs the generator twice over:
+# once under cProfile (exact call counts, pstats output) and once under a small
+# stack sampler (collapsed stacks for flamegraph.pl / speedscope). Time is also
+# attributed to ReportLab internals vs our own template code vs everything else.
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+import pdf_templates
+from rendering import render_pdf
+
+REPORTLAB_DIR = os.sep + 'reportlab' + os.sep
+TEMPLATES_DIR = os.path.dirname(os.path.abspath(pdf_templates.__file__))
+
+
+def classify_file(filename):
+    """Buckets a code location as 'reportlab', 'templates' (our generators) or 'other'."""
+    if REPORTLAB_DIR in filename:
+        return 'reportlab'
+    if os.path.abspath(filename).startswith(TEMPLATES_DIR):
+        return 'templates'
+    return 'other'
+
+
+def _frame_label(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread at a fixed interval and counts identical stacks.
+    Stacks are cut at `root_code` so web-server/CLI frames above the render don't show up.
+    """
+    def __init__(self, thread_id, interval=0.001, root_code=None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root_code = root_code
+        self.stacks = Counter()
+        self.leaf_origins = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            leaf_origin = classify_file(frame.f_code.co_filename)
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                if frame.f_code is self.root_code:
+                    break
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(labels))] += 1
+            self.leaf_origins[leaf_origin] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self):
+        """Returns the samples in Brendan Gregg's collapsed-stack format."""
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + '\n'
+
+
+class ProfileReport:
+    def __init__(self, template_id, repeat, stats, sampler, wall_seconds):
+        self.template_id = template_id
+        self.repeat = repeat
+        self.stats = stats
+        self.sampler = sampler
+        self.wall_seconds = wall_seconds
+
+    def deterministic_attribution(self):
+        """Own time (tottime) per origin, from the cProfile run."""
+        totals = Counter()
+        for (filename, _, _), (_, _, tottime, _, _) in self.stats.stats.items():
+            totals[classify_file(filename)] += tottime
+        return totals
+
+    def pstats_text(self, limit=40):
+        out = io.StringIO()
+        pstats.Stats(self.stats, stream=out).sort_stats('cumulative').print_stats(limit)
+        return out.getvalue()
+
+    def collapsed(self):
+        return self.sampler.collapsed()
+
+    def summary_text(self):
+        lines = [f"Profile of {self.template_id}: {self.repeat} render(s) per profiler, "
+                 f"{self.wall_seconds * 1000:.1f} ms wall time under cProfile", ""]
+
+        deterministic = self.deterministic_attribution()
+        total = sum(deterministic.values()) or 1.0
+        lines.append("Own time by origin (cProfile tottime):")
+        for origin in ('reportlab', 'templates', 'other'):
+            lines.append(f"  {origin:<10} {deterministic[origin] * 1000:9.1f} ms  {deterministic[origin] / total:6.1%}")
+
+        samples = sum(self.sampler.leaf_origins.values()) or 1
+        lines.append("")
+        lines.append(f"Leaf frames by origin (sampling, {sum(self.sampler.leaf_origins.values())} samples):")
+        for origin in ('reportlab', 'templates', 'other'):
+            lines.append(f"  {origin:<10} {self.sampler.leaf_origins[origin]:9d}     {self.sampler.leaf_origins[origin] / samples:6.1%}")
+        return '\n'.join(lines) + '\n'
+
+    def full_text(self):
+        return (self.summary_text()
+                + "\n== pstats (sorted by cumulative time) ==\n" + self.pstats_text()
+                + "\n== collapsed stacks ==\n" + self.collapsed())
+
+
+def profile_render(template_id, generator, resume_data, repeat=1, sample_interval=0.001):
+    """Renders `repeat` times under cProfile and `repeat` times under the stack sampler."""
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        profiler.runcall(render_pdf, generator, resume_data)
+    wall_seconds = time.perf_counter() - start
+    profiler.create_stats()
+
+    # The render thread only gives up the GIL every switch interval; shorten it so the
+    # sampler actually gets to run at roughly the requested rate.
+    previous_switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(min(previous_switch_interval, sample_interval))
+    try:
+        with StackSampler(threading.get_ident(), interval=sample_interval, root_code=render_pdf.__code__) as sampler:
+            for _ in range(repeat):
+                render_pdf(generator, resume_data)
+    finally:
+        sys.setswitchinterval(previous_switch_interval)
+
+    return ProfileReport(template_id, repeat, profiler, sampler, wall_seconds)
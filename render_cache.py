@@ -0,0 +1,361 @@
+# render_cache.py
+# Cache of finished PDFs, keyed only on the resume fields a template actually reads.
+#
+# Renders run on a FieldTrackingDict, which records every top-level field the
+# generator looks at (including fields it checks and finds missing). For each
+# template implementation (fingerprint) the cache keeps the union of fields seen
+# over all its renders, and the cache key is the fingerprint plus the values of
+# exactly those fields. Editing a field a template never reads (hobbies, for a
+# template without a hobbies section) therefore still hits.
+#
+# This is correct as long as a generator's output depends only on the values it
+# reads: two resumes that agree on every field read by one render produce the
+# same PDF. Until a template has rendered once, its fields are unknown and
+# nothing is cached for it.
+#
+# Only top-level fields are tracked, deliberately: a template that reads one key
+# of one entry in `experiences` is keyed on the whole list, and editing any entry
+# misses. Every template that reads a list section shows nearly every key of each
+# entry, so per-path keys (experiences.0.title, ...) would seldom hit more often,
+# while wrapping each nested dict and list would make every read in a render
+# slower and pass wrapper objects on into the generators.
+#
+# Keys also carry the renderer fingerprint (pdf_templates.base.renderer_fingerprint:
+# the shared rendering code, ReportLab's version and invariant output), so PDFs made
+# before a deploy aren't served after it, and the modification time and size of
+# each file a `*_path` field names, so replacing a photo under the same path misses.
+#
+# Two stores share that keying:
+#   MemoryRenderCache: an LRU in the web worker's own memory.
+#   DiskRenderCache:   PDFs as content-addressed files under a directory shared by
+#                      every worker on the host, indexed in SQLite (WAL mode, so
+#                      readers never wait for a writer). Hits come back as open
+#                      files the web server can sendfile() without reading them
+#                      into Python.
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+from pdf_templates.base import renderer_fingerprint
+
+# Stands for "every field": a generator copied or iterated over the whole resume
+ALL_FIELDS = '*'
+_MISSING = '\x00missing'
+
+
+class FieldTrackingDict(dict):
+    """A dict that remembers which keys were read. Whole-dict operations count as reading every key."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields_read = set()
+
+    def __getitem__(self, key):
+        self.fields_read.add(key)
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.fields_read.add(key)
+        return super().get(key, default)
+
+    def __contains__(self, key):
+        self.fields_read.add(key)
+        return super().__contains__(key)
+
+    def setdefault(self, key, default=None):
+        self.fields_read.add(key)
+        return super().setdefault(key, default)
+
+    def pop(self, key, *default):
+        self.fields_read.add(key)
+        return super().pop(key, *default)
+
+    def _read_all(self):
+        self.fields_read.add(ALL_FIELDS)
+
+    # Overriding __iter__ also stops dict(d) / {**d} from copying through the C fast path unseen
+    def __iter__(self):
+        self._read_all()
+        return super().__iter__()
+
+    def keys(self):
+        self._read_all()
+        return super().keys()
+
+    def values(self):
+        self._read_all()
+        return super().values()
+
+    def items(self):
+        self._read_all()
+        return super().items()
+
+    def copy(self):
+        self._read_all()
+        return dict(super().items())
+
+    def __len__(self):
+        self._read_all()
+        return super().__len__()
+
+    def __reduce__(self):
+        return dict, (dict(super().items()),)
+
+
+def select_fields(resume_data, fields):
+    """The values of `fields` in `resume_data` (a marker for missing ones), or all of it if ALL_FIELDS is among them."""
+    if ALL_FIELDS in fields:
+        return resume_data.copy()
+    return {field: resume_data.get(field, _MISSING) for field in fields}
+
+
+def file_versions(selected):
+    """{field: [mtime, size] or None if there is no such file} for the `*_path` fields among `selected`."""
+    versions = {}
+    for field, value in selected.items():
+        if field.endswith('_path') and isinstance(value, str) and value:
+            try:
+                stat = os.stat(value)
+                versions[field] = [stat.st_mtime_ns, stat.st_size]
+            except OSError:
+                versions[field] = None
+    return versions
+
+
+class CachedPDF:
+    """A cache hit: the PDF as bytes, or as an open file (at `path`) of `size` bytes to stream from."""
+    __slots__ = ('file', 'path', 'size', '_pdf')
+
+    def __init__(self, pdf=None, file=None, path=None, size=None):
+        self._pdf = pdf
+        self.file = file
+        self.path = path
+        self.size = len(pdf) if pdf is not None else size
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+    @property
+    def pdf(self):
+        """The PDF bytes (reads and closes the file for disk hits)."""
+        if self._pdf is None:
+            with self.file:
+                self._pdf = self.file.read()
+        return self._pdf
+
+
+class _FieldKeyedCache:
+    """Keying shared by the stores: subclasses keep the field sets and the entries."""
+    name = 'render'
+
+    def learn_fields(self, fingerprint, fields_read):
+        """Adds the fields one render read to the template's field set."""
+        raise NotImplementedError
+
+    def fields_for(self, fingerprint):
+        raise NotImplementedError
+
+    def key(self, fingerprint, resume_data, profile):
+        """Cache key for rendering `resume_data` with a template and render profile, or None if its fields aren't known yet."""
+        fields = self.fields_for(fingerprint)
+        if fields is None:
+            return None
+        selected = select_fields(resume_data, fields)
+        encoded = json.dumps([fingerprint, renderer_fingerprint(), profile, sorted(fields), selected, file_versions(selected)],
+                             sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _hit(self, size):
+        metrics.CACHE_HITS.inc(cache=self.name)
+        metrics.CACHE_BYTES_SERVED.inc(size, cache=self.name)
+
+    def _miss(self):
+        metrics.CACHE_MISSES.inc(cache=self.name)
+
+
+class MemoryRenderCache(_FieldKeyedCache):
+    """In-process LRU of PDFs, bounded by their total size."""
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._fields = {} # fingerprint -> set of fields read by any render so far
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def learn_fields(self, fingerprint, fields_read):
+        if fields_read is None:
+            return
+        with self._lock:
+            self._fields.setdefault(fingerprint, set()).update(fields_read)
+
+    def fields_for(self, fingerprint):
+        with self._lock:
+            fields = self._fields.get(fingerprint)
+            return frozenset(fields) if fields is not None else None
+
+    def get(self, key):
+        """Returns a CachedPDF or None."""
+        if key is None:
+            return None
+        with self._lock:
+            pdf = self._entries.get(key)
+            if pdf is not None:
+                self._entries.move_to_end(key)
+        if pdf is None:
+            self._miss()
+            return None
+        self._hit(len(pdf))
+        return CachedPDF(pdf=pdf)
+
+    def put(self, key, pdf):
+        size = len(pdf)
+        if key is None or size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = pdf
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                metrics.CACHE_EVICTIONS.inc(cache=self.name)
+        metrics.CACHE_BYTES_STORED.inc(size, cache=self.name)
+
+
+class DiskRenderCache(_FieldKeyedCache):
+    """
+    PDFs stored once per content hash under `directory`/objects, with an SQLite index mapping
+    cache keys to them. Every worker on the host opens the same index, so a PDF rendered by
+    one worker is a hit in all of them, and field sets learned by one are used by all.
+
+    The files' total size is kept under `max_bytes` by evicting the least recently used keys
+    (and any file no key points to any more) after each store. Last-use times are written at
+    most every `touch_interval` seconds per key, to keep hits read-only most of the time.
+    """
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS fields (
+            fingerprint TEXT NOT NULL,
+            field TEXT NOT NULL,
+            PRIMARY KEY (fingerprint, field)
+        );
+        CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY,
+            digest TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            last_used REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+        CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest);
+    """
+
+    def __init__(self, directory, max_bytes, touch_interval=60.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self._objects = os.path.join(directory, 'objects')
+        os.makedirs(self._objects, exist_ok=True)
+        self._local = threading.local()
+        with self._db() as db:
+            db.executescript(self._SCHEMA)
+
+    def _db(self):
+        """This thread's connection to the index (reopened after a fork: SQLite connections can't cross one)."""
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(os.path.join(self.directory, 'index.sqlite3'), timeout=10, isolation_level=None,
+                                 check_same_thread=False)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL') # A crash may lose the last few entries, never corrupt the index
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    def _path(self, digest):
+        return os.path.join(self._objects, digest[:2], digest + '.pdf')
+
+    def learn_fields(self, fingerprint, fields_read):
+        if not fields_read:
+            return
+        self._db().executemany('INSERT OR IGNORE INTO fields (fingerprint, field) VALUES (?, ?)',
+                               [(fingerprint, field) for field in fields_read])
+
+    def fields_for(self, fingerprint):
+        rows = self._db().execute('SELECT field FROM fields WHERE fingerprint = ?', (fingerprint,)).fetchall()
+        return frozenset(field for field, in rows) if rows else None
+
+    def get(self, key):
+        """Returns a CachedPDF holding an open file, or None."""
+        if key is None:
+            return None
+        db = self._db()
+        row = db.execute('SELECT digest, size, last_used FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self._miss()
+            return None
+        digest, size, last_used = row
+        path = self._path(digest)
+        try:
+            # Once open, the file stays readable even if another worker evicts it meanwhile
+            file = open(path, 'rb')
+        except FileNotFoundError:
+            db.execute('DELETE FROM entries WHERE key = ?', (key,))
+            self._miss()
+            return None
+        now = time.time()
+        if now - last_used > self.touch_interval:
+            db.execute('UPDATE entries SET last_used = ? WHERE key = ?', (now, key))
+        self._hit(size)
+        return CachedPDF(file=file, path=path, size=size)
+
+    def put(self, key, pdf):
+        size = len(pdf)
+        if key is None or size > self.max_bytes:
+            return
+        digest = hashlib.sha256(pdf).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Written under a temp name and renamed, so readers only ever open complete files
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(pdf)
+            os.replace(tmp_path, path)
+        self._db().execute('INSERT OR REPLACE INTO entries (key, digest, size, last_used) VALUES (?, ?, ?, ?)',
+                           (key, digest, size, time.time()))
+        metrics.CACHE_BYTES_STORED.inc(size, cache=self.name)
+        self._evict()
+
+    def _evict(self):
+        db = self._db()
+        (total,) = db.execute('SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM entries)').fetchone()
+        if total <= self.max_bytes:
+            return
+        db.execute('BEGIN IMMEDIATE') # One evicting worker at a time
+        try:
+            orphaned = set()
+            rows = db.execute('SELECT key, digest, size FROM entries ORDER BY last_used').fetchall()
+            for key, digest, size in rows:
+                if total <= self.max_bytes:
+                    break
+                db.execute('DELETE FROM entries WHERE key = ?', (key,))
+                metrics.CACHE_EVICTIONS.inc(cache=self.name)
+                if db.execute('SELECT 1 FROM entries WHERE digest = ? LIMIT 1', (digest,)).fetchone() is None:
+                    orphaned.add(digest)
+                    total -= size
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        for digest in orphaned:
+            try:
+                os.remove(self._path(digest))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,555 @@
+# rendering.py
+# Runs the PDF generators. Heavy renders go through a process pool so several
+# templates can be built at the same time without fighting over the GIL.
+import io
+import logging
+import math
+import os
+import random
+import resource
+import signal
+import threading
+import time
+import zipfile
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import memory
+import metrics
+import render_cache
+from pdf_templates import fragments, textmetrics
+from pdf_templates.base import (DEFAULT_PROFILE, collect_timings, render_data, render_profile, template_fingerprint,
+                                 template_source_lines)
+
+logger = logging.getLogger(__name__)
+
+# pdf: the finished document as bytes
+# timings: {stage name: seconds} - 'story' (building flowables), 'layout' (doc.build)
+#          and 'image' (image decoding/drawing, part of layout)
+# page_count: number of pages written
+# peak_alloc_bytes: tracemalloc peak during the render, only set for sampled renders
+# worker_pid / worker_rss_bytes: the render process and its resident size afterwards
+#                                (only set for renders that ran in the pool)
+# fields_read: top-level resume fields the generator read (pool renders only, see render_cache)
+RenderResult = namedtuple('RenderResult', ['pdf', 'timings', 'page_count', 'peak_alloc_bytes', 'worker_pid', 'worker_rss_bytes',
+                                           'fields_read'],
+                          defaults=(None, None, None, None))
+
+
+def render_pdf(generator, resume_data, profile=None):
+    """
+    Runs a single generator under a render profile (base.RENDER_PROFILES; None: the default)
+    and returns a RenderResult with the PDF bytes and stage timings.
+    """
+    with collect_timings() as timings, render_profile(profile), render_data(resume_data):
+        start = time.perf_counter()
+        pdf_buffer = generator(resume_data)
+        total = time.perf_counter() - start
+    textmetrics.width_cache.publish_metrics()
+    stages = {'story': max(total - timings.stages.get('layout', 0.0), 0.0)}
+    stages.update(timings.stages)
+    return RenderResult(pdf_buffer.getvalue(), stages, timings.page_count)
+
+
+# --- Render Limits ---
+# cpu_seconds: CPU time one render may use (RLIMIT_CPU soft limit -> SIGXCPU)
+# wall_seconds: elapsed time one render may take (ITIMER_REAL -> SIGALRM)
+# memory_bytes: address space ceiling of each render process (RLIMIT_AS -> MemoryError)
+# Any of them can be None for no limit.
+RenderLimits = namedtuple('RenderLimits', ['cpu_seconds', 'wall_seconds', 'memory_bytes'], defaults=(None, None, None))
+
+
+class RenderLimitExceeded(Exception):
+    """A render was stopped for exceeding one of its RenderLimits ('cpu', 'time' or 'memory')."""
+    def __init__(self, limit, detail=''):
+        super().__init__(limit, detail)
+        self.limit = limit
+        self.detail = detail
+
+    def __str__(self):
+        return f"render exceeded its {self.limit} limit{': ' + self.detail if self.detail else ''}"
+
+
+def _raise_cpu_limit(signum, frame):
+    raise RenderLimitExceeded('cpu')
+
+
+def _raise_time_limit(signum, frame):
+    raise RenderLimitExceeded('time')
+
+
+def _init_render_worker(memory_bytes):
+    """
+    Pool initializer: installs the limit signal handlers and the memory ceiling for this process,
+    starts its metric samples from zero (render processes publish their own, e.g. cache hits) and
+    routes ReportLab's text measuring through the width cache (textmetrics.install()).
+    """
+    metrics.registry.reset_local()
+    textmetrics.install()
+    signal.signal(signal.SIGXCPU, _raise_cpu_limit)
+    signal.signal(signal.SIGALRM, _raise_time_limit)
+    if memory_bytes:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, hard))
+
+
+def _cpu_seconds_used():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _render_in_worker(generator, resume_data, profile, trace_allocations, limits):
+    """Pool-side entry point: renders under `limits` and reports the worker's memory use alongside the result."""
+    # RLIMIT_CPU counts the whole life of the process, so the budget is set relative to what is used so far.
+    # Only the soft limit moves; an unprivileged process can never raise a hard limit back up.
+    _, cpu_hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if limits.cpu_seconds:
+        resource.setrlimit(resource.RLIMIT_CPU, (math.ceil(_cpu_seconds_used() + limits.cpu_seconds), cpu_hard))
+    if limits.wall_seconds:
+        # Keeps firing every half second after the deadline, in case a broad `except Exception`
+        # in a template swallows the first one (SIGXCPU likewise repeats every second)
+        signal.setitimer(signal.ITIMER_REAL, limits.wall_seconds, 0.5)
+    resume_data = render_cache.FieldTrackingDict(resume_data)
+    try:
+        if trace_allocations:
+            result, peak = memory.measure_peak_allocation(render_pdf, generator, resume_data, profile)
+            result = result._replace(peak_alloc_bytes=peak)
+        else:
+            result = render_pdf(generator, resume_data, profile)
+    except MemoryError:
+        raise RenderLimitExceeded('memory') from None
+    finally:
+        # Ignore the alarm first: a repeat firing between here and the disarm would otherwise raise
+        # inside this block and skip the cleanup below. Ignored signals aren't queued, so none is
+        # left pending for the next render either.
+        signal.signal(signal.SIGALRM, signal.SIG_IGN)
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, _raise_time_limit)
+        if limits.cpu_seconds:
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu_hard, cpu_hard))
+        metrics.registry.flush()
+    return result._replace(worker_pid=os.getpid(), worker_rss_bytes=memory.current_rss_bytes(),
+                           fields_read=frozenset(resume_data.fields_read))
+
+
+def format_server_timing(timings):
+    """Formats {stage: seconds} as a Server-Timing header value (durations in milliseconds)."""
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
+
+
+def record_render(template_id, result, extra_timings=None):
+    """Updates the render metrics and emits one structured log record describing a finished render."""
+    metrics.RENDER_SECONDS.observe(result.timings.get('story', 0.0) + result.timings.get('layout', 0.0), template=template_id)
+    metrics.RENDER_OUTPUT_BYTES.observe(len(result.pdf), template=template_id)
+    if result.peak_alloc_bytes is not None:
+        metrics.RENDER_PEAK_ALLOC_BYTES.observe(result.peak_alloc_bytes, template=template_id)
+
+    timings = dict(result.timings)
+    timings.update(extra_timings or {})
+    timings_ms = {name: round(seconds * 1000, 1) for name, seconds in timings.items()}
+    memory_fields = {name: getattr(result, name) for name in ('peak_alloc_bytes', 'worker_rss_bytes')
+                     if getattr(result, name) is not None}
+    logger.info(
+        "pdf rendered template_id=%s pages=%s bytes=%d %s",
+        template_id, result.page_count, len(result.pdf),
+        " ".join([f"{name}_ms={ms}" for name, ms in timings_ms.items()] + [f"{name}={value}" for name, value in memory_fields.items()]),
+        extra={'template_id': template_id, 'page_count': result.page_count,
+               'pdf_bytes': len(result.pdf), 'timings_ms': timings_ms, **memory_fields},
+    )
+
+
+def record_render_error(template_id, error=None):
+    metrics.RENDER_ERRORS.inc(template=template_id)
+    if isinstance(error, RenderLimitExceeded):
+        metrics.RENDER_LIMIT_EXCEEDED.inc(template=template_id, limit=error.limit)
+
+
+# --- Scheduling ---
+INTERACTIVE = 'interactive' # A user is waiting on this one PDF
+BATCH = 'batch'             # Bulk work (bundles); runs in capacity interactive renders leave free
+
+
+def _count_content(value):
+    """Returns (characters, list entries) over all strings and lists nested in `value`."""
+    if isinstance(value, str):
+        return len(value), 0
+    chars = entries = 0
+    if isinstance(value, dict):
+        items = value.values()
+    elif isinstance(value, (list, tuple)):
+        items = value
+        entries = len(value)
+    else:
+        return 0, 0
+    for item in items:
+        item_chars, item_entries = _count_content(item)
+        chars += item_chars
+        entries += item_entries
+    return chars, entries
+
+
+def estimate_render_cost(generator, resume_data):
+    """
+    Relative cost of a render (1.0 ~ a plain template with a short resume). It grows with
+    the amount of text and entries, a profile image to decode, and the size of the
+    template's code (template_13 has ~570 lines, template_4 ~200).
+    """
+    chars, entries = _count_content(resume_data)
+    image_path = resume_data.get('profile_image_path')
+    has_image = bool(image_path) and os.path.exists(image_path)
+    complexity = template_source_lines(generator) / 200
+    return complexity * (1 + chars / 4000 + entries / 20) + (1.0 if has_image else 0.0)
+
+
+class _RenderJob:
+    __slots__ = ('generator', 'resume_data', 'profile', 'lane', 'cost', 'submitted', 'virtual_start', 'future')
+
+    def __init__(self, generator, resume_data, profile, lane, cost, virtual_start):
+        self.generator = generator
+        self.resume_data = resume_data
+        self.profile = profile
+        self.lane = lane
+        self.cost = cost
+        self.submitted = time.monotonic()
+        self.virtual_start = virtual_start
+        self.future = Future()
+
+
+class RenderQueueFull(Exception):
+    """Raised by RenderExecutor.submit when the render queue is at its limit."""
+    def __init__(self, retry_after):
+        super().__init__(f"render queue full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class RenderExecutor:
+    """
+    Thin wrapper around a ProcessPoolExecutor used for PDF renders.
+    The pool is created lazily and re-created after a fork, so every
+    worker process of the web server gets its own set of render processes.
+
+    Render processes live for many renders and slowly grow (ReportLab keeps
+    image and font caches in module state). Each render reports the RSS of the
+    process that ran it; once one process has done `max_renders_per_worker`
+    renders or grown past `max_worker_rss_bytes`, the pool is recycled: new
+    renders go to a fresh pool while the old one finishes what it has queued.
+    A fraction `alloc_sample_rate` of renders also measures its peak allocation.
+
+    At most `max_pending` renders (running plus waiting) are accepted; beyond that
+    submit() raises RenderQueueFull instead of letting the backlog grow without bound.
+
+    Every render runs under `limits` (RenderLimits); one that exceeds them fails
+    with RenderLimitExceeded. A process that ran out of memory is recycled along
+    with its pool, as is a pool broken by a crashed process.
+
+    Renders wait in the executor, not in the pool, and are handed over only when a
+    pool process is free. The next one is the job with the earliest "virtual start":
+    its submit time, pushed back by `seconds_per_cost` per unit of estimated cost
+    (small renders overtake big ones) and by `batch_delay` for the batch lane. Since
+    the push-back is fixed when a job arrives, every job eventually comes first, so
+    neither big renders nor batch work can starve. Batch jobs also never occupy the
+    last free process, which stays reserved for interactive renders.
+
+    Finished PDFs go into `cache` (a render_cache.MemoryRenderCache or DiskRenderCache,
+    optional). Callers check cached() first; a hit needs neither a queue slot nor a
+    render process.
+    """
+    def __init__(self, max_workers=None, max_renders_per_worker=None, max_worker_rss_bytes=None, alloc_sample_rate=0.0,
+                 max_pending=None, limits=None, seconds_per_cost=0.5, batch_delay=5.0, cache=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache = cache
+        self.seconds_per_cost = seconds_per_cost
+        self.batch_delay = batch_delay
+        self.limits = limits or RenderLimits()
+        self.max_pending = max_pending or self.max_workers * 4
+        self.max_renders_per_worker = max_renders_per_worker
+        self.max_worker_rss_bytes = max_worker_rss_bytes
+        self.alloc_sample_rate = alloc_sample_rate
+        self._pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+        self._renders_by_worker = {}
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._avg_render_seconds = 1.0 # Moving average, used to suggest a Retry-After
+        self._waiting = []
+        self._running = {INTERACTIVE: 0, BATCH: 0}
+        self._schedule_lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_render_worker,
+                                                 initargs=(self.limits.memory_bytes,))
+                self._pool_pid = os.getpid()
+                self._renders_by_worker = {}
+            return self._pool
+
+    def available(self):
+        """How many more renders the queue accepts right now."""
+        with self._pending_lock:
+            return max(self.max_pending - self._pending, 0)
+
+    def retry_after(self):
+        """Seconds a rejected client should wait: roughly the time to drain the current queue."""
+        with self._pending_lock:
+            return max(1, math.ceil(self._pending / self.max_workers * self._avg_render_seconds))
+
+    def cached(self, generator, resume_data, profile=DEFAULT_PROFILE):
+        """Returns a render_cache.CachedPDF for this template, resume and profile, or None."""
+        if self.cache is None:
+            return None
+        return self.cache.get(self.cache.key(template_fingerprint(generator), resume_data, profile))
+
+    def submit(self, generator, resume_data, lane=INTERACTIVE, profile=DEFAULT_PROFILE):
+        """
+        Queues a render in `lane` (INTERACTIVE or BATCH) with the named render profile and returns
+        a Future resolving to a RenderResult. Raises RenderQueueFull at the limit.
+        """
+        with self._pending_lock:
+            full = self._pending >= self.max_pending
+            if not full:
+                self._pending += 1
+                metrics.RENDER_QUEUE_DEPTH.set(self._pending)
+        if full:
+            raise RenderQueueFull(self.retry_after())
+
+        cost = estimate_render_cost(generator, resume_data)
+        delay = cost * self.seconds_per_cost + (self.batch_delay if lane == BATCH else 0.0)
+        job = _RenderJob(generator, resume_data, profile, lane, cost, time.monotonic() + delay)
+        with self._schedule_lock:
+            self._waiting.append(job)
+        self._dispatch()
+        return job.future
+
+    def _next_job(self):
+        """Removes and returns the job to run next, or None if nothing may start now. Call with _schedule_lock held."""
+        if sum(self._running.values()) >= self.max_workers:
+            return None
+        batch_slots = max(self.max_workers - 1, 1)
+        candidates = [job for job in self._waiting if job.lane != BATCH or self._running[BATCH] < batch_slots]
+        if not candidates:
+            return None
+        job = min(candidates, key=lambda j: j.virtual_start)
+        self._waiting.remove(job)
+        return job
+
+    def _dispatch(self):
+        """Hands waiting jobs to the pool while it has free processes."""
+        while True:
+            with self._schedule_lock:
+                job = self._next_job()
+                if job is None:
+                    return
+                self._running[job.lane] += 1
+            if not job.future.set_running_or_notify_cancel():
+                self._finish(job) # Cancelled while waiting
+                continue
+            metrics.RENDER_QUEUE_WAIT_SECONDS.observe(time.monotonic() - job.submitted, lane=job.lane)
+            pool = None
+            try:
+                pool = self._get_pool()
+                trace_allocations = self.alloc_sample_rate > 0 and random.random() < self.alloc_sample_rate
+                pool_future = pool.submit(_render_in_worker, job.generator, job.resume_data, job.profile, trace_allocations, self.limits)
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    self._recycle(pool, 'broken')
+                job.future.set_exception(e)
+                self._finish(job)
+                continue
+            pool_future.add_done_callback(lambda f, job=job, pool=pool: self._on_done(pool, job, f))
+
+    def _finish(self, job):
+        with self._schedule_lock:
+            self._running[job.lane] -= 1
+        self._track_pending(-1)
+
+    def result_timeout(self):
+        """How long a caller should wait on a render future: the wall-clock limit plus time in the queue."""
+        if not self.limits.wall_seconds:
+            return None
+        return self.limits.wall_seconds * (1 + math.ceil(self.max_pending / self.max_workers))
+
+    def _on_done(self, pool, job, pool_future):
+        try:
+            self._after_render(pool, pool_future)
+            self._store(job, pool_future)
+        finally:
+            error = pool_future.exception()
+            if error is not None:
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(pool_future.result())
+            self._finish(job)
+            self._dispatch()
+
+    def _after_render(self, pool, future):
+        """Bookkeeping for a finished pool render: render time average, RSS and recycling."""
+        error = future.exception()
+        if error is not None:
+            if isinstance(error, BrokenProcessPool):
+                self._recycle(pool, 'broken')
+            elif isinstance(error, RenderLimitExceeded) and error.limit == 'memory':
+                self._recycle(pool, 'memory')
+            return
+        result = future.result()
+        render_seconds = result.timings.get('story', 0.0) + result.timings.get('layout', 0.0)
+        with self._pending_lock:
+            self._avg_render_seconds = 0.9 * self._avg_render_seconds + 0.1 * render_seconds
+        metrics.RENDER_WORKER_RSS_BYTES.set(result.worker_rss_bytes)
+        with self._pool_lock:
+            if pool is not self._pool:
+                return # Already recycled
+            renders = self._renders_by_worker.get(result.worker_pid, 0) + 1
+            self._renders_by_worker[result.worker_pid] = renders
+        if self.max_worker_rss_bytes and result.worker_rss_bytes > self.max_worker_rss_bytes:
+            self._recycle(pool, 'rss', f"worker_pid={result.worker_pid} rss_bytes={result.worker_rss_bytes}")
+        elif self.max_renders_per_worker and renders >= self.max_renders_per_worker:
+            self._recycle(pool, 'renders', f"worker_pid={result.worker_pid} renders={renders}")
+
+    def _store(self, job, future):
+        if self.cache is None or future.exception() is not None:
+            return
+        result = future.result()
+        fingerprint = template_fingerprint(job.generator)
+        self.cache.learn_fields(fingerprint, result.fields_read)
+        self.cache.put(self.cache.key(fingerprint, job.resume_data, job.profile), result.pdf)
+
+    def _recycle(self, pool, reason, detail=''):
+        """Sends new renders to a fresh pool. Renders queued on the old one still complete before it exits."""
+        with self._pool_lock:
+            if pool is None or pool is not self._pool:
+                return # Already recycled
+            self._pool = None
+            self._pool_pid = None
+        logger.info(f"recycling render pool reason={reason} {detail}".rstrip())
+        metrics.RENDER_WORKER_RECYCLES.inc(reason=reason)
+        pool.shutdown(wait=False)
+
+    def snapshot_worker(self, timeout=30):
+        """
+        Takes an allocation snapshot in one of the render processes and returns (pid, snapshot).
+        Tracing stays on in that process until the pool is recycled (see restart_pool()). It goes
+        straight to the pool, so it may wait behind renders already handed over, but takes no queue slot.
+        """
+        return self._get_pool().submit(memory.take_snapshot).result(timeout=timeout)
+
+    def restart_pool(self, reason):
+        """Replaces the render processes, e.g. to drop state they accumulated (running renders still finish)."""
+        with self._pool_lock:
+            pool = self._pool if self._pool_pid == os.getpid() else None
+        self._recycle(pool, reason)
+
+    def _track_pending(self, delta):
+        with self._pending_lock:
+            self._pending += delta
+            metrics.RENDER_QUEUE_DEPTH.set(self._pending)
+
+    def shutdown(self, wait=True):
+        with self._pool_lock:
+            pool, pool_pid = self._pool, self._pool_pid
+            self._pool = None
+            self._pool_pid = None
+        if pool is not None and pool_pid == os.getpid():
+            pool.shutdown(wait=wait)
+
+
+def distinct_generators(generators):
+    """Number of renders a bundle of `generators` (template_id -> generator) really needs."""
+    return len({template_fingerprint(generator) for generator in generators.values()})
+
+
+def render_bundle(executor, resume_data, generators, profile=DEFAULT_PROFILE):
+    """
+    Renders several templates for one resume in parallel.
+    `generators` maps template_id -> generator function. Templates whose
+    implementation is identical (same fingerprint) are rendered only once.
+    At most one render per pool process is queued at a time, so a bundle can't
+    fill the render queue ahead of single downloads.
+    Yields (template_ids, RenderResult_or_None, error_or_None) as each render finishes;
+    cached PDFs come first, as a render_cache.CachedPDF in place of the RenderResult.
+    """
+    groups = {}
+    for template_id, generator in generators.items():
+        groups.setdefault(template_fingerprint(generator), []).append((template_id, generator))
+    waiting = []
+    for members in groups.values():
+        result = executor.cached(members[0][1], resume_data, profile)
+        if result is not None:
+            yield [template_id for template_id, _ in members], result, None
+        else:
+            waiting.append(members)
+
+    futures = {}
+    while waiting or futures:
+        while waiting and len(futures) < executor.max_workers:
+            members = waiting[0]
+            try:
+                futures[executor.submit(members[0][1], resume_data, lane=BATCH, profile=profile)] = [template_id for template_id, _ in members]
+            except RenderQueueFull as e:
+                if futures:
+                    break # Try again once one of ours has finished
+                # Nothing of ours is running and the queue is still full: give up on the rest
+                metrics.RENDER_REJECTED.inc(reason='queue_full')
+                for members in waiting:
+                    yield [template_id for template_id, _ in members], None, e
+                return
+            waiting.pop(0)
+
+        done, _ = wait(futures, timeout=executor.result_timeout(), return_when=FIRST_COMPLETED)
+        if not done:
+            # The pool stopped answering (a process stuck where signals can't interrupt it)
+            for future, template_ids in futures.items():
+                error = RenderLimitExceeded('time', 'no result from the render pool')
+                record_render_error(template_ids[0], error)
+                yield template_ids, None, error
+            futures.clear()
+        for future in done:
+            template_ids = futures.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Error generating PDF for bundle (templates {', '.join(template_ids)}): {e}")
+                record_render_error(template_ids[0], e)
+                yield template_ids, None, e
+                continue
+            # Shared implementations are rendered once, so the measurement belongs to the template that ran
+            record_render(template_ids[0], result)
+            yield template_ids, result, None
+
+
+class _ZipStream(io.RawIOBase):
+    """Write-only, non-seekable sink that lets zipfile emit chunks as they are written."""
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_bundle_zip(executor, resume_data, generators, filename_prefix, profile=DEFAULT_PROFILE):
+    """Yields the bytes of a ZIP archive, adding each PDF as soon as its render finishes."""
+    sink = _ZipStream()
+    failed = []
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for template_ids, result, error in render_bundle(executor, resume_data, generators, profile):
+            if error is not None:
+                failed.extend(template_ids)
+                continue
+            for template_id in template_ids:
+                archive.writestr(f"{filename_prefix}_{template_id}.pdf", result.pdf)
+            yield sink.drain()
+        if failed:
+            archive.writestr("errors.txt", "These templates could not be generated:\n" + "\n".join(sorted(failed)) + "\n")
+    yield sink.drain()
@@ -0,0 +1,121 @@
+# sessions.py
+# Session backends. Both record how long opening the session took (reported in
+# Server-Timing as 'session').
+#   cookie:     Flask's signed cookie; nothing stored server-side, but the whole
+#               resume has to fit in the ~4 KB a browser keeps per cookie.
+#   filesystem: only a signed session id travels in the cookie; the data lives in
+#               SESSION_DIR, which every worker (and node, via a shared mount) reads.
+import os
+import secrets
+import tempfile
+import time
+
+from flask import g
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSessionInterface, SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+
+
+class _SessionTimingMixin:
+    def open_session(self, app, request):
+        start = time.perf_counter()
+        try:
+            return super().open_session(app, request)
+        finally:
+            g.session_decode_seconds = time.perf_counter() - start
+
+
+class TimedSessionInterface(_SessionTimingMixin, SecureCookieSessionInterface):
+    """Cookie sessions that record how long decoding the session took."""
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(session):
+            session.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+class FilesystemSessionInterface(SessionInterface):
+    """Stores each session as a file named after its random id; the cookie only carries the signed id."""
+    serializer = TaggedJSONSerializer() # Same encoding as cookie sessions, so values round-trip identically
+    salt = 'flex-flask-session-id'
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt=self.salt)
+
+    def _path(self, sid):
+        return os.path.join(self.directory, sid)
+
+    def open_session(self, app, request):
+        if not app.secret_key:
+            return None
+        cookie_value = request.cookies.get(self.get_cookie_name(app))
+        if cookie_value:
+            try:
+                sid = self._signer(app).unsign(cookie_value).decode()
+            except BadSignature:
+                sid = None
+            if sid:
+                path = self._path(sid)
+                try:
+                    if time.time() - os.path.getmtime(path) < app.permanent_session_lifetime.total_seconds():
+                        with open(path) as f:
+                            return ServerSideSession(self.serializer.loads(f.read()), sid=sid)
+                except (OSError, ValueError):
+                    pass # Missing, expired or unreadable: start a fresh session
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified:
+                try:
+                    os.remove(self._path(session.sid))
+                except FileNotFoundError:
+                    pass
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if not self.should_set_cookie(app, session):
+            return
+
+        # Write to a temp file and rename so a concurrent reader never sees a half-written session
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        with os.fdopen(fd, 'w') as f:
+            f.write(self.serializer.dumps(dict(session)))
+        os.replace(tmp_path, self._path(session.sid))
+
+        response.set_cookie(
+            name, self._signer(app).sign(session.sid).decode(),
+            expires=self.get_expiration_time(app, session), httponly=self.get_cookie_httponly(app),
+            domain=domain, path=path, secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+    def purge_expired(self, max_age_seconds):
+        """Removes session files not written for `max_age_seconds`. Returns how many were removed."""
+        removed = 0
+        cutoff = time.time() - max_age_seconds
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+class TimedFilesystemSessionInterface(_SessionTimingMixin, FilesystemSessionInterface):
+    """Filesystem sessions that record how long loading the session took."""
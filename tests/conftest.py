@@ -0,0 +1,19 @@
+# tests/conftest.py
+# Importing app runs create_app() at module level, which writes the secret key and session,
+# render cache and metrics files. Point all of that at a temporary directory before any
+# test module imports app (subprocesses started by tests inherit the environment too).
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_scratch = tempfile.mkdtemp(prefix='flex_flask_tests-')
+os.environ['RESUME_INSTANCE_PATH'] = os.path.join(_scratch, 'instance')
+os.environ['RESUME_METRICS_DIR'] = os.path.join(_scratch, 'metrics')
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_scratch, ignore_errors=True)
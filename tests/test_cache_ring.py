@@ -0,0 +1,121 @@
+# tests/test_cache_ring.py
+# Cache ring placement (cache_ring.py) and what a node does when the owner of a render
+# answers, and when it can't be reached.
+import socket
+import threading
+import time
+
+import pytest
+from werkzeug.serving import make_server
+
+import app
+import cache_ring
+from pdf_templates.base import template_fingerprint
+
+NODES = ['http://node-a:8000', 'http://node-b:8000', 'http://node-c:8000']
+TEMPLATE_ID = 'template_1'
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _resume_owned_by(ring, node):
+    """The sample resume under a name that places its render on `node`."""
+    fingerprint = template_fingerprint(app.AVAILABLE_TEMPLATES[TEMPLATE_ID]['generator'])
+    for i in range(1000):
+        resume_data = dict(app._sample_resume_data(), full_name=f'Applicant {i}', profile_image_path='')
+        if ring.ring.owner(cache_ring.routing_key(fingerprint, resume_data)) == node:
+            return resume_data
+    raise AssertionError(f"no resume placed on {node}")
+
+
+def test_every_key_has_one_owner_and_removing_a_node_moves_only_its_keys():
+    full = cache_ring.HashRing(NODES)
+    reduced = cache_ring.HashRing(NODES[:2])
+    keys = [f'key-{i}' for i in range(2000)]
+    owners = {key: full.owner(key) for key in keys}
+    assert set(owners.values()) == set(NODES)
+    for key in keys:
+        if owners[key] != NODES[2]:
+            assert reduced.owner(key) == owners[key]
+
+
+def test_routing_follows_only_the_fields_the_template_reads():
+    resume_data = {'full_name': 'Ada Lovelace', 'summary': 'Analyst', 'unused': 'x'}
+    fields = frozenset({'full_name', 'summary'})
+    key = cache_ring.routing_key('fingerprint', resume_data, fields)
+    assert cache_ring.routing_key('fingerprint', dict(resume_data, unused='y'), fields) == key
+    assert cache_ring.routing_key('fingerprint', dict(resume_data, summary='Poet'), fields) != key
+    # Unknown fields: the whole resume decides
+    assert cache_ring.routing_key('fingerprint', dict(resume_data, unused='y')) != cache_ring.routing_key('fingerprint', resume_data)
+
+
+def test_own_renders_stay_local():
+    ring = cache_ring.NodeRing(NODES, NODES[0], 'token')
+    resume_data = _resume_owned_by(ring, NODES[0])
+    assert ring.remote_owner(template_fingerprint(app.AVAILABLE_TEMPLATES[TEMPLATE_ID]['generator']), resume_data) is None
+
+
+def test_unreachable_owner_is_marked_down_for_a_while():
+    peer = f'http://127.0.0.1:{_free_port()}' # Nothing listens there
+    ring = cache_ring.NodeRing([NODES[0], peer], NODES[0], 'token', timeout=5, connect_timeout=0.5, down_seconds=0.2)
+    resume_data = _resume_owned_by(ring, peer)
+    fingerprint = template_fingerprint(app.AVAILABLE_TEMPLATES[TEMPLATE_ID]['generator'])
+    assert ring.remote_owner(fingerprint, resume_data) == peer
+
+    with pytest.raises(cache_ring.NodeUnavailable):
+        ring.fetch(peer, TEMPLATE_ID, resume_data, 'draft')
+    assert ring.remote_owner(fingerprint, resume_data) is None
+    time.sleep(0.25)
+    assert ring.remote_owner(fingerprint, resume_data) == peer
+
+
+@pytest.fixture
+def two_nodes(tmp_path):
+    """This node's app and a second node serving on a local port, sharing the secret key."""
+    port = _free_port()
+    nodes = ['http://local-node:8000', f'http://127.0.0.1:{port}']
+    overrides = {'SECRET_KEY': 'shared', 'CACHE_NODES': nodes, 'RENDER_WORKERS': 1, 'RENDER_PROFILE': 'draft'}
+    local = app.create_app(dict(overrides, CACHE_NODE_SELF=nodes[0]), instance_path=str(tmp_path / 'local'))
+    peer = app.create_app(dict(overrides, CACHE_NODE_SELF=nodes[1]), instance_path=str(tmp_path / 'peer'))
+    server = make_server('127.0.0.1', port, peer, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield local, peer, nodes[1]
+    server.shutdown()
+    for node_app in (local, peer):
+        node_app.extensions['render_executor'].shutdown()
+
+
+def _download(node_app, resume_data):
+    client = node_app.test_client()
+    with client.session_transaction() as session:
+        session['resume_data'] = resume_data
+    return client.get(f'/download-resume/{TEMPLATE_ID}')
+
+
+def test_download_comes_from_the_owner(two_nodes):
+    local, peer, peer_url = two_nodes
+    ring = local.extensions['node_ring']
+    resume_data = _resume_owned_by(ring, peer_url)
+
+    response = _download(local, resume_data)
+    assert response.status_code == 200
+    assert response.data.startswith(b'%PDF')
+    assert 'remote' in response.headers['Server-Timing']
+    assert not ring.is_down(peer_url)
+
+
+def test_download_renders_locally_while_the_owner_is_down(two_nodes):
+    local, peer, peer_url = two_nodes
+    ring = local.extensions['node_ring']
+    resume_data = _resume_owned_by(ring, peer_url)
+    ring.mark_down(peer_url)
+
+    response = _download(local, resume_data)
+    assert response.status_code == 200
+    assert response.data.startswith(b'%PDF')
+    assert 'remote' not in response.headers['Server-Timing']
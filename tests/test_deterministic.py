@@ -0,0 +1,67 @@
+# tests/test_deterministic.py
+# Invariant output (pdf_templates.base): every template in AVAILABLE_TEMPLATES renders the same
+# resume to the same bytes, within a process and across processes with different hash seeds.
+import hashlib
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app # noqa: E402
+import rendering # noqa: E402
+import render_cache # noqa: E402
+
+PHOTO = os.path.join(ROOT, 'static', 'images', 'profile.jpg')
+
+# Renders every template twice in a fresh interpreter and prints {template_id: [sha256, sha256]}
+RENDER_ALL = """
+import hashlib, json, sys
+import app, rendering
+data = app._sample_resume_data()
+data['profile_image_path'] = sys.argv[1]
+json.dump({template_id: [hashlib.sha256(rendering.render_pdf(info['generator'], data).pdf).hexdigest() for _ in range(2)]
+           for template_id, info in app.AVAILABLE_TEMPLATES.items()}, sys.stdout)
+"""
+
+
+def _resume_data():
+    data = app._sample_resume_data()
+    data['profile_image_path'] = PHOTO
+    return data
+
+
+@pytest.mark.parametrize('template_id', list(app.AVAILABLE_TEMPLATES))
+def test_template_renders_identical_bytes(template_id):
+    generator = app.AVAILABLE_TEMPLATES[template_id]['generator']
+    first = rendering.render_pdf(generator, _resume_data()).pdf
+    second = rendering.render_pdf(generator, _resume_data()).pdf
+    assert first == second
+
+
+def test_creation_date_follows_the_fields_read():
+    generator = app.AVAILABLE_TEMPLATES['template_1']['generator']
+
+    def creation_date(data):
+        pdf = rendering.render_pdf(generator, render_cache.FieldTrackingDict(data)).pdf
+        return pdf[pdf.index(b'/CreationDate'):].split(b')', 1)[0]
+
+    data = _resume_data()
+    assert creation_date(data) == creation_date(dict(data, field_no_template_reads='x'))
+    assert creation_date(data) != creation_date(dict(data, full_name=data['full_name'] + ' Jr.'))
+
+
+def test_renders_match_across_hash_seeds():
+    results = []
+    for seed in ('0', '1'):
+        env = dict(os.environ, PYTHONHASHSEED=seed, PYTHONPATH=ROOT)
+        completed = subprocess.run([sys.executable, '-c', RENDER_ALL, PHOTO], cwd=ROOT, env=env,
+                                   capture_output=True, text=True, check=True)
+        results.append(json.loads(completed.stdout))
+    for template_id, (first, second) in results[0].items():
+        assert first == second, template_id
+    assert results[0] == results[1]
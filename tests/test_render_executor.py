@@ -0,0 +1,81 @@
+# tests/test_render_executor.py
+# RenderExecutor scheduling: the queue limit, interactive renders overtaking batch work,
+# and the render process kept free of batch jobs. The generators stand in for templates.
+import io
+import time
+
+import pytest
+
+import rendering
+
+HOLD_SECONDS = 0.5
+
+
+def _hold(resume_data):
+    """Occupies a render process for a moment."""
+    time.sleep(HOLD_SECONDS)
+    return io.BytesIO(b'held')
+
+
+def _start_time(resume_data):
+    """Reports when the render process started it."""
+    return io.BytesIO(repr(time.time()).encode())
+
+
+@pytest.fixture
+def make_executor():
+    executors = []
+
+    def make(**options):
+        options.setdefault('seconds_per_cost', 0.0) # Order by arrival and lane only
+        executor = rendering.RenderExecutor(**options)
+        executors.append(executor)
+        return executor
+    yield make
+    for executor in executors:
+        executor.shutdown()
+
+
+def test_queue_limit_rejects_with_retry_after(make_executor):
+    executor = make_executor(max_workers=1, max_pending=2)
+    accepted = [executor.submit(_hold, {}) for _ in range(2)]
+    assert executor.available() == 0
+    with pytest.raises(rendering.RenderQueueFull) as rejected:
+        executor.submit(_hold, {})
+    assert rejected.value.retry_after >= 1
+
+    for future in accepted:
+        assert future.result(timeout=10).pdf == b'held'
+    _wait_for(lambda: executor.available() == 2)
+    assert executor.submit(_hold, {}).result(timeout=10).pdf == b'held'
+
+
+def test_interactive_render_overtakes_waiting_batch_work(make_executor):
+    executor = make_executor(max_workers=1, batch_delay=5.0)
+    busy = executor.submit(_hold, {})
+    batch = executor.submit(_start_time, {}, lane=rendering.BATCH)
+    interactive = executor.submit(_start_time, {}, lane=rendering.INTERACTIVE)
+    assert busy.running() and not batch.running() and not interactive.running()
+
+    batch_start = float(batch.result(timeout=10).pdf)
+    interactive_start = float(interactive.result(timeout=10).pdf)
+    assert interactive_start < batch_start
+
+
+def test_batch_work_leaves_a_process_for_interactive_renders(make_executor):
+    executor = make_executor(max_workers=2)
+    batch = [executor.submit(_hold, {}, lane=rendering.BATCH) for _ in range(2)]
+    assert [future.running() for future in batch] == [True, False]
+
+    interactive = executor.submit(_hold, {}, lane=rendering.INTERACTIVE)
+    assert interactive.running()
+    for future in batch + [interactive]:
+        future.result(timeout=10)
+
+
+def _wait_for(condition, timeout=5.0):
+    """Completion callbacks run on the pool's thread; give them a moment to release queue slots."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
@@ -0,0 +1,49 @@
+# tests/test_sessions.py
+# Any worker can serve any request: app instances built from the same instance folder derive
+# the same secret key, and filesystem sessions written by one are readable by the other.
+import app
+
+
+def _make_app(instance_path, **overrides):
+    application = app.create_app(overrides, instance_path=str(instance_path))
+    application.extensions['render_executor'].shutdown()
+    return application
+
+
+def test_instances_share_the_generated_secret_key(tmp_path):
+    first = _make_app(tmp_path / 'instance')
+    second = _make_app(tmp_path / 'instance')
+    other_host = _make_app(tmp_path / 'other')
+    assert first.secret_key == second.secret_key
+    assert (tmp_path / 'instance' / 'secret_key').read_text().strip() == first.secret_key
+    assert other_host.secret_key != first.secret_key
+
+
+def test_configured_secret_key_wins(tmp_path):
+    assert _make_app(tmp_path / 'instance', SECRET_KEY='configured').secret_key == 'configured'
+
+
+def test_filesystem_session_moves_between_instances(tmp_path):
+    overrides = {'SESSION_BACKEND': 'filesystem'}
+    writer = _make_app(tmp_path / 'instance', **overrides).test_client()
+    reader = _make_app(tmp_path / 'instance', **overrides).test_client()
+
+    with writer.session_transaction() as session:
+        session['resume_data'] = {'full_name': 'Ada Lovelace'}
+    cookie = writer.get_cookie('session')
+    assert 'Ada' not in cookie.value # Only the signed session id travels in the cookie
+
+    reader.set_cookie('session', cookie.value)
+    with reader.session_transaction() as session:
+        assert session['resume_data'] == {'full_name': 'Ada Lovelace'}
+
+
+def test_filesystem_session_needs_the_same_key(tmp_path):
+    writer = _make_app(tmp_path / 'instance', SESSION_BACKEND='filesystem').test_client()
+    stranger = _make_app(tmp_path / 'instance', SESSION_BACKEND='filesystem', SECRET_KEY='another key').test_client()
+
+    with writer.session_transaction() as session:
+        session['resume_data'] = {'full_name': 'Ada Lovelace'}
+    stranger.set_cookie('session', writer.get_cookie('session').value)
+    with stranger.session_transaction() as session:
+        assert 'resume_data' not in session